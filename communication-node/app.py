@@ -9,6 +9,7 @@ import eventlet
 eventlet.monkey_patch()
 
 import sys
+from functools import cache
 from flask import Flask
 import psycopg2
 from dotenv import load_dotenv
@@ -16,8 +17,13 @@ from dotenv import load_dotenv
 from routes.configurator import configurator_bp
 from routes.dashboard import dashboard_bp
 from routes.device import device_bp
+from utils.change_listener import ChangeListener
 from utils.db import DatabaseManager
+from utils.device_state import load_device_states
+from utils.event_types import load_event_types
 from utils.logger_config import get_logger
+from utils.partitions import ensure_partitions
+from utils.purger import PurgeJobs
 
 load_dotenv()
 
@@ -29,15 +35,36 @@ app.register_blueprint(device_bp)
 
 logger = get_logger("app")
 
-if __name__ == "__main__":
+
+@cache
+def startup():
+    """
+    Prepares the database and starts the background workers of this process.
+
+    Runs when the module is imported, so WSGI servers loading `app:app`, e.g.
+    `gunicorn app:app`, run it in every worker as `python app.py` does. The
+    cache makes any later call a no-op.
+    """
     try:
         DatabaseManager.initialize_pool()
 
         # Test the connection to ensure it's working
         connection = DatabaseManager.get_connection()
-        with DatabaseManager.get_connection().cursor() as cursor:
+        with connection.cursor() as cursor:
             cursor.execute("SELECT 1")
             cursor.fetchone()
+
+        # Create the coming months, so new events never land in the default partition
+        with connection.cursor() as cursor:
+            ensure_partitions(cursor)
+        connection.commit()
+
+        # Load the event type codes, then the live device states served by
+        # /api/devices/state
+        with connection.cursor() as cursor:
+            load_event_types(cursor)
+            load_device_states(cursor)
+        connection.commit()
         DatabaseManager.release_connection(connection)
 
         logger.info("Database connection established successfully")
@@ -50,4 +77,17 @@ if __name__ == "__main__":
     finally:
         DatabaseManager.close_all_connections()
 
+    # Invalidate the caches on the writes of the other processes and jobs
+    ChangeListener.start()
+
+    # Finish the purges of deleted businesses and devices a previous run left
+    try:
+        PurgeJobs.resume()
+    except psycopg2.Error as err:
+        logger.error("Error occurred while resuming the purges: %s", err)
+
+
+startup()
+
+if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8000, debug=False)
@@ -0,0 +1,58 @@
+"""
+ASGI application serving the device ingestion and dashboard read endpoints
+on top of the asynchronous database layer.
+
+The WSGI application in `app.py` remains the full API, including the live
+device states, which it refreshes from the change notifications of the events
+ingested here; this entry point runs alongside it for deployments that need
+many concurrent device connections:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8001
+"""
+
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+from asgi_routes import dashboard, device
+from utils.async_db import AsyncDatabaseManager
+from utils.event_types import EVENT_TYPES_QUERY, EventTypes
+from utils.logger_config import get_logger
+
+load_dotenv()
+
+logger = get_logger("asgi_app")
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    """
+    Open the async connection pool and load the event types on startup, close
+    the pool on shutdown.
+    """
+    await AsyncDatabaseManager.initialize_pool()
+    logger.info("Async database connection pool ready")
+
+    async with AsyncDatabaseManager.connection() as connection:
+        cur = await connection.execute(EVENT_TYPES_QUERY)
+        EventTypes.load(await cur.fetchall())
+
+    try:
+        yield
+    finally:
+        await AsyncDatabaseManager.close_all_connections()
+
+
+routes = [
+    Route("/api/send_alert", device.send_alert, methods=["POST"]),
+    Route("/api/send_malfunction", device.send_malfunction, methods=["POST"]),
+    Route("/api/send_log", device.send_log, methods=["POST"]),
+    Route("/api/businesses", dashboard.fetch_all_businesses, methods=["GET"]),
+    Route("/api/alerts", dashboard.fetch_all_alerts, methods=["GET"]),
+    Route("/api/malfunctions", dashboard.fetch_all_malfunctions, methods=["GET"]),
+    Route("/api/devices_logs", dashboard.fetch_all_device_logs, methods=["GET"]),
+    Route("/api/stats", dashboard.get_dashboard_stats, methods=["GET"]),
+]
+
+app = Starlette(routes=routes, lifespan=lifespan)
@@ -0,0 +1,267 @@
+"""
+Asynchronous dashboard read endpoints served by the ASGI entry point.
+Mirrors the query endpoints of `routes/dashboard.py` on top of `AsyncDatabaseManager`.
+
+The event listings only serve the default, unfiltered listing of the hot window.
+Requests using the pagination or filter parameters of the Flask listings are
+answered with 501 rather than with a different result set.
+"""
+
+import psycopg
+from psycopg.rows import dict_row
+from starlette.responses import JSONResponse
+
+from decorators.validate_auth_async import validate_auth_header_async
+from utils.async_db import AsyncDatabaseManager
+from utils.dashboard_stats import STATS_QUERY, stats_from_row
+from utils.event_types import EVENT_TYPES_QUERY, EventTypes
+from utils.incidents import (
+    SENSOR_HEALTHY,
+    SENSOR_MALFUNCTION,
+    SENSOR_NOT_USED,
+    sensor_malfunctioning,
+)
+from utils.logger_config import get_logger
+from utils.serialization import dumps
+
+# Configure logging
+logger = get_logger("async_dashboard_routes")
+
+SENSOR_COLUMNS = ("motion_sensor", "sound_sensor", "gas_sensor", "fire_sensor")
+
+# Query parameters of the Flask listings (`utils.pagination`, `utils.filters`)
+LISTING_PARAMETERS = frozenset(
+    {
+        "limit",
+        "before",
+        "after",
+        "business_id",
+        "device_id",
+        "type",
+        "resolved",
+        "since",
+        "until",
+    }
+)
+
+ALERTS_QUERY = """
+    SELECT
+        a.id, a.device_id, a.alert_type, a.alert_time, a.message, a.resolved,
+        sd.name AS device_name, b.name AS business_name, a.business_id
+    FROM alerts a
+    JOIN security_devices sd ON a.device_id = sd.id AND sd.deleted_at IS NULL
+    JOIN businesses b ON a.business_id = b.id
+    WHERE a.resolved = FALSE
+    ORDER BY a.alert_time DESC, a.id DESC
+"""
+
+MALFUNCTIONS_QUERY = """
+    SELECT
+        m.id, m.device_id, m.malfunction_type, m.malfunction_time, m.message,
+        m.resolved, sd.name AS device_name, b.name AS business_name,
+        m.business_id
+    FROM malfunctions m
+    JOIN security_devices sd ON m.device_id = sd.id AND sd.deleted_at IS NULL
+    JOIN businesses b ON m.business_id = b.id
+    WHERE m.resolved = FALSE
+    ORDER BY m.malfunction_time DESC, m.id DESC
+"""
+
+DEVICE_LOGS_QUERY = """
+    SELECT
+        dl.id, dl.device_id, dl.log_time, dl.log_type, dl.message,
+        sd.name AS device_name, b.name AS business_name, dl.business_id
+    FROM device_logs dl
+    JOIN security_devices sd ON dl.device_id = sd.id AND sd.deleted_at IS NULL
+    JOIN businesses b ON dl.business_id = b.id
+    ORDER BY dl.log_time DESC, dl.id DESC
+"""
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson, which serializes datetimes natively.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+async def fetch_listing(
+    request, query: str, type_column: str, label: str
+) -> JSONResponse:
+    """
+    Runs a listing query and wraps its rows in the dashboard response envelope.
+
+    Args:
+        request: The listing request
+        query (str): The SQL query to run
+        type_column (str): The event type column, translated from codes to names
+        label (str): Human readable resource name used in responses and logs
+
+    Returns:
+        JSONResponse: The rows and their count, or an error message
+    """
+    unsupported = sorted(LISTING_PARAMETERS.intersection(request.query_params))
+    if unsupported:
+        logger.warning("Unsupported %s listing parameters: %s", label, unsupported)
+        return JSONResponse(
+            {
+                "status": "error",
+                "message": f"Unsupported parameters: {', '.join(unsupported)}",
+            },
+            status_code=501,
+        )
+
+    logger.info("Fetching all %s", label)
+
+    try:
+        async with AsyncDatabaseManager.connection() as connection:
+            cur = connection.cursor(row_factory=dict_row)
+            await cur.execute(query)
+            result = await cur.fetchall()
+
+            # Types registered by another process are not cached yet
+            if any(EventTypes.name(row[type_column]) is None for row in result):
+                types_cur = await connection.execute(EVENT_TYPES_QUERY)
+                EventTypes.load(await types_cur.fetchall())
+    except psycopg.Error as e:
+        logger.error("Database error fetching %s: %s", label, e)
+        return JSONResponse(
+            {"status": "error", "message": f"Error fetching {label}"}, status_code=500
+        )
+
+    for row in result:
+        row[type_column] = EventTypes.name(row[type_column])
+
+    logger.info("Successfully fetched %s %s", len(result), label)
+    return ORJSONResponse({"status": "success", "data": result, "count": len(result)})
+
+
+@validate_auth_header_async(required_access_level=0)
+async def fetch_all_businesses(request):
+    """
+    Fetches all the businesses from the database.
+
+    Query Parameters:
+        include_devices (bool): Whether to include device data (default: true)
+
+    Returns:
+        JSONResponse: The businesses and their count.
+    """
+    logger.info("Fetching all businesses")
+
+    include_devices = (
+        request.query_params.get("include_devices", "true").lower() == "true"
+    )
+
+    try:
+        async with AsyncDatabaseManager.connection() as connection:
+            businesses_cur = connection.cursor(row_factory=dict_row)
+            devices_cur = connection.cursor(row_factory=dict_row)
+
+            # The independent queries share a single network round trip
+            async with connection.pipeline():
+                await businesses_cur.execute(
+                    """
+                    SELECT b.id, b.name, b.lat, b.lon, b.address, b.created_at,
+                           b.contact_name, b.contact_email, b.contact_phone,
+                           b.open_alert_count > 0 AS alert
+                    FROM businesses b
+                    WHERE b.deleted_at IS NULL
+                    ORDER BY b.name ASC
+                    """
+                )
+                if include_devices:
+                    await devices_cur.execute(
+                        """
+                        SELECT id, business_id, name, motion_sensor, sound_sensor,
+                               gas_sensor, fire_sensor, created_at,
+                               last_active_at, status, malfunction_mask
+                        FROM security_devices
+                        WHERE deleted_at IS NULL
+                        ORDER BY name ASC
+                        """
+                    )
+
+            result = await businesses_cur.fetchall()
+
+            if include_devices:
+                devices = await devices_cur.fetchall()
+
+                devices_by_business = {}
+                for device in devices:
+                    malfunction_mask = device.pop("malfunction_mask")
+                    for sensor in SENSOR_COLUMNS:
+                        if not device[sensor]:
+                            device[sensor] = SENSOR_NOT_USED
+                        elif sensor_malfunctioning(malfunction_mask, sensor):
+                            device[sensor] = SENSOR_MALFUNCTION
+                        else:
+                            device[sensor] = SENSOR_HEALTHY
+                    devices_by_business.setdefault(
+                        device.pop("business_id"), []
+                    ).append(device)
+
+                for business in result:
+                    business["devices"] = devices_by_business.get(business["id"], [])
+                    business["device_count"] = len(business["devices"])
+
+    except psycopg.Error as e:
+        logger.error("Database error fetching businesses: %s", e)
+        return JSONResponse(
+            {"status": "error", "message": "Error fetching businesses"},
+            status_code=500,
+        )
+
+    logger.info("Successfully fetched %s businesses", len(result))
+    return ORJSONResponse({"status": "success", "data": result, "count": len(result)})
+
+
+@validate_auth_header_async(required_access_level=0)
+async def fetch_all_alerts(request):
+    """
+    Fetches all the unresolved alerts from the database.
+    """
+    return await fetch_listing(request, ALERTS_QUERY, "alert_type", "alerts")
+
+
+@validate_auth_header_async(required_access_level=0)
+async def fetch_all_malfunctions(request):
+    """
+    Fetches all the unresolved malfunctions from the database.
+    """
+    return await fetch_listing(
+        request, MALFUNCTIONS_QUERY, "malfunction_type", "malfunctions"
+    )
+
+
+@validate_auth_header_async(required_access_level=0)
+async def fetch_all_device_logs(request):
+    """
+    Fetches all the device logs from the database.
+    """
+    return await fetch_listing(request, DEVICE_LOGS_QUERY, "log_type", "device logs")
+
+
+@validate_auth_header_async(required_access_level=0)
+async def get_dashboard_stats(_request):
+    """
+    Retrieves various statistics for the dashboard display.
+    """
+    logger.info("Attempting to fetch dashboard statistics.")
+
+    try:
+        async with AsyncDatabaseManager.connection() as connection:
+            cur = await connection.execute(STATS_QUERY)
+            result = await cur.fetchone()
+    except psycopg.Error as e:
+        logger.error("Database error fetching dashboard statistics: %s", e)
+        return JSONResponse(
+            {"status": "error", "message": "Error fetching dashboard statistics"},
+            status_code=500,
+        )
+
+    stats = stats_from_row(result)
+    logger.info("Successfully fetched dashboard statistics: %s", stats)
+    return ORJSONResponse({"status": "success", "data": stats})
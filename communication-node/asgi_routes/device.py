@@ -0,0 +1,183 @@
+"""
+Asynchronous device ingestion endpoints served by the ASGI entry point.
+Mirrors `routes/device.py` on top of `AsyncDatabaseManager`.
+"""
+
+import asyncio
+import psycopg
+from psycopg import sql
+from starlette.responses import JSONResponse
+
+from decorators.validate_auth_async import validate_auth_header_async
+from decorators.validate_json_payload_async import validate_json_payload_async
+from utils.async_db import AsyncDatabaseManager
+from utils.event_types import MAX_EVENT_TYPES, REGISTER_EVENT_TYPE_QUERY, EventTypes
+from utils.websocket_client import SocketIOClient
+from utils.logger_config import get_logger
+
+# Configure logging
+logger = get_logger("async_device_routes")
+
+# Resolves the device from its API key, inserts the event and returns the device
+# context the Socket.IO payload needs, all in a single round trip.
+INSERT_EVENT_QUERY = """
+    WITH device AS (
+        SELECT sd.id, sd.name, b.id AS business_id, b.name AS business_name
+        FROM security_devices sd
+        JOIN api_keys k ON sd.api_key_id = k.id
+        JOIN businesses b ON sd.business_id = b.id
+        WHERE k.api_key = %s AND sd.deleted_at IS NULL
+    ), inserted AS (
+        INSERT INTO {table}(device_id, business_id, {type_column}, message)
+        SELECT id, business_id, %s, %s FROM device
+        RETURNING id, {time_column}
+    )
+    SELECT i.id, i.{time_column}, d.id, d.name, d.business_id, d.business_name
+    FROM inserted i CROSS JOIN device d
+"""
+
+
+async def save_event(api_key: str, table: str, kind: str, event_data: dict):
+    """
+    Persists a device event and returns the payload emitted to the Socket.IO server.
+
+    Args:
+        api_key (str): The API key of the reporting device
+        table (str): The event table (alerts, malfunctions or device_logs)
+        kind (str): The column prefix of the event (alert, malfunction or log)
+        event_data (dict): The JSON payload sent by the device
+
+    Returns:
+        dict: The event payload, or None if the API key has no device attached
+
+    Raises:
+        ValueError: If the type is new and `MAX_EVENT_TYPES` types of the event
+                    are registered already
+    """
+    message = event_data["message"] if event_data.get("message") else None
+    type_name = event_data[f"{kind}_type"]
+    type_code = EventTypes.code(kind, type_name)
+
+    async with AsyncDatabaseManager.connection() as connection:
+        if type_code is None:
+            # New types are committed before the event, like `event_type_code`
+            cur = await connection.execute(
+                REGISTER_EVENT_TYPE_QUERY,
+                {"event": kind, "name": type_name, "limit": MAX_EVENT_TYPES},
+            )
+            registered = await cur.fetchone()
+            await connection.commit()
+            if registered is None:
+                raise ValueError(f"Unknown {kind} type")
+            type_code = registered[0]
+            EventTypes.add(type_code, kind, type_name)
+
+        cur = await connection.execute(
+            sql.SQL(INSERT_EVENT_QUERY).format(
+                table=sql.Identifier(table),
+                type_column=sql.Identifier(f"{kind}_type"),
+                time_column=sql.Identifier(f"{kind}_time"),
+            ),
+            (api_key, type_code, message),
+        )
+        row = await cur.fetchone()
+
+    if row is None:
+        return None
+
+    event_id, event_time, device_id, device_name, business_id, business_name = row
+
+    payload = {
+        "id": event_id,
+        "device_id": device_id,
+        "device_name": device_name,
+        f"{kind}_time": event_time.isoformat(),
+        f"{kind}_type": type_name,
+        "business_name": business_name,
+        "business_id": business_id,
+        "message": message,
+    }
+    if kind == "alert":
+        payload["resolved"] = False
+
+    return payload
+
+
+async def ingest(request, table: str, kind: str, emit_name: str, label: str):
+    """
+    Shared body of the async ingestion endpoints.
+
+    Args:
+        request (Request): The incoming request, already authenticated and validated
+        table (str): The event table to insert into
+        kind (str): The column prefix of the event
+        emit_name (str): The `SocketIOClient` method used to broadcast the event
+        label (str): Human readable event name used in responses and logs
+
+    Returns:
+        JSONResponse: The status of the operation
+    """
+    event_data = request.state.json
+
+    logger.info("%s received: %s", label, event_data)
+
+    try:
+        payload = await save_event(request.state.api_key, table, kind, event_data)
+    except ValueError as e:
+        logger.warning("Rejected %s: %s", label.lower(), e)
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=400)
+    except psycopg.Error as e:
+        logger.error("Error saving %s to database: %s", label.lower(), e)
+        return JSONResponse(
+            {
+                "status": "error",
+                "message": f"Error saving {label.lower()} to database.",
+            },
+            status_code=500,
+        )
+
+    if payload is None:
+        logger.warning("No device is registered for the provided API key")
+        return JSONResponse(
+            {"status": "error", "message": "Device not found."}, status_code=404
+        )
+
+    logger.info("%s saved to database with ID: %s", label, payload["id"])
+
+    # The Socket.IO client is blocking, keep it off the event loop
+    await asyncio.to_thread(lambda: getattr(SocketIOClient(), emit_name)(payload))
+    logger.info("%s emitted to Socket.IO server.", label)
+
+    return JSONResponse(
+        {"status": "success", "message": f"{label} saved to database."},
+        status_code=200,
+    )
+
+
+@validate_auth_header_async(required_access_level=2)
+@validate_json_payload_async("alert_type")
+async def send_alert(request):
+    """
+    Sends an alert to the database.
+    """
+    return await ingest(request, "alerts", "alert", "emit_new_alert", "Alert")
+
+
+@validate_auth_header_async(required_access_level=2)
+@validate_json_payload_async("malfunction_type")
+async def send_malfunction(request):
+    """
+    Sends a malfunction to the database.
+    """
+    return await ingest(
+        request, "malfunctions", "malfunction", "emit_new_malfunction", "Malfunction"
+    )
+
+
+@validate_auth_header_async(required_access_level=2)
+@validate_json_payload_async("log_type")
+async def send_log(request):
+    """
+    Sends a log to the database.
+    """
+    return await ingest(request, "device_logs", "log", "emit_new_log", "Log")
@@ -0,0 +1,154 @@
+"""
+Response caching decorator for API endpoints.
+Serves repeated reads from `ResponseCache` until a write invalidates them, and
+coalesces concurrent identical cache misses into a single computation.
+"""
+
+import time
+from functools import wraps
+from flask import request, make_response
+
+from utils.logger_config import get_logger
+from utils.response_cache import MAX_ENTRY_BYTES, CachedResponse, ResponseCache
+from utils.single_flight import SingleFlight
+
+# Configure logging
+logger = get_logger("cached_response")
+
+
+def cache_key() -> tuple:
+    """
+    Builds the cache key of the current request from its path, which includes
+    the URL parameters, and its normalized query parameters, so parameter
+    order does not matter.
+
+    Returns:
+        tuple: The cache key
+    """
+    params = tuple(sorted(request.args.items(multi=True)))
+    return request.path, params, request.get_data()
+
+
+def tee_stream(chunks, on_complete):
+    """
+    Passes the chunks of a streamed body through while buffering a copy.
+
+    Args:
+        chunks: The iterable body of a streamed response
+        on_complete (callable): Called with the full body once the stream is
+                                exhausted, or with None if it was interrupted
+                                or grew beyond `MAX_ENTRY_BYTES`
+
+    Yields:
+        bytes: The chunks of the body
+    """
+    buffer = []
+    size = 0
+    complete = False
+
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            if buffer is not None:
+                size += len(chunk)
+                if size <= MAX_ENTRY_BYTES:
+                    buffer.append(chunk)
+                else:
+                    buffer = None
+            yield chunk
+        complete = True
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+        on_complete(b"".join(buffer) if complete and buffer is not None else None)
+
+
+def cached_response(*tags, max_age=None):
+    """
+    Decorator to serve an endpoint from the response cache.
+
+    Only successful responses are cached, streamed responses once they were
+    streamed completely and only if they are small enough. On a miss, concurrent
+    identical requests wait for the first one and share its buffered response
+    instead of running the same queries. For a streamed response they wait
+    until it was sent, and only compute on their own if it grew too large to
+    share, or was never sent completely, e.g. to a HEAD request.
+    Place it below the authentication decorators so every request is still
+    authenticated.
+
+    Args:
+        *tags: The tables the resource is built from
+        max_age (int, optional): Expire entries after `max_age` seconds,
+                                 for resources that depend on the current time
+
+    Returns:
+        Function: Decorated function that serves cached responses
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = cache_key()
+
+            entry = ResponseCache.get(key)
+            if entry is not None:
+                logger.debug("Serving %s from the response cache", request.path)
+                return make_response(entry.body, entry.status, entry.headers)
+
+            generation = ResponseCache.generation(*tags)
+            # Requests arriving after a write never join a flight started before it
+            flight_key = (key, generation)
+            flight, leader = SingleFlight.begin(flight_key)
+
+            if not leader:
+                entry = flight.wait()
+                if entry is not None:
+                    logger.debug("Serving %s from a coalesced request", request.path)
+                    return make_response(entry.body, entry.status, entry.headers)
+                return make_response(func(*args, **kwargs))
+
+            response = None
+            try:
+                response = make_response(func(*args, **kwargs))
+            finally:
+                if response is None:
+                    SingleFlight.finish(flight_key, flight, None)
+
+            headers = [("Content-Type", response.content_type)]
+
+            def store(body) -> CachedResponse:
+                if body is None:
+                    return None
+                entry = CachedResponse(
+                    body,
+                    200,
+                    headers,
+                    tags,
+                    time.monotonic() + max_age if max_age else None,
+                )
+                ResponseCache.put(key, entry, generation)
+                return entry
+
+            if response.status_code != 200:
+                SingleFlight.finish(flight_key, flight, None)
+            elif response.is_streamed:
+                published = []
+
+                def publish(body):
+                    if not published:
+                        published.append(body)
+                        SingleFlight.finish(flight_key, flight, store(body))
+
+                response.response = tee_stream(response.response, publish)
+                # A stream closed before it was iterated never runs the tee,
+                # which leaves the followers to compute on their own
+                response.call_on_close(lambda: publish(None))
+            else:
+                SingleFlight.finish(flight_key, flight, store(response.get_data()))
+
+            return response
+
+        return wrapper
+
+    return decorator
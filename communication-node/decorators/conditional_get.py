@@ -0,0 +1,50 @@
+"""
+Conditional GET decorator for API endpoints.
+Answers requests carrying an up-to-date If-None-Match header with 304 Not Modified.
+"""
+
+from functools import wraps
+from flask import request, make_response
+
+from utils.change_tracker import ChangeTracker
+from utils.logger_config import get_logger
+
+# Configure logging
+logger = get_logger("conditional_get")
+
+
+def conditional_get(*tables, time_bucket=None):
+    """
+    Decorator to tag responses with an ETag derived from table versions.
+
+    The ETag combines the versions of the given tables, so a matching
+    If-None-Match is answered without running the endpoint at all.
+
+    Args:
+        *tables: The tables the resource is built from
+        time_bucket (int, optional): Expire the ETag every `time_bucket` seconds,
+                                     for resources that depend on the current time
+
+    Returns:
+        Function: Decorated function that supports conditional requests
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            etag = ChangeTracker.version_token(*tables, time_bucket=time_bucket)
+
+            if request.if_none_match.contains(etag):
+                logger.debug("Resource %s not modified", request.path)
+                response = make_response("", 304)
+                response.set_etag(etag)
+                return response
+
+            response = make_response(func(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+
+        return wrapper
+
+    return decorator
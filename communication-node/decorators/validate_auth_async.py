@@ -0,0 +1,61 @@
+"""
+Authentication decorator for ASGI endpoints.
+Validates API keys in request headers against the database without blocking the event loop.
+"""
+
+from functools import wraps
+from starlette.responses import JSONResponse
+
+from utils.api_key import check_api_key_async
+from utils.logger_config import get_logger
+
+# Configure logging
+logger = get_logger("validate_auth_async")
+
+
+def validate_auth_header_async(required_access_level=0):
+    """
+    Decorator to validate authorization header and API key on an async endpoint.
+
+    Args:
+        required_access_level (int): Minimum access level required
+
+    Returns:
+        Function: Decorated coroutine that validates the API key before proceeding
+    """
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(request, *args, **kwargs):
+            auth_header = request.headers.get("Authorization")
+
+            if not auth_header or not auth_header.lower().startswith("bearer "):
+                logger.warning("Invalid Authorization header format")
+                return JSONResponse(
+                    {
+                        "status": "error",
+                        "message": "Invalid Authorization header format",
+                    },
+                    status_code=400,
+                )
+
+            _, api_key = auth_header.split(" ", 1)
+
+            if not await check_api_key_async(api_key, required_access_level):
+                logger.warning(
+                    "Invalid API key or insufficient access level: %s...", api_key[:8]
+                )
+                return JSONResponse(
+                    {
+                        "status": "error",
+                        "message": "Invalid API key or insufficient access level",
+                    },
+                    status_code=401,
+                )
+
+            request.state.api_key = api_key
+            return await func(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,63 @@
+"""
+Validate JSON Payload decorator for ASGI endpoints.
+Check if all the required fields exist in the JSON payload.
+"""
+
+import json
+from functools import wraps
+from starlette.responses import JSONResponse
+
+from utils.logger_config import get_logger
+
+# Configure logging
+logger = get_logger("validate_json_payload_async")
+
+
+def validate_json_payload_async(*required_fields):
+    """
+    Decorator to validate the JSON payload of an async endpoint.
+    The parsed payload is stored on `request.state.json`.
+
+    Args:
+        *required_fields: Required fields in the JSON payload
+    """
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(request, *args, **kwargs):
+            if request.headers.get("content-type", "").split(";")[0] != (
+                "application/json"
+            ):
+                logger.warning("Request content-type is not application/json")
+                return JSONResponse(
+                    {"status": "error", "message": "Request must be JSON"},
+                    status_code=400,
+                )
+
+            try:
+                data = await request.json()
+            except json.JSONDecodeError:
+                logger.warning("Request body is not valid JSON")
+                return JSONResponse(
+                    {"status": "error", "message": "Request must be JSON"},
+                    status_code=400,
+                )
+
+            # Check if all required fields are present
+            missing_fields = [field for field in required_fields if field not in data]
+            if missing_fields:
+                logger.warning("Missing required fields: %s", ", ".join(missing_fields))
+                return JSONResponse(
+                    {
+                        "status": "error",
+                        "message": f"Missing required fields: {', '.join(missing_fields)}",
+                    },
+                    status_code=400,
+                )
+
+            request.state.json = data
+            return await func(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -10,7 +10,9 @@ from psycopg2 import sql
 from decorators.validate_auth import validate_auth_header
 from decorators.db_retry import retry_on_db_error
 from decorators.validate_json_payload import validate_json_payload
+from utils.change_tracker import ChangeTracker
 from utils.db import DatabaseManager
+from utils.device_state import DeviceStates
 from utils.logger_config import get_logger
 
 # Configure logging
@@ -55,7 +57,7 @@ def register_device():
         # Validate business ID
         with connection.cursor() as cur:
             cur.execute(
-                "SELECT id FROM businesses WHERE id = %s LIMIT 1",
+                "SELECT id FROM businesses WHERE id = %s AND deleted_at IS NULL LIMIT 1",
                 (device_config["business_id"],),
             )
             if cur.fetchone() is None:
@@ -124,7 +126,8 @@ def register_device():
                     INSERT INTO security_devices(
                         api_key_id, name, motion_sensor, sound_sensor,
                         fire_sensor, gas_sensor, business_id
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    RETURNING id, pg_current_xact_id()::text::bigint
                 """
                 ),
                 (
@@ -137,8 +140,20 @@ def register_device():
                     device_config["business_id"],
                 ),
             )
-            device_id = cur.fetchone()[0]
+            device_id, txid = cur.fetchone()
             connection.commit()
+            DeviceStates.add_device(
+                txid,
+                device_id,
+                device_config["business_id"],
+                {
+                    "motion_sensor": device_config["motion"],
+                    "sound_sensor": device_config["sound"],
+                    "fire_sensor": device_config["fire"],
+                    "gas_sensor": device_config["gas"],
+                },
+            )
+            ChangeTracker.bump("security_devices")
 
             logger.info("Device registered successfully with ID: %s", device_id)
             return (
@@ -204,7 +219,8 @@ def business_exists(business_id):
     try:
         with connection.cursor() as cur:
             cur.execute(
-                "SELECT id FROM businesses WHERE id = %s LIMIT 1", (business_id,)
+                "SELECT id FROM businesses WHERE id = %s AND deleted_at IS NULL LIMIT 1",
+                (business_id,),
             )
             result = cur.fetchone()
 
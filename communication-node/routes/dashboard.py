@@ -5,15 +5,68 @@ Provides API endpoints for retrieving business and device data.
 
 import hashlib
 import uuid
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable
 from flask import Blueprint, jsonify, request
 import psycopg2
 from psycopg2 import sql
 
 from decorators.validate_auth import validate_auth_header
+from decorators.cached_response import cached_response
+from decorators.conditional_get import conditional_get
 from decorators.db_retry import retry_on_db_error
 from decorators.validate_json_payload import validate_json_payload
+from utils.change_log import (
+    CursorExpiredError,
+    current_watermark,
+    decode_change_cursor,
+    read_changes,
+)
+from utils.archive import EventArchive, archive_columns
+from utils.bulk_resolve import (
+    ResolveFilter,
+    ResolveJob,
+    ResolveJobs,
+    parse_resolve_filter,
+    run_resolve_job,
+)
+from utils.change_tracker import ChangeTracker
+from utils.dashboard_stats import STATS_QUERY, stats_from_row
 from utils.db import DatabaseManager
+from utils.device_state import DeviceStates
+from utils.event_types import FIRE_ALERT, MOTION_ALERT, event_type_name
+from utils.filters import (
+    parse_int_arg,
+    parse_listing_filters,
+    parse_row_filter,
+    parse_time_arg,
+)
+from utils.geo import MIN_ZOOM, bbox_condition, parse_bbox, parse_zoom
+from utils.incidents import (
+    SENSOR_HEALTHY,
+    SENSOR_MALFUNCTION,
+    SENSOR_NOT_USED,
+    sensor_malfunctioning,
+)
 from utils.logger_config import get_logger
+from utils.map_clusters import MAX_CLUSTER_ZOOM, MapClusters
+from utils.pagination import (
+    keyset_query,
+    merge_rows,
+    page_rows,
+    parse_page_args,
+    select_page_rows,
+)
+from utils.purger import PurgeJobs, soft_delete
+from utils.serialization import json_response, row_serializer
+from utils.streaming import (
+    StreamSlots,
+    open_server_side_cursor,
+    stream_json_iterable,
+    stream_json_rows,
+)
+from utils.websocket_client import SocketIOClient
 
 # Configure logging
 logger = get_logger("dashboard_routes")
@@ -21,201 +74,573 @@ logger = get_logger("dashboard_routes")
 # Create Blueprint
 dashboard_bp = Blueprint("dashboard", __name__)
 
-# Sensor Status
-SENSOR_NOT_USED = -1
-SENSOR_HEALTHY = 1
-SENSOR_MALFUNCTION = 2
+SENSOR_COLUMNS = ("motion_sensor", "sound_sensor", "gas_sensor", "fire_sensor")
+
+# Map zoom level from which the viewport endpoint includes device health
+VIEWPORT_DEVICES_MIN_ZOOM = 14
+
+# Upper bound for the number of businesses returned for one viewport
+MAX_VIEWPORT_BUSINESSES = 2000
+
+# Upper bound for the number of open alerts and malfunctions of a business detail
+MAX_OPEN_INCIDENTS = 500
+
+# Listing queries, completed with a WHERE clause by their endpoints
+ALERTS_SELECT = sql.SQL(
+    """
+        SELECT
+            a.id,
+            a.device_id,
+            a.alert_type,
+            a.alert_time,
+            a.message,
+            a.resolved,
+            sd.name AS device_name,
+            b.name AS business_name,
+            a.business_id
+        FROM
+            alerts a
+        JOIN
+            security_devices sd ON a.device_id = sd.id AND sd.deleted_at IS NULL
+        JOIN
+            businesses b ON a.business_id = b.id
+    """
+)
+
+MALFUNCTIONS_SELECT = sql.SQL(
+    """
+        SELECT
+            m.id,
+            m.device_id,
+            m.malfunction_type,
+            m.malfunction_time,
+            m.message,
+            m.resolved,
+            sd.name AS device_name,
+            b.name AS business_name,
+            m.business_id
+        FROM
+            malfunctions m
+        JOIN
+            security_devices sd ON m.device_id = sd.id AND sd.deleted_at IS NULL
+        JOIN
+            businesses b ON m.business_id = b.id
+    """
+)
+
+# Business query without the soft deleted businesses, completed with AND conditions.
+# The alert and malfunction flags are read from the open incident counters.
+BUSINESSES_SELECT = sql.SQL(
+    """
+        SELECT b.id, b.name, b.lat, b.lon, b.address, b.created_at,
+               b.contact_name, b.contact_email, b.contact_phone,
+               b.open_alert_count > 0 AS alert
+        FROM businesses b
+        WHERE b.deleted_at IS NULL
+    """
+)
+
+# Map viewport query, completed with the bounding box condition
+VIEWPORT_BUSINESSES_SELECT = sql.SQL(
+    """
+        SELECT b.id, b.name, b.lat, b.lon, b.address,
+               b.open_alert_count > 0 AS alert,
+               EXISTS (
+                   SELECT 1
+                   FROM security_devices sd
+                   WHERE sd.business_id = b.id AND sd.deleted_at IS NULL
+                     AND sd.malfunction_mask <> 0
+               ) AS malfunction
+        FROM businesses b
+        WHERE b.deleted_at IS NULL
+    """
+)
+
+DEVICE_LOGS_SELECT = sql.SQL(
+    """
+        SELECT
+            dl.id,
+            dl.device_id,
+            dl.log_time,
+            dl.log_type,
+            dl.message,
+            sd.name AS device_name,
+            b.name AS business_name,
+            dl.business_id
+        FROM
+            device_logs dl
+        JOIN
+            security_devices sd ON dl.device_id = sd.id AND sd.deleted_at IS NULL
+        JOIN
+            businesses b ON dl.business_id = b.id
+    """
+)
 
 
-def check_sensor_malfunction(device_id: int, sensor_type: str) -> int:
+def sensor_status(enabled: bool, sensor_type: str, malfunction_mask: int) -> int:
     """
-    Checks if a specific sensor type of a device has reported a malfunction.
+    Computes the health status of a specific sensor of a device.
 
     Args:
-        device_id (int): The ID of the device.
+        enabled (bool): Whether the device uses this sensor.
         sensor_type (str): The type of sensor to check for malfunctions.
+        malfunction_mask (int): The `malfunction_mask` of the device.
+
+    Returns:
+        int: SENSOR_NOT_USED, SENSOR_HEALTHY or SENSOR_MALFUNCTION.
+    """
+    if not enabled:
+        return SENSOR_NOT_USED
+    if sensor_malfunctioning(malfunction_mask, sensor_type):
+        return SENSOR_MALFUNCTION
+    return SENSOR_HEALTHY
+
+
+# JSON keys of the listing columns, in SELECT order. Event type codes are
+# translated to their names.
+serialize_business = row_serializer(
+    (
+        "id",
+        "name",
+        "lat",
+        "lon",
+        "address",
+        "created_at",
+        "contact_name",
+        "contact_email",
+        "contact_phone",
+        "alert",
+    )
+)
+serialize_viewport_business = row_serializer(
+    ("id", "name", "lat", "lon", "address", "alert", "malfunction")
+)
+serialize_alert = row_serializer(
+    (
+        "id",
+        "device_id",
+        "alert_type",
+        "alert_time",
+        "message",
+        "resolved",
+        "device_name",
+        "business_name",
+        "business_id",
+    ),
+    {"alert_type": event_type_name},
+)
+serialize_malfunction = row_serializer(
+    (
+        "id",
+        "device_id",
+        "malfunction_type",
+        "malfunction_time",
+        "message",
+        "resolved",
+        "device_name",
+        "business_name",
+        "business_id",
+    ),
+    {"malfunction_type": event_type_name},
+)
+serialize_device_log = row_serializer(
+    (
+        "id",
+        "device_id",
+        "log_time",
+        "log_type",
+        "message",
+        "device_name",
+        "business_name",
+        "business_id",
+    ),
+    {"log_type": event_type_name},
+)
+
+
+@dataclass(frozen=True, slots=True)
+class EventListing:
+    """
+    A time-ordered listing of an event table, served by `fetch_listing`.
+    """
+
+    table: str
+    # The SELECT ... FROM ... JOIN part of the listing query, starting with
+    # the row ID and the columns of `archive_columns`
+    select_query: sql.Composable
+    # The alias of the event table in the query
+    alias: str
+    # The column prefix of the event: alert, malfunction or log
+    kind: str
+    # Converts a row tuple to its JSON representation
+    serialize_row: Callable
+    # Human readable resource name used in responses and logs
+    label: str
+    # Whether the event table has a `resolved` column
+    resolvable: bool
+
+    @property
+    def time_index(self) -> int:
+        """
+        Position of the time column in the rows of the listing.
+        """
+        return archive_columns(self.table).index(f"{self.kind}_time")
+
+
+ALERTS_LISTING = EventListing(
+    "alerts", ALERTS_SELECT, "a", "alert", serialize_alert, "alerts", True
+)
+MALFUNCTIONS_LISTING = EventListing(
+    "malfunctions",
+    MALFUNCTIONS_SELECT,
+    "m",
+    "malfunction",
+    serialize_malfunction,
+    "malfunctions",
+    True,
+)
+DEVICE_LOGS_LISTING = EventListing(
+    "device_logs",
+    DEVICE_LOGS_SELECT,
+    "dl",
+    "log",
+    serialize_device_log,
+    "device logs",
+    False,
+)
+
+
+def fetch_devices_by_business(
+    cur, business_ids: list = None, device_ids: list = None
+) -> dict:
+    """
+    Fetches devices together with their sensor health, grouped by business.
+
+    Sensor health is read from the `malfunction_mask` of each device, so
+    the malfunctions table is not read at all.
+
+    Args:
+        cur: An open database cursor
+        business_ids (list, optional): Restricts the result to these businesses
+        device_ids (list, optional): Restricts the result to these devices
+
+    Returns:
+        dict: Maps each business ID to the list of its devices.
+    """
+    conditions = [sql.SQL("sd.deleted_at IS NULL")]
+    params = []
+    if business_ids is not None:
+        conditions.append(sql.SQL("sd.business_id = ANY(%s)"))
+        params.append(business_ids)
+    if device_ids is not None:
+        conditions.append(sql.SQL("sd.id = ANY(%s)"))
+        params.append(device_ids)
+
+    cur.execute(
+        sql.SQL(
+            """
+            SELECT
+                sd.id, sd.business_id, sd.name, sd.motion_sensor, sd.sound_sensor,
+                sd.gas_sensor, sd.fire_sensor, sd.created_at,
+                sd.last_active_at, sd.status, sd.malfunction_mask
+            FROM security_devices sd
+            WHERE {conditions}
+            ORDER BY sd.name ASC
+            """
+        ).format(conditions=sql.SQL(" AND ").join(conditions)),
+        params,
+    )
+
+    devices = {}
+    for d in cur:
+        device_data = {"id": d[0], "name": d[2]}
+        for sensor, enabled in zip(SENSOR_COLUMNS, d[3:7]):
+            device_data[sensor] = sensor_status(enabled, sensor, d[10])
+        device_data["created_at"] = d[7]
+        device_data["last_active_at"] = d[8]
+        device_data["status"] = d[9]
+
+        devices.setdefault(d[1], []).append(device_data)
+
+    return devices
+
+
+@dashboard_bp.route("/api/businesses", methods=["GET"])
+@validate_auth_header(required_access_level=0)
+@conditional_get("businesses", "security_devices", "alerts", "malfunctions")
+@cached_response("businesses", "security_devices", "alerts", "malfunctions")
+@retry_on_db_error()
+def fetch_all_businesses():
+    """
+    Fetches all the businesses from the database.
+
+    Businesses, devices and sensor health are loaded with two queries,
+    independently of the number of businesses and devices.
+
+    Query Parameters:
+        include_devices (bool): Whether to include device data (default: true)
 
     Returns:
-        bool: True if the sensor has reported a malfunction, False otherwise.
+        Response: A JSON response with the businesses and HTTP 200 code.
     """
+    logger.info("Fetching all businesses")
+
+    # Parse query parameters
+    include_devices = request.args.get("include_devices", "true").lower() == "true"
+
     connection = DatabaseManager.get_connection()
 
     try:
         with connection.cursor() as cur:
-            cur.execute(
-                sql.SQL(
-                    """
-                    SELECT EXISTS (
-                        SELECT 1
-                        FROM malfunctions
-                        WHERE device_id = %s AND malfunction_type = %s AND resolved = FALSE
-                    )
-                    """
-                ),
-                (device_id, sensor_type),
-            )
-            return SENSOR_MALFUNCTION if cur.fetchone()[0] else SENSOR_HEALTHY
+            cur.execute(sql.SQL("{} ORDER BY b.name ASC").format(BUSINESSES_SELECT))
+            businesses = cur.fetchall()
+
+            devices = fetch_devices_by_business(cur) if include_devices else {}
+
+        result = []
+        for b in businesses:
+            business_data = serialize_business(b)
+
+            if include_devices:
+                business_data["devices"] = devices.get(b[0], [])
+                business_data["device_count"] = len(business_data["devices"])
+
+            result.append(business_data)
+
+        logger.info("Successfully fetched %s businesses", len(result))
+
+        return json_response(
+            {"status": "success", "data": result, "count": len(result)}
+        )
 
     except psycopg2.Error as e:
-        logger.error("Database error checking sensor malfunction: %s", e)
-        raise
+        logger.error("Database error fetching businesses: %s", e)
 
+        return jsonify({"status": "error", "message": "Error fetching businesses"}), 500
     finally:
         DatabaseManager.release_connection(connection)
 
 
-def fetch_business_devices(business_id: int) -> list:
+@dashboard_bp.route("/api/businesses/viewport", methods=["GET"])
+@validate_auth_header(required_access_level=0)
+@conditional_get("businesses", "security_devices", "alerts", "malfunctions")
+@cached_response("businesses", "security_devices", "alerts", "malfunctions")
+@retry_on_db_error()
+def fetch_businesses_in_viewport():
     """
-    Fetches all the devices utilized by a business.
+    Fetches the businesses located inside a map viewport.
 
-    Args:
-        business_id (int): The ID of the business
+    The box is matched against the GiST index on the business locations, so
+    the cost depends on the number of visible businesses, not the fleet size.
+    Device health is included from `VIEWPORT_DEVICES_MIN_ZOOM` on, below that
+    each business only carries its alert and malfunction flags.
+
+    Query Parameters:
+        bbox (str): The viewport as 'west,south,east,north' in degrees
+        zoom (int): The map zoom level (default: 0)
+        include_devices (bool): Include device data at any zoom level
 
     Returns:
-        list: Contains all the devices used by the business.
+        Response: A JSON response with the visible businesses and HTTP 200 code.
     """
-    logger.info("Fetching devices for business ID: %s", business_id)
-
+    try:
+        bbox = parse_bbox(request.args)
+        zoom = parse_zoom(request.args, default=MIN_ZOOM)
+    except ValueError as e:
+        logger.warning("Invalid viewport parameters: %s", e)
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    include_devices = (
+        zoom >= VIEWPORT_DEVICES_MIN_ZOOM
+        or request.args.get("include_devices", "false").lower() == "true"
+    )
+    logger.info("Fetching businesses in viewport %s at zoom %s", bbox, zoom)
+
+    condition, params = bbox_condition(bbox)
     connection = DatabaseManager.get_connection()
 
     try:
         with connection.cursor() as cur:
             cur.execute(
-                """
-                SELECT
-                    id, name, motion_sensor, sound_sensor,
-                    gas_sensor, fire_sensor, created_at,
-                    last_active_at, status
-                FROM security_devices
-                WHERE business_id = %s
-                ORDER BY name ASC
-                """,
-                (business_id,),
+                sql.SQL("{} AND {} ORDER BY b.id LIMIT %s").format(
+                    VIEWPORT_BUSINESSES_SELECT, condition
+                ),
+                (*params, MAX_VIEWPORT_BUSINESSES + 1),
+            )
+            businesses = cur.fetchall()
+
+            truncated = len(businesses) > MAX_VIEWPORT_BUSINESSES
+            businesses = businesses[:MAX_VIEWPORT_BUSINESSES]
+
+            devices = (
+                fetch_devices_by_business(cur, business_ids=[b[0] for b in businesses])
+                if include_devices and businesses
+                else {}
             )
-            devices = cur.fetchall()
-
-            result = []
-            for d in devices:
-                device_data = {
-                    "id": d[0],
-                    "name": d[1],
-                    "motion_sensor": (
-                        check_sensor_malfunction(d[0], "motion_sensor")
-                        if d[2]
-                        else SENSOR_NOT_USED
-                    ),
-                    "sound_sensor": (
-                        check_sensor_malfunction(d[0], "sound_sensor")
-                        if d[3]
-                        else SENSOR_NOT_USED
-                    ),
-                    "gas_sensor": (
-                        check_sensor_malfunction(d[0], "gas_sensor")
-                        if d[4]
-                        else SENSOR_NOT_USED
-                    ),
-                    "fire_sensor": (
-                        check_sensor_malfunction(d[0], "fire_sensor")
-                        if d[5]
-                        else SENSOR_NOT_USED
-                    ),
-                }
 
-                # Add additional fields if they exist in the database
-                if len(d) > 6:
-                    device_data["created_at"] = d[6].isoformat() if d[6] else None
-                if len(d) > 7:
-                    device_data["last_active_at"] = d[7].isoformat() if d[7] else None
-                if len(d) > 8:
-                    device_data["status"] = d[8]
+        result = []
+        for b in businesses:
+            business_data = serialize_viewport_business(b)
 
-                result.append(device_data)
+            if include_devices:
+                business_data["devices"] = devices.get(b[0], [])
+                business_data["device_count"] = len(business_data["devices"])
 
-            return result
+            result.append(business_data)
 
-    except psycopg2.Error as e:
-        logger.error(
-            "Database error fetching devices for business %s: %s", business_id, e
+        logger.info("Successfully fetched %s businesses in viewport", len(result))
+
+        return json_response(
+            {
+                "status": "success",
+                "data": result,
+                "count": len(result),
+                "truncated": truncated,
+            }
         )
 
-        raise
+    except psycopg2.Error as e:
+        logger.error("Database error fetching businesses in viewport: %s", e)
 
+        return jsonify({"status": "error", "message": "Error fetching businesses"}), 500
     finally:
         DatabaseManager.release_connection(connection)
 
 
-@dashboard_bp.route("/api/businesses", methods=["GET"])
+@dashboard_bp.route("/api/businesses/clusters", methods=["GET"])
 @validate_auth_header(required_access_level=0)
+@conditional_get("businesses", "security_devices", "alerts", "malfunctions")
+@cached_response("businesses", "security_devices", "alerts", "malfunctions")
 @retry_on_db_error()
-def fetch_all_businesses():
+def fetch_business_clusters():
     """
-    Fetches all the businesses from the database.
+    Fetches the precomputed business clusters of a map zoom level.
+
+    Businesses are grouped on a grid of 64 pixel cells per zoom level. Each
+    cluster carries its centroid, its number of businesses and the highest
+    alert state among them (0 normal, 1 malfunction, 2 alert). The clusters
+    are kept in memory and only the businesses changed since the last read
+    are reloaded.
 
     Query Parameters:
-        include_devices (bool): Whether to include device data (default: true)
+        zoom (int): The map zoom level, capped at `MAX_CLUSTER_ZOOM`
+        bbox (str, optional): Only clusters inside 'west,south,east,north'
 
     Returns:
-        Response: A JSON response with the businesses and HTTP 200 code.
+        Response: A JSON response with the clusters and HTTP 200 code.
     """
-    logger.info("Fetching all businesses")
+    try:
+        zoom = min(parse_zoom(request.args), MAX_CLUSTER_ZOOM)
+        bbox = parse_bbox(request.args) if "bbox" in request.args else None
+    except ValueError as e:
+        logger.warning("Invalid cluster parameters: %s", e)
+        return jsonify({"status": "error", "message": str(e)}), 400
 
-    # Parse query parameters
-    include_devices = request.args.get("include_devices", "true").lower() == "true"
+    logger.info("Fetching business clusters at zoom %s", zoom)
+
+    connection = DatabaseManager.get_connection()
+
+    try:
+        with connection.cursor() as cur:
+            MapClusters.refresh(cur)
+        connection.commit()
+
+        result = MapClusters.clusters(zoom, bbox)
+
+        logger.info("Successfully fetched %s business clusters", len(result))
+
+        return json_response(
+            {"status": "success", "data": result, "count": len(result), "zoom": zoom}
+        )
+
+    except psycopg2.Error as e:
+        logger.error("Database error fetching business clusters: %s", e)
+
+        connection.rollback()
+        return (
+            jsonify({"status": "error", "message": "Error fetching business clusters"}),
+            500,
+        )
+    finally:
+        DatabaseManager.release_connection(connection)
+
+
+@dashboard_bp.route("/api/businesses/<int:business_id>", methods=["GET"])
+@validate_auth_header(required_access_level=0)
+@conditional_get("businesses", "security_devices", "alerts", "malfunctions")
+@cached_response("businesses", "security_devices", "alerts", "malfunctions")
+@retry_on_db_error()
+def fetch_business(business_id: int):
+    """
+    Fetches a single business with its devices and open incidents.
+
+    Four indexed queries are run whatever the size of the fleet: the
+    business, its devices with sensor health, and its newest unresolved
+    alerts and malfunctions (up to `MAX_OPEN_INCIDENTS` each).
+
+    Args:
+        business_id (int): The ID of the business.
+
+    Returns:
+        Response: A JSON response with the business and HTTP 200 code,
+                  or HTTP 404 if the business does not exist.
+    """
+    logger.info("Fetching business with ID: %s", business_id)
 
     connection = DatabaseManager.get_connection()
 
     try:
         with connection.cursor() as cur:
             cur.execute(
-                """
-                SELECT b.id, b.name, b.lat, b.lon, b.address, b.created_at,
-                       b.contact_name, b.contact_email, b.contact_phone,
-                       EXISTS (
-                           SELECT 1
-                           FROM security_devices sd
-                           JOIN alerts a ON sd.id = a.device_id
-                           WHERE sd.business_id = b.id AND a.resolved = FALSE
-                       ) AS alert
-                FROM businesses b
-                ORDER BY b.name ASC
-                """
+                sql.SQL("{} AND b.id = %s").format(BUSINESSES_SELECT),
+                (business_id,),
             )
-            businesses = cur.fetchall()
+            business = cur.fetchone()
 
-        result = []
-        for b in businesses:
-            business_data = {
-                "id": b[0],
-                "name": b[1],
-                "lat": b[2],
-                "lon": b[3],
-                "address": b[4],
-                "alert": b[9],
-            }
+            if business is None:
+                logger.warning("Business with ID %s not found", business_id)
+                return (
+                    jsonify({"status": "error", "message": "Business not found"}),
+                    404,
+                )
 
-            if len(b) > 5:
-                business_data["created_at"] = b[5].isoformat() if b[5] else None
-            if len(b) > 6:
-                business_data["contact_name"] = b[6]
-            if len(b) > 7:
-                business_data["contact_email"] = b[7]
-            if len(b) > 8:
-                business_data["contact_phone"] = b[8]
+            devices = fetch_devices_by_business(cur, business_ids=[business_id])
 
-            if include_devices:
-                business_data["devices"] = fetch_business_devices(b[0])
-                business_data["device_count"] = len(business_data["devices"])
+            open_incidents = {}
+            for listing in (ALERTS_LISTING, MALFUNCTIONS_LISTING):
+                cur.execute(
+                    sql.SQL(
+                        """
+                        {select} WHERE {business} = %s AND {resolved} = FALSE
+                        ORDER BY {time} DESC, {id} DESC
+                        LIMIT %s
+                        """
+                    ).format(
+                        select=listing.select_query,
+                        business=sql.Identifier(listing.alias, "business_id"),
+                        resolved=sql.Identifier(listing.alias, "resolved"),
+                        time=sql.Identifier(listing.alias, f"{listing.kind}_time"),
+                        id=sql.Identifier(listing.alias, "id"),
+                    ),
+                    (business_id, MAX_OPEN_INCIDENTS),
+                )
+                open_incidents[listing.table] = [
+                    listing.serialize_row(row) for row in cur.fetchall()
+                ]
 
-            result.append(business_data)
+        business_data = serialize_business(business)
+        business_data["devices"] = devices.get(business_id, [])
+        business_data["device_count"] = len(business_data["devices"])
+        business_data.update(open_incidents)
 
-        logger.info("Successfully fetched %s businesses", len(result))
+        logger.info("Successfully fetched business with ID: %s", business_id)
 
-        return jsonify({"status": "success", "data": result, "count": len(result)}), 200
+        return json_response({"status": "success", "data": business_data})
 
     except psycopg2.Error as e:
-        logger.error("Database error fetching businesses: %s", e)
+        logger.error("Database error fetching business: %s", e)
 
-        return jsonify({"status": "error", "message": "Error fetching businesses"}), 500
+        return jsonify({"status": "error", "message": "Error fetching business"}), 500
     finally:
         DatabaseManager.release_connection(connection)
 
@@ -267,6 +692,8 @@ def add_business():
 
             business_id = cur.fetchone()[0]
             connection.commit()
+            MapClusters.mark_dirty(business_id)
+            ChangeTracker.bump("businesses")
 
             logger.info("Business registered successfully with ID: %s", business_id)
             return (
@@ -301,11 +728,16 @@ def delete_business(business_id: int):
     """
     Deletes a business from the database.
 
+    The business and its devices are soft deleted, which hides them from
+    every read right away. Their rows are then removed in the background,
+    see `run_purge_job`.
+
     Args:
         business_id (int): The ID of the business to delete.
 
     Returns:
-        Response: A JSON response with the status of the operation.
+        Response: A JSON response with the status of the operation and the
+                  purge job, with HTTP 202 code.
     """
     logger.info("Deleting business with ID: %s", business_id)
 
@@ -313,16 +745,34 @@ def delete_business(business_id: int):
 
     try:
         with connection.cursor() as cur:
-            cur.execute(
-                sql.SQL("DELETE FROM businesses WHERE id = %s"),
-                (business_id,),
-            )
+            deleted = soft_delete(cur, "business", business_id)
 
             connection.commit()
 
-            logger.info("Business deleted successfully")
+        if deleted is None:
+            logger.warning("Business with ID %s not found", business_id)
             return jsonify({"status": "success", "message": "Business deleted"}), 200
 
+        MapClusters.mark_dirty(business_id)
+        DeviceStates.remove_devices(None, *deleted[1])
+        ChangeTracker.bump(
+            "businesses",
+            "security_devices",
+            "alerts",
+            "malfunctions",
+            "device_logs",
+        )
+        SocketIOClient().emit_entity_deleted(
+            {"entity": "business", "ids": [business_id], "device_ids": deleted[1]}
+        )
+        job = PurgeJobs.start("business", business_id)
+
+        logger.info("Business deleted successfully")
+        return json_response(
+            {"status": "success", "message": "Business deleted", "data": job.to_dict()},
+            202,
+        )
+
     except psycopg2.Error as e:
         logger.error("Database error deleting business: %s", e)
 
@@ -341,11 +791,15 @@ def delete_device(device_id: int):
     """
     Deletes a device from the database.
 
+    The device is soft deleted, which hides it from every read right away.
+    Its rows are then removed in the background, see `run_purge_job`.
+
     Args:
         device_id (int): The ID of the device to delete.
 
     Returns:
-        Response: A JSON response with the status of the operation.
+        Response: A JSON response with the status of the operation and the
+                  purge job, with HTTP 202 code.
     """
     logger.info("Deleting device with ID: %s", device_id)
 
@@ -353,16 +807,28 @@ def delete_device(device_id: int):
 
     try:
         with connection.cursor() as cur:
-            cur.execute(
-                sql.SQL("DELETE FROM security_devices WHERE id = %s"),
-                (device_id,),
-            )
+            deleted = soft_delete(cur, "device", device_id)
 
             connection.commit()
 
-            logger.info("Device deleted successfully")
+        if deleted is None:
+            logger.warning("Device with ID %s not found", device_id)
             return jsonify({"status": "success", "message": "Device deleted"}), 200
 
+        MapClusters.mark_dirty(deleted[0])
+        DeviceStates.remove_devices(None, device_id)
+        ChangeTracker.bump("security_devices", "alerts", "malfunctions", "device_logs")
+        SocketIOClient().emit_entity_deleted(
+            {"entity": "device", "ids": [device_id], "business_ids": [deleted[0]]}
+        )
+        job = PurgeJobs.start("device", device_id)
+
+        logger.info("Device deleted successfully")
+        return json_response(
+            {"status": "success", "message": "Device deleted", "data": job.to_dict()},
+            202,
+        )
+
     except psycopg2.Error as e:
         logger.error("Database error deleting device: %s", e)
 
@@ -375,6 +841,69 @@ def delete_device(device_id: int):
         DatabaseManager.release_connection(connection)
 
 
+@dashboard_bp.route("/api/purge_jobs/<job_id>", methods=["GET"])
+@validate_auth_header(required_access_level=0)
+def fetch_purge_job(job_id: str):
+    """
+    Fetches the progress of the purge of a deleted business or device.
+
+    Args:
+        job_id (str): The ID returned when the business or device was deleted.
+
+    Returns:
+        Response: A JSON response with the job and HTTP 200 code, or 404 if
+                  the job is unknown.
+    """
+    job = PurgeJobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Job not found"}), 404
+
+    return json_response({"status": "success", "data": job.to_dict()})
+
+
+@dashboard_bp.route("/api/devices/state", methods=["GET"])
+@validate_auth_header(required_access_level=0)
+def fetch_device_states():
+    """
+    Fetches the live state of the devices.
+
+    The states are served from the in-memory registry, see `DeviceStates`,
+    which only queries the database for the devices changed since the last
+    read.
+
+    Query Parameters:
+        business_id (int): Only the devices of this business
+
+    Returns:
+        Response: A JSON response with the device states and HTTP 200 code.
+    """
+    try:
+        business_id = parse_int_arg(request.args, "business_id")
+    except ValueError as e:
+        logger.warning("Invalid device state request: %s", e)
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    if not DeviceStates.loaded():
+        connection = DatabaseManager.get_connection()
+        try:
+            with connection.cursor() as cur:
+                DeviceStates.refresh(cur)
+            connection.commit()
+        except psycopg2.Error as e:
+            logger.error("Database error loading the device states: %s", e)
+
+            connection.rollback()
+            return (
+                jsonify({"status": "error", "message": "Error fetching device states"}),
+                500,
+            )
+        finally:
+            DatabaseManager.release_connection(connection)
+
+    states = DeviceStates.states(business_id)
+    return json_response({"status": "success", "data": states, "count": len(states)})
+
+
 @dashboard_bp.route("/api/employees", methods=["POST"])
 @validate_auth_header(required_access_level=0)
 @validate_json_payload(
@@ -430,6 +959,7 @@ def add_employee():
 
             employee_id = cur.fetchone()[0]
             connection.commit()
+            ChangeTracker.bump("employees")
 
             logger.info("Employee registered successfully with ID: %s", employee_id)
             return (
@@ -482,6 +1012,7 @@ def delete_employee(employee_id: int):
             )
 
             connection.commit()
+            ChangeTracker.bump("employees")
 
             logger.info("Employee deleted successfully")
             return jsonify({"status": "success", "message": "Employee deleted"}), 200
@@ -500,6 +1031,8 @@ def delete_employee(employee_id: int):
 
 @dashboard_bp.route("/api/employees", methods=["GET"])
 @validate_auth_header(required_access_level=0)
+@conditional_get("employees")
+@cached_response("employees")
 @retry_on_db_error()
 def fetch_all_employees():
     """
@@ -524,25 +1057,24 @@ def fetch_all_employees():
             )
             employees = cur.fetchall()
 
-        result = []
-        for e in employees:
-            employee_data = {
+        result = [
+            {
                 "id": e[0],
                 "first_name": e[1],
                 "last_name": e[2],
                 "api_key": e[3][:8] + "..." + e[3][-8:],
                 "email": e[4],
                 "phone": e[5],
+                "created_at": e[6],
             }
-
-            if len(e) > 3:
-                employee_data["created_at"] = e[6].isoformat() if e[6] else None
-
-            result.append(employee_data)
+            for e in employees
+        ]
 
         logger.info("Successfully fetched %s employees", len(result))
 
-        return jsonify({"status": "success", "data": result, "count": len(result)}), 200
+        return json_response(
+            {"status": "success", "data": result, "count": len(result)}
+        )
 
     except psycopg2.Error as e:
         logger.error("Database error fetching employees: %s", e)
@@ -552,214 +1084,482 @@ def fetch_all_employees():
         DatabaseManager.release_connection(connection)
 
 
-@dashboard_bp.route("/api/alerts", methods=["GET"])
-@validate_auth_header(required_access_level=0)
-@retry_on_db_error()
-def fetch_all_alerts():
+def archived_listing_rows(listing: EventListing):
     """
-    Fetches all the alerts from the database.
+    Reads the archived rows of a listing matching the request filters.
+
+    Args:
+        listing (EventListing): The listing
 
     Returns:
-        Response: A JSON response with the alerts and HTTP 200 code.
+        generator: The rows, newest first, in `archive_columns` order
     """
-    logger.info("Fetching all alerts")
+    predicate, since, until = parse_row_filter(
+        request.args,
+        archive_columns(listing.table),
+        f"{listing.kind}_type",
+        listing.resolvable,
+    )
+    return (
+        row for row in EventArchive.rows(listing.table, since, until) if predicate(row)
+    )
+
+
+def fetch_archived_listing(listing: EventListing, page):
+    """
+    Serves a filtered, time-ordered listing from the event archive, newest first.
 
-    connection = DatabaseManager.get_connection()
+    Takes the same filters and pagination parameters as `fetch_listing`, which
+    calls it for time ranges ending before the hot window.
+
+    Args:
+        listing (EventListing): The listing
+        page (PageRequest): The requested page, or None to stream every row
+
+    Returns:
+        Response: A JSON response with the rows and HTTP 200 code.
+    """
+    label = listing.label
+    rows = archived_listing_rows(listing)
+
+    logger.info("Reading %s from the event archive", label)
+
+    if page is None:
+        return stream_json_iterable(rows, listing.serialize_row, label)
 
     try:
-        with connection.cursor() as cur:
-            cur.execute(
-                """
-                SELECT
-                    a.id,
-                    a.device_id,
-                    a.alert_type,
-                    a.alert_time,
-                    a.message,
-                    a.resolved,
-                    sd.name AS device_name,
-                    b.name AS business_name,
-                    b.id AS business_id
-                FROM
-                    alerts a
-                JOIN
-                    security_devices sd ON a.device_id = sd.id
-                JOIN
-                    businesses b ON sd.business_id = b.id
-                WHERE
-                    a.resolved = FALSE
-                ORDER BY
-                    a.alert_time DESC
-                """
-            )
-            alerts = cur.fetchall()
+        rows, next_cursor, prev_cursor = page_rows(
+            select_page_rows(rows, page, listing.time_index, 0),
+            page,
+            time_index=listing.time_index,
+            id_index=0,
+        )
+    except (OSError, ValueError) as e:
+        logger.error("Archive error fetching %s: %s", label, e)
 
-        result = []
-        for a in alerts:
-            alert_data = {
-                "id": a[0],
-                "device_id": a[1],
-                "alert_type": a[2],
-                "alert_time": a[3].isoformat() if a[3] else None,
-                "message": a[4],
-                "resolved": a[5],
-                "device_name": a[6],
-                "business_name": a[7],
-                "business_id": a[8],
-            }
+        return jsonify({"status": "error", "message": f"Error fetching {label}"}), 500
+
+    result = [listing.serialize_row(row) for row in rows]
+
+    logger.info("Successfully fetched an archived page of %s %s", len(result), label)
+
+    return json_response(
+        {
+            "status": "success",
+            "data": result,
+            "count": len(result),
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
+    )
+
+
+def stream_listing(listing: EventListing, query, params: tuple, archived=None):
+    """
+    Streams a whole listing from a server-side cursor, merged with its
+    archived rows if any.
 
-            result.append(alert_data)
+    Each stream holds a pool connection until the client has read it all, so
+    streams beyond the cap of `StreamSlots` are refused with 503.
 
-        logger.info("Successfully fetched %s alerts", len(result))
+    Args:
+        listing (EventListing): The listing
+        query (sql.Composable): The ordered listing query
+        params (tuple): The query parameters
+        archived: The archived rows to merge, newest first, or None
+
+    Returns:
+        Response: A streaming JSON response with HTTP 200 code.
+    """
+    label = listing.label
+
+    if not StreamSlots.acquire():
+        logger.warning("Too many concurrent streams, refusing %s", label)
+
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": "Too many listings are being streamed, retry later",
+                }
+            ),
+            503,
+            {"Retry-After": "1"},
+        )
 
-        return jsonify({"status": "success", "data": result, "count": len(result)}), 200
+    try:
+        connection = DatabaseManager.get_connection()
+    except psycopg2.Error:
+        StreamSlots.release()
+        raise
 
+    try:
+        cur = open_server_side_cursor(connection, query, params)
     except psycopg2.Error as e:
-        logger.error("Database error fetching alerts: %s", e)
+        logger.error("Database error fetching %s: %s", label, e)
 
-        return jsonify({"status": "error", "message": "Error fetching alerts"}), 500
-    finally:
         DatabaseManager.release_connection(connection)
+        StreamSlots.release()
+        return jsonify({"status": "error", "message": f"Error fetching {label}"}), 500
 
+    if archived is None:
+        response = stream_json_rows(connection, cur, listing.serialize_row, label)
+    else:
+        response = stream_json_iterable(
+            merge_rows(cur, archived, listing.time_index, 0),
+            listing.serialize_row,
+            label,
+        )
+        response.call_on_close(lambda: DatabaseManager.release_connection(connection))
+    response.call_on_close(StreamSlots.release)
+    return response
 
-@dashboard_bp.route("/api/malfunctions", methods=["GET"])
-@validate_auth_header(required_access_level=0)
-@retry_on_db_error()
-def fetch_all_malfunctions():
+
+def fetch_listing(listing: EventListing):
     """
-    Fetches all the malfunctions from the database.
+    Serves a filtered, time-ordered listing, newest first.
+
+    The filters of `parse_listing_filters` are applied in SQL. Without
+    pagination parameters the whole listing is streamed, see `stream_listing`.
+    With `limit`, `before` or `after` a single keyset page on `(time, id)` is
+    returned together with the cursors of its neighbours.
+    Listings whose `until` lies before the hot window are read from the
+    event archive instead, and listings whose time range starts in the archive
+    and ends in the hot window merge the rows of both. Listings without any
+    time bound only read the hot window.
+
+    Args:
+        listing (EventListing): The listing
 
     Returns:
-        Response: A JSON response with the malfunctions and HTTP 200 code.
+        Response: A JSON response with the rows and HTTP 200 code.
     """
-    logger.info("Fetching all malfunctions")
+    label = listing.label
+    time_column = f"{listing.alias}.{listing.kind}_time"
+
+    try:
+        conditions, params = parse_listing_filters(
+            request.args,
+            listing.alias,
+            f"{listing.kind}_type",
+            f"{listing.kind}_time",
+            listing.resolvable,
+        )
+        page = parse_page_args(request.args)
+        since = parse_time_arg(request.args, "since")
+        until = parse_time_arg(request.args, "until")
+    except ValueError as e:
+        logger.warning("Invalid listing parameters for %s: %s", label, e)
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    if until is not None and EventArchive.covers(listing.table, until):
+        return fetch_archived_listing(listing, page)
+
+    archived = None
+    if (since is not None or until is not None) and EventArchive.straddles(
+        listing.table, since, until
+    ):
+        archived = archived_listing_rows(listing)
+        logger.info("Merging %s of the event archive", label)
+
+    # The listing columns start like the archived ones
+    time_index = listing.time_index
+
+    base_query = sql.SQL("{} WHERE {}").format(
+        listing.select_query,
+        sql.SQL(" AND ").join(conditions or [sql.SQL("TRUE")]),
+    )
+    id_column = f"{listing.alias}.id"
+
+    if page is None:
+        return stream_listing(
+            listing,
+            sql.SQL("{} ORDER BY {} DESC, {} DESC").format(
+                base_query,
+                sql.Identifier(*time_column.split(".")),
+                sql.Identifier(*id_column.split(".")),
+            ),
+            tuple(params),
+            archived,
+        )
 
     connection = DatabaseManager.get_connection()
 
     try:
         with connection.cursor() as cur:
-            cur.execute(
-                """
-                SELECT
-                    m.id,
-                    m.device_id,
-                    m.malfunction_type,
-                    m.malfunction_time,
-                    m.message,
-                    m.resolved,
-                    sd.name AS device_name,
-                    b.name AS business_name,
-                    b.id AS business_id
-                FROM
-                    malfunctions m
-                JOIN
-                    security_devices sd ON m.device_id = sd.id
-                JOIN
-                    businesses b ON sd.business_id = b.id
-                WHERE
-                    m.resolved = FALSE
-                ORDER BY
-                    m.malfunction_time DESC
-                """
+            query, page_params = keyset_query(base_query, time_column, id_column, page)
+            cur.execute(query, (*params, *page_params))
+            rows = cur.fetchall()
+
+        if archived is not None:
+            rows = list(
+                islice(
+                    merge_rows(
+                        rows,
+                        select_page_rows(archived, page, time_index, 0),
+                        time_index,
+                        0,
+                        newest_first=page.after is None,
+                    ),
+                    page.limit + 1,
+                )
             )
-            malfunctions = cur.fetchall()
 
-        result = []
-        for m in malfunctions:
-            malfunction_data = {
-                "id": m[0],
-                "device_id": m[1],
-                "malfunction_type": m[2],
-                "malfunction_time": m[3].isoformat() if m[3] else None,
-                "message": m[4],
-                "resolved": m[5],
-                "device_name": m[6],
-                "business_name": m[7],
-                "business_id": m[8],
-            }
+        rows, next_cursor, prev_cursor = page_rows(
+            rows, page, time_index=time_index, id_index=0
+        )
 
-            result.append(malfunction_data)
+        result = [listing.serialize_row(row) for row in rows]
 
-        logger.info("Successfully fetched %s malfunctions", len(result))
+        logger.info("Successfully fetched a page of %s %s", len(result), label)
 
-        return jsonify({"status": "success", "data": result, "count": len(result)}), 200
+        return json_response(
+            {
+                "status": "success",
+                "data": result,
+                "count": len(result),
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+            }
+        )
 
-    except psycopg2.Error as e:
-        logger.error("Database error fetching malfunctions: %s", e)
+    except (psycopg2.Error, OSError, ValueError) as e:
+        # OSError and ValueError come from reading the event archive
+        logger.error("Error fetching %s: %s", label, e)
 
-        return (
-            jsonify({"status": "error", "message": "Error fetching malfunctions"}),
-            500,
-        )
+        return jsonify({"status": "error", "message": f"Error fetching {label}"}), 500
     finally:
         DatabaseManager.release_connection(connection)
 
 
+@dashboard_bp.route("/api/alerts", methods=["GET"])
+@validate_auth_header(required_access_level=0)
+@conditional_get("alerts", "security_devices", "businesses")
+@cached_response("alerts", "security_devices", "businesses")
+@retry_on_db_error()
+def fetch_all_alerts():
+    """
+    Fetches the alerts from the database, newest first.
+    Only unresolved alerts are returned unless `resolved` says otherwise.
+
+    Without pagination parameters the rows are read through a server-side
+    cursor and streamed to the client, so memory use does not grow with the
+    size of the table.
+
+    Query Parameters:
+        business_id (int): Only alerts of this business
+        device_id (int): Only alerts of this device
+        type (str): Only alerts of these types (comma separated)
+        resolved (str): 'false' (default), 'true' or 'all'
+        since (str): Only alerts at or after this ISO 8601 timestamp
+        until (str): Only alerts before this ISO 8601 timestamp
+        limit (int): Page size, enables keyset pagination (max 500)
+        before (str): Cursor of the page to continue after, towards older rows
+        after (str): Cursor of the page to continue after, towards newer rows
+
+    Returns:
+        Response: A JSON response with the alerts and HTTP 200 code.
+    """
+    logger.info("Fetching all alerts")
+
+    return fetch_listing(ALERTS_LISTING)
+
+
+@dashboard_bp.route("/api/malfunctions", methods=["GET"])
+@validate_auth_header(required_access_level=0)
+@conditional_get("malfunctions", "security_devices", "businesses")
+@cached_response("malfunctions", "security_devices", "businesses")
+@retry_on_db_error()
+def fetch_all_malfunctions():
+    """
+    Fetches the malfunctions from the database, newest first.
+    Only unresolved malfunctions are returned unless `resolved` says otherwise.
+
+    Without pagination parameters the rows are read through a server-side
+    cursor and streamed to the client, so memory use does not grow with the
+    size of the table.
+
+    Query Parameters:
+        business_id (int): Only malfunctions of this business
+        device_id (int): Only malfunctions of this device
+        type (str): Only malfunctions of these types (comma separated)
+        resolved (str): 'false' (default), 'true' or 'all'
+        since (str): Only malfunctions at or after this ISO 8601 timestamp
+        until (str): Only malfunctions before this ISO 8601 timestamp
+        limit (int): Page size, enables keyset pagination (max 500)
+        before (str): Cursor of the page to continue after, towards older rows
+        after (str): Cursor of the page to continue after, towards newer rows
+
+    Returns:
+        Response: A JSON response with the malfunctions and HTTP 200 code.
+    """
+    logger.info("Fetching all malfunctions")
+
+    return fetch_listing(MALFUNCTIONS_LISTING)
+
+
 @dashboard_bp.route("/api/devices_logs", methods=["GET"])
 @validate_auth_header(required_access_level=0)
+@conditional_get("device_logs", "security_devices", "businesses")
+@cached_response("device_logs", "security_devices", "businesses")
 @retry_on_db_error()
 def fetch_all_device_logs():
     """
-    Fetches all the device logs from the database.
+    Fetches the device logs from the database, newest first.
+
+    Without pagination parameters the rows are read through a server-side
+    cursor and streamed to the client, so memory use does not grow with the
+    size of the table.
+
+    Query Parameters:
+        business_id (int): Only device logs of this business
+        device_id (int): Only device logs of this device
+        type (str): Only device logs of these types (comma separated)
+        since (str): Only device logs at or after this ISO 8601 timestamp
+        until (str): Only device logs before this ISO 8601 timestamp
+        limit (int): Page size, enables keyset pagination (max 500)
+        before (str): Cursor of the page to continue after, towards older rows
+        after (str): Cursor of the page to continue after, towards newer rows
 
     Returns:
         Response: A JSON response with the device logs and HTTP 200 code.
     """
     logger.info("Fetching all device logs")
 
+    return fetch_listing(DEVICE_LOGS_LISTING)
+
+
+def changed_state(cur, entries: list) -> dict:
+    """
+    Reads the current state of the entities changed by change log entries.
+
+    Only the last operation on an entity matters: deleted businesses and
+    devices are listed as tombstones, the other entities in their current
+    state.
+
+    Args:
+        cur: A database cursor
+        entries (list): The `(entity, entity_id, operation)` change log entries
+
+    Returns:
+        dict: The changed entities by kind, and the deleted ones
+    """
+    data = {
+        "businesses": [],
+        "devices": [],
+        "alerts": [],
+        "malfunctions": [],
+        "device_logs": [],
+        "deleted": {"businesses": [], "devices": []},
+    }
+
+    latest = {}
+    for entity, entity_id, operation in entries:
+        latest[(entity, entity_id)] = operation
+
+    upserted = {}
+    for (entity, entity_id), operation in latest.items():
+        if operation == "delete":
+            key = "devices" if entity == "security_devices" else entity
+            data["deleted"][key].append(entity_id)
+        else:
+            upserted.setdefault(entity, []).append(entity_id)
+
+    if "businesses" in upserted:
+        cur.execute(
+            sql.SQL("{} AND b.id = ANY(%s)").format(BUSINESSES_SELECT),
+            (upserted["businesses"],),
+        )
+        data["businesses"] = [serialize_business(b) for b in cur.fetchall()]
+
+    if "security_devices" in upserted:
+        devices = fetch_devices_by_business(
+            cur, device_ids=upserted["security_devices"]
+        )
+        for business_id, business_devices in devices.items():
+            for device in business_devices:
+                device["business_id"] = business_id
+                data["devices"].append(device)
+
+    for listing in (ALERTS_LISTING, MALFUNCTIONS_LISTING, DEVICE_LOGS_LISTING):
+        if listing.table in upserted:
+            cur.execute(
+                sql.SQL("{} WHERE {} = ANY(%s)").format(
+                    listing.select_query, sql.Identifier(listing.alias, "id")
+                ),
+                (upserted[listing.table],),
+            )
+            data[listing.table] = [listing.serialize_row(row) for row in cur.fetchall()]
+
+    return data
+
+
+@dashboard_bp.route("/api/changes", methods=["GET"])
+@validate_auth_header(required_access_level=0)
+@retry_on_db_error()
+def fetch_changes():
+    """
+    Fetches the dashboard state that changed after a cursor.
+
+    Without `since` only the current cursor is returned: take it before a full
+    load, then poll with it to receive everything that changed afterwards.
+    Entities are returned in their current state; deleted businesses and
+    devices are listed as tombstones, which imply the deletion of their events.
+
+    Query Parameters:
+        since (str): The cursor returned by the previous call
+
+    Returns:
+        Response: A JSON response with the changed entities, the cursor to
+                  continue from and HTTP 200 code, or HTTP 410 if the cursor
+                  expired and a full reload is required.
+    """
+    since = request.args.get("since")
+
+    try:
+        position = decode_change_cursor(since) if since is not None else None
+    except ValueError as e:
+        logger.warning("Invalid change cursor: %s", since)
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    logger.info("Fetching changes since %s", since)
+
     connection = DatabaseManager.get_connection()
 
     try:
         with connection.cursor() as cur:
-            cur.execute(
-                """
-                SELECT
-                    dl.id,
-                    dl.device_id,
-                    dl.log_time,
-                    dl.log_type,
-                    dl.message,
-                    sd.name AS device_name,
-                    b.name AS business_name,
-                    b.id AS business_id
-                FROM
-                    device_logs dl
-                JOIN
-                    security_devices sd ON dl.device_id = sd.id
-                JOIN
-                    businesses b ON sd.business_id = b.id
-                ORDER BY
-                    dl.log_time DESC
-                """
-            )
-            device_logs = cur.fetchall()
+            if position is None:
+                return json_response(
+                    {
+                        "status": "success",
+                        "data": changed_state(cur, []),
+                        "cursor": current_watermark(cur),
+                        "has_more": False,
+                    }
+                )
 
-        result = []
-        for dl in device_logs:
-            device_log_data = {
-                "id": dl[0],
-                "device_id": dl[1],
-                "log_time": dl[2].isoformat() if dl[2] else None,
-                "log_type": dl[3],
-                "message": dl[4],
-                "device_name": dl[5],
-                "business_name": dl[6],
-                "business_id": dl[7],
-            }
+            entries, cursor, has_more = read_changes(cur, position)
+            data = changed_state(cur, entries)
 
-            result.append(device_log_data)
+        logger.info("Successfully fetched %s changes", len(entries))
 
-        logger.info("Successfully fetched %s device logs", len(result))
+        return json_response(
+            {
+                "status": "success",
+                "data": data,
+                "cursor": cursor,
+                "has_more": has_more,
+            }
+        )
 
-        return jsonify({"status": "success", "data": result, "count": len(result)}), 200
+    except CursorExpiredError as e:
+        logger.warning("Expired change cursor: %s", since)
 
+        return jsonify({"status": "error", "message": str(e)}), 410
     except psycopg2.Error as e:
-        logger.error("Database error fetching device logs: %s", e)
+        logger.error("Database error fetching changes: %s", e)
 
-        return (
-            jsonify({"status": "error", "message": "Error fetching device logs"}),
-            500,
-        )
+        return jsonify({"status": "error", "message": "Error fetching changes"}), 500
     finally:
         DatabaseManager.release_connection(connection)
 
@@ -783,11 +1583,26 @@ def solve_alert(alert_id: int):
     try:
         with connection.cursor() as cur:
             cur.execute(
-                sql.SQL("UPDATE alerts SET resolved = TRUE WHERE id = %s"),
+                sql.SQL(
+                    """
+                    UPDATE alerts a SET resolved = TRUE
+                    WHERE a.id = %s AND a.resolved = FALSE
+                    RETURNING a.business_id, a.device_id, a.alert_type,
+                              pg_current_xact_id()::text::bigint
+                    """
+                ),
                 (alert_id,),
             )
+            solved = cur.fetchone()
 
             connection.commit()
+            if solved:
+                MapClusters.mark_dirty(solved[0])
+                DeviceStates.resolve(solved[3], "alerts", [solved[1:3]])
+                ChangeTracker.bump("alerts")
+                SocketIOClient().emit_alerts_resolved(
+                    {"ids": [alert_id], "business_ids": [solved[0]]}
+                )
 
             logger.info("Alert solved successfully")
             return jsonify({"status": "success", "message": "Alert solved"}), 200
@@ -823,11 +1638,26 @@ def solve_malfunction(malfunction_id: int):
     try:
         with connection.cursor() as cur:
             cur.execute(
-                sql.SQL("UPDATE malfunctions SET resolved = TRUE WHERE id = %s"),
+                sql.SQL(
+                    """
+                    UPDATE malfunctions m SET resolved = TRUE
+                    WHERE m.id = %s AND m.resolved = FALSE
+                    RETURNING m.business_id, m.device_id, m.malfunction_type,
+                              pg_current_xact_id()::text::bigint
+                    """
+                ),
                 (malfunction_id,),
             )
+            solved = cur.fetchone()
 
             connection.commit()
+            if solved:
+                MapClusters.mark_dirty(solved[0])
+                DeviceStates.resolve(solved[3], "malfunctions", [solved[1:3]])
+                ChangeTracker.bump("malfunctions")
+                SocketIOClient().emit_malfunctions_resolved(
+                    {"ids": [malfunction_id], "business_ids": [solved[0]]}
+                )
 
             logger.info("Malfunction solved successfully")
             return jsonify({"status": "success", "message": "Malfunction solved"}), 200
@@ -850,6 +1680,9 @@ def solve_business_alerts(business_id: int):
     """
     Marks all unresolved alerts for a business as resolved in the database.
 
+    The alerts are resolved in short batches, see `run_resolve_job`, so a
+    business with many open alerts does not block ingestion meanwhile.
+
     Args:
         business_id (int): The ID of the business to mark alerts as resolved.
 
@@ -858,34 +1691,28 @@ def solve_business_alerts(business_id: int):
     """
     logger.info("Solving all alerts for business with ID: %s", business_id)
 
-    connection = DatabaseManager.get_connection()
-
-    try:
-        with connection.cursor() as cur:
-            cur.execute(
-                sql.SQL(
-                    "UPDATE alerts SET resolved = TRUE WHERE device_id "
-                    "IN (SELECT id FROM security_devices "
-                    "WHERE business_id = %s)"
-                ),
-                (business_id,),
-            )
-
-            connection.commit()
-
-            logger.info("Alerts solved successfully")
-            return jsonify({"status": "success", "message": "Alerts solved"}), 200
+    # The job marks the businesses of each batch dirty before it bumps the
+    # versions, see `run_resolve_job`
+    job = ResolveJob("alerts", ResolveFilter(business_id=business_id))
+    run_resolve_job(job)
 
-    except psycopg2.Error as e:
-        logger.error("Database error solving alerts: %s", e)
-
-        connection.rollback()
+    if job.run.status != "done":
         return (
             jsonify({"status": "error", "message": "Error solving alerts"}),
             500,
         )
-    finally:
-        DatabaseManager.release_connection(connection)
+
+    logger.info("Alerts solved successfully")
+    return (
+        jsonify(
+            {
+                "status": "success",
+                "message": "Alerts solved",
+                "resolved": job.resolved,
+            }
+        ),
+        200,
+    )
 
 
 @dashboard_bp.route(
@@ -896,6 +1723,9 @@ def solve_business_malfunctions(business_id: int):
     """
     Marks all unresolved malfunctions for a business as resolved in the database.
 
+    The malfunctions are resolved in short batches, see `run_resolve_job`, so a
+    business with many open malfunctions does not block ingestion meanwhile.
+
     Args:
         business_id (int): The ID of the business to mark malfunctions as resolved.
 
@@ -904,45 +1734,128 @@ def solve_business_malfunctions(business_id: int):
     """
     logger.info("Solving all malfunctions for business with ID: %s", business_id)
 
-    connection = DatabaseManager.get_connection()
+    # The job marks the businesses of each batch dirty before it bumps the
+    # versions, see `run_resolve_job`
+    job = ResolveJob("malfunctions", ResolveFilter(business_id=business_id))
+    run_resolve_job(job)
+
+    if job.run.status != "done":
+        return (
+            jsonify({"status": "error", "message": "Error solving malfunctions"}),
+            500,
+        )
+
+    logger.info("Malfunctions solved successfully")
+    return (
+        jsonify(
+            {
+                "status": "success",
+                "message": "Malfunctions solved",
+                "resolved": job.resolved,
+            }
+        ),
+        200,
+    )
+
+
+def start_bulk_resolve(table: str):
+    """
+    Starts a background job resolving the rows selected by the request body.
+
+    Args:
+        table (str): `alerts` or `malfunctions`
 
+    Returns:
+        Response: A JSON response with the job and HTTP 202 code.
+    """
     try:
-        with connection.cursor() as cur:
-            cur.execute(
-                sql.SQL(
-                    "UPDATE malfunctions SET resolved = TRUE"
-                    " WHERE device_id IN (SELECT id FROM security_devices"
-                    " WHERE business_id = %s)"
-                ),
-                (business_id,),
-            )
+        selection = parse_resolve_filter(request.get_json(silent=True))
+    except ValueError as e:
+        logger.warning("Invalid bulk resolve request for %s: %s", table, e)
+        return jsonify({"status": "error", "message": str(e)}), 400
 
-            connection.commit()
+    job = ResolveJobs.start(table, selection)
 
-            logger.info("Malfunctions solved successfully")
-            return jsonify({"status": "success", "message": "Malfunctions solved"}), 200
+    return json_response({"status": "success", "data": job.to_dict()}, 202)
 
-    except psycopg2.Error as e:
-        logger.error("Database error solving malfunctions: %s", e)
 
-        connection.rollback()
-        return (
-            jsonify({"status": "error", "message": "Error solving malfunctions"}),
-            500,
-        )
-    finally:
-        DatabaseManager.release_connection(connection)
+@dashboard_bp.route("/api/solve_alerts", methods=["POST"])
+@validate_auth_header(required_access_level=0)
+def solve_alerts():
+    """
+    Resolves many alerts in the background.
+
+    Request Body:
+        ids (list): The IDs of the alerts to resolve, or the filters:
+        business_id (int): Only alerts of this business
+        device_id (int): Only alerts of this device
+        type (list): Only alerts of these types
+        before (str): Only alerts before this ISO 8601 timestamp
+
+    Returns:
+        Response: A JSON response with the job, whose progress is served by
+                  `/api/solve_jobs/<job_id>`, and HTTP 202 code.
+    """
+    logger.info("Starting bulk resolve of alerts")
+
+    return start_bulk_resolve("alerts")
+
+
+@dashboard_bp.route("/api/solve_malfunctions", methods=["POST"])
+@validate_auth_header(required_access_level=0)
+def solve_malfunctions():
+    """
+    Resolves many malfunctions in the background.
+
+    Request Body:
+        ids (list): The IDs of the malfunctions to resolve, or the filters:
+        business_id (int): Only malfunctions of this business
+        device_id (int): Only malfunctions of this device
+        type (list): Only malfunctions of these types
+        before (str): Only malfunctions before this ISO 8601 timestamp
+
+    Returns:
+        Response: A JSON response with the job, whose progress is served by
+                  `/api/solve_jobs/<job_id>`, and HTTP 202 code.
+    """
+    logger.info("Starting bulk resolve of malfunctions")
+
+    return start_bulk_resolve("malfunctions")
+
+
+@dashboard_bp.route("/api/solve_jobs/<job_id>", methods=["GET"])
+@validate_auth_header(required_access_level=0)
+def fetch_solve_job(job_id: str):
+    """
+    Fetches the progress of a bulk resolve job.
+
+    Args:
+        job_id (str): The ID returned when the job was started.
+
+    Returns:
+        Response: A JSON response with the job and HTTP 200 code, or 404 if
+                  the job is unknown.
+    """
+    job = ResolveJobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Job not found"}), 404
+
+    return json_response({"status": "success", "data": job.to_dict()})
 
 
 @dashboard_bp.route("/api/stats", methods=["GET"])
 @validate_auth_header(required_access_level=0)
+@conditional_get(
+    "businesses", "security_devices", "alerts", "malfunctions", time_bucket=60
+)
+@cached_response("businesses", "security_devices", "alerts", "malfunctions", max_age=60)
 def get_dashboard_stats():
     """
     Retrieves various statistics for the dashboard display.
 
     Fetches counts for total clients (businesses), active devices,
-    recent unresolved alerts (past 7 days), unresolved motion alerts,
-    unresolved fire alerts, and recent unresolved device malfunctions (past 30 days).
+    recent alerts (past 7 days), motion alerts, fire alerts, and recent
+    device malfunctions (past 30 days) from the incrementally maintained counters.
 
     Returns:
         Response: A JSON response containing the dashboard statistics or an error message.
@@ -956,39 +1869,13 @@ def get_dashboard_stats():
         connection = DatabaseManager.get_connection()
 
         with connection.cursor() as cur:
-            query = sql.SQL(
-                """
-                SELECT
-                    (SELECT COUNT(*) FROM businesses) AS total_clients,
-                    (SELECT COUNT(*) FROM security_devices) AS active_devices,
-                    (SELECT COUNT(*) FROM alerts
-                     WHERE alert_time >= NOW() - INTERVAL '7 days') AS recent_alerts,
-                    (SELECT COUNT(*) FROM alerts
-                     WHERE alert_type = {motion_type}) AS total_intrusions,
-                    (SELECT COUNT(*) FROM alerts
-                     WHERE alert_type = {fire_type}) AS total_fires,
-                    (SELECT COUNT(*) FROM malfunctions
-                     WHERE malfunction_time >= NOW() - INTERVAL '30 days') AS recent_malfunctions;
-            """
-            ).format(
-                motion_type=sql.Literal("motion_alert"),
-                fire_type=sql.Literal("fire_alert"),
-            )
-
-            cur.execute(query)
+            cur.execute(STATS_QUERY)
             result = cur.fetchone()
 
             if result:
-                stats = {
-                    "clients": result[0],
-                    "activeDevices": result[1],
-                    "alerts": result[2],
-                    "detectedIntruders": result[3],
-                    "detectedFires": result[4],
-                    "deviceMalfunctions": result[5],
-                }
+                stats = stats_from_row(result)
                 logger.info("Successfully fetched dashboard statistics: %s", stats)
-                return jsonify({"status": "success", "data": stats}), 200
+                return json_response({"status": "success", "data": stats})
 
             logger.warning("Dashboard statistics query returned no results.")
             return (
@@ -1029,53 +1916,70 @@ def get_dashboard_stats():
 
 @dashboard_bp.route("/api/alerts_over_time", methods=["GET"])
 @validate_auth_header(required_access_level=0)
-@validate_json_payload("range")
+@conditional_get("alerts", time_bucket=60)
+@cached_response("alerts", max_age=60)
 def get_graph_alert_data():
     """
     Provides aggregated alert data (motion and fire) over a specified time range
     suitable for plotting on a graph.
 
+    The series are read from the alert rollups instead of the alerts table:
+    the 24 hour graph sums the hourly `alert_rollups_hourly` rows, longer
+    ranges sum the `alert_rollups_daily` rows, the hourly rows added up per
+    UTC day, by week or month, so a year reads one row per day, business and
+    alert type.
+
     Query Parameters:
         range (str): The time range for the data. Accepted values:
                      '24h', '1w', '1m', '6m', '1y'. Default: '1m'.
+                     Still accepted from a JSON body for older clients.
+        business_id (int): Only the alerts of this business
 
     Returns:
         Response: A JSON response containing labels and datasets for the graph,
                   or an error message.
     """
-    time_range = request.json.get("range")
+    time_range = request.args.get("range")
+    if time_range is None:
+        time_range = (request.get_json(silent=True) or {}).get("range", "1m")
     logger.info("Fetching alert data for graph. Range: %s", time_range)
 
-    interval_sql = None
-    start_time_sql = None
-    label_format_sql = None
-    end_time_sql = "NOW()"
+    try:
+        business_id = parse_int_arg(request.args, "business_id")
+    except ValueError as e:
+        logger.warning("Invalid graph request: %s", e)
+        return jsonify({"status": "error", "message": str(e)}), 400
 
     time_range_config = {
         "24h": {
             "interval_sql": "INTERVAL '1 hour'",
             "start_time_sql": "NOW() - INTERVAL '24 hours'",
             "label_format_sql": "YYYY-MM-DD HH24:00",
+            "trunc_interval": "hour",
         },
         "1w": {
             "interval_sql": "INTERVAL '1 day'",
             "start_time_sql": "NOW() - INTERVAL '7 days'",
             "label_format_sql": "YYYY-MM-DD",
+            "trunc_interval": "day",
         },
         "1m": {
             "interval_sql": "INTERVAL '1 day'",
             "start_time_sql": "NOW() - INTERVAL '1 month'",
             "label_format_sql": "YYYY-MM-DD",
+            "trunc_interval": "day",
         },
         "6m": {
             "interval_sql": "INTERVAL '1 week'",
             "start_time_sql": "NOW() - INTERVAL '6 months'",
             "label_format_sql": "YYYY-MM-DD",
+            "trunc_interval": "week",
         },
         "1y": {
             "interval_sql": "INTERVAL '1 month'",
             "start_time_sql": "NOW() - INTERVAL '1 year'",
             "label_format_sql": "YYYY-MM",
+            "trunc_interval": "month",
         },
     }
 
@@ -1084,6 +1988,7 @@ def get_graph_alert_data():
         interval_sql = config["interval_sql"]
         start_time_sql = config["start_time_sql"]
         label_format_sql = config["label_format_sql"]
+        trunc_interval = config["trunc_interval"]
     else:
         logger.warning("Invalid time range specified: %s", time_range)
         return (
@@ -1109,49 +2014,86 @@ def get_graph_alert_data():
         connection = DatabaseManager.get_connection()
 
         with connection.cursor() as cur:
-            trunc_interval = (
-                "hour"
-                if time_range == "24h"
-                else (
-                    "day"
-                    if time_range in ["1w", "1m"]
-                    else "week" if time_range == "6m" else "month"
+            if time_range == "24h":
+                final_query = sql.SQL(
+                    """
+                    WITH time_series AS (
+                        SELECT generate_series(
+                            date_trunc('hour', {start_time}),
+                            NOW(),
+                            {interval_step}
+                        ) AS time_bucket
+                    ),
+                    rollups AS (
+                        SELECT
+                            bucket AS time_bucket,
+                            SUM(count) FILTER (WHERE alert_type = {fire_type})
+                                AS fire_count,
+                            SUM(count) FILTER (WHERE alert_type = {motion_type})
+                                AS motion_count
+                        FROM alert_rollups_hourly
+                        WHERE bucket >= date_trunc('hour', {start_time})
+                          AND alert_type IN ({fire_type}, {motion_type})
+                          {business}
+                        GROUP BY bucket
+                    )
+                    SELECT
+                        to_char(ts.time_bucket, {label_format}) AS label,
+                        COALESCE(r.fire_count, 0) AS fire_count,
+                        COALESCE(r.motion_count, 0) AS motion_count
+                    FROM time_series ts
+                    LEFT JOIN rollups r USING (time_bucket)
+                    ORDER BY ts.time_bucket;
+                """
                 )
-            )
-
-            final_query = sql.SQL(
+            else:
+                final_query = sql.SQL(
+                    """
+                    WITH time_series AS (
+                        SELECT generate_series(
+                            date_trunc({interval_name}, ({start_time}) AT TIME ZONE 'UTC'),
+                            NOW() AT TIME ZONE 'UTC',
+                            {interval_step}
+                        )::date AS time_bucket
+                    ),
+                    rollups AS (
+                        SELECT
+                            date_trunc({interval_name}, day::timestamp)::date
+                                AS time_bucket,
+                            SUM(count) FILTER (WHERE alert_type = {fire_type})
+                                AS fire_count,
+                            SUM(count) FILTER (WHERE alert_type = {motion_type})
+                                AS motion_count
+                        FROM alert_rollups_daily
+                        WHERE day >= date_trunc(
+                              {interval_name}, ({start_time}) AT TIME ZONE 'UTC'
+                          )::date
+                          AND alert_type IN ({fire_type}, {motion_type})
+                          {business}
+                        GROUP BY 1
+                    )
+                    SELECT
+                        to_char(ts.time_bucket, {label_format}) AS label,
+                        COALESCE(r.fire_count, 0) AS fire_count,
+                        COALESCE(r.motion_count, 0) AS motion_count
+                    FROM time_series ts
+                    LEFT JOIN rollups r USING (time_bucket)
+                    ORDER BY ts.time_bucket;
                 """
-                WITH time_series AS (
-                    SELECT generate_series(
-                        date_trunc({interval_name}, {start_time}),
-                        {end_time},
-                        {interval_step}
-                    )::timestamp AS time_bucket
                 )
-                SELECT
-                    to_char(ts.time_bucket, {label_format}) AS label,
-                    COALESCE(SUM(CASE WHEN a.alert_type = {fire_type}
-                    THEN 1 ELSE 0 END), 0) AS fire_count,
-                    COALESCE(SUM(CASE WHEN a.alert_type = {motion_type}
-                    THEN 1 ELSE 0 END), 0) AS motion_count
-                FROM time_series ts
-                LEFT JOIN alerts a ON
-                date_trunc({interval_name}, a.alert_time) = ts.time_bucket
-                    AND a.alert_type IN ({fire_type}, {motion_type})
-                    AND a.alert_time >= {start_time}
-                WHERE ts.time_bucket >= date_trunc({interval_name}, {start_time})
-                  AND ts.time_bucket <= {end_time}
-                GROUP BY ts.time_bucket
-                ORDER BY ts.time_bucket;
-            """
-            ).format(
+
+            final_query = final_query.format(
                 interval_name=sql.Literal(trunc_interval),
                 interval_step=sql.SQL(interval_sql),
                 start_time=sql.SQL(start_time_sql),
-                end_time=sql.SQL(end_time_sql),
                 label_format=sql.Literal(label_format_sql),
-                fire_type=sql.Literal("fire_alert"),
-                motion_type=sql.Literal("motion_alert"),
+                fire_type=sql.Literal(FIRE_ALERT),
+                motion_type=sql.Literal(MOTION_ALERT),
+                business=(
+                    sql.SQL("AND business_id = {}").format(sql.Literal(business_id))
+                    if business_id is not None
+                    else sql.SQL("")
+                ),
             )
 
             logger.debug("Executing graph query: %s", final_query.as_string(cur))
@@ -1164,7 +2106,7 @@ def get_graph_alert_data():
                 graph_data["datasets"][1]["data"].append(row[2])
 
             logger.info("Successfully fetched %d data points for graph.", len(results))
-            return jsonify({"status": "success", "data": graph_data}), 200
+            return json_response({"status": "success", "data": graph_data})
 
     except (psycopg2.Error, ConnectionError) as e:
         logger.error("Database error fetching graph data: %s", e, exc_info=True)
@@ -9,7 +9,11 @@ from psycopg2 import sql
 
 from decorators.validate_auth import validate_auth_header
 from decorators.validate_json_payload import validate_json_payload
+from utils.change_tracker import ChangeTracker
 from utils.db import DatabaseManager
+from utils.device_state import DeviceStates
+from utils.event_types import event_type_code
+from utils.map_clusters import MapClusters
 from utils.websocket_client import SocketIOClient
 from utils.logger_config import get_logger
 
@@ -20,91 +24,24 @@ logger = get_logger("device_routes")
 device_bp = Blueprint("device", __name__)
 
 
-def get_device_id_by_api_key(api_key):
+def get_device_by_api_key(cur, api_key):
     """
-    Retrieve the device ID associated with the given API key.
+    Retrieve the device associated with the given API key, with its business.
+    Returns a tuple of (device_id, business_id, device_name, business_name) or
+    None if no device uses the key.
     """
-    connection = DatabaseManager.get_connection()
-
-    try:
-        with connection.cursor() as cur:
-            cur.execute(
-                sql.SQL(
-                    """
-                    SELECT id FROM security_devices
-                    WHERE api_key_id = (SELECT id FROM api_keys
-                    WHERE api_key = %s);
-                    """
-                ),
-                (api_key,),
-            )
-
-            device_id = cur.fetchone()[0]
-            return device_id
-    except psycopg2.Error as e:
-        logger.error("Error retrieving device ID by API key: %s", e)
-        return None
-    finally:
-        DatabaseManager.release_connection(connection)
-
-
-def get_device_name(device_id):
-    """
-    Retrieve the device name associated with the given device ID.
-    """
-    connection = DatabaseManager.get_connection()
-
-    try:
-        with connection.cursor() as cur:
-            cur.execute(
-                sql.SQL(
-                    """
-                    SELECT name FROM security_devices
-                    WHERE id = %s;
-                    """
-                ),
-                (device_id,),
-            )
-
-            device_name = cur.fetchone()[0]
-            return device_name
-    except psycopg2.Error as e:
-        logger.error("Error retrieving device name by ID: %s", e)
-        return None
-    finally:
-        DatabaseManager.release_connection(connection)
-
-
-def get_device_business_info(device_id):
-    """
-    Retrieve the business name and ID associated with the given device ID.
-    Returns a tuple of (business_id, business_name) or (None, None) if not found.
-    """
-    connection = DatabaseManager.get_connection()
-
-    try:
-        with connection.cursor() as cur:
-            cur.execute(
-                sql.SQL(
-                    """
-                    SELECT b.id, b.name FROM security_devices sd
-                    JOIN businesses b ON sd.business_id = b.id
-                    WHERE sd.id = %s;
-                    """
-                ),
-                (device_id,),
-            )
-
-            result = cur.fetchone()
-            if result:
-                business_id, business_name = result
-                return business_id, business_name
-            return None, None
-    except psycopg2.Error as e:
-        logger.error("Error retrieving device business info by ID: %s", e)
-        return None, None
-    finally:
-        DatabaseManager.release_connection(connection)
+    cur.execute(
+        sql.SQL(
+            """
+            SELECT sd.id, sd.business_id, sd.name, b.name FROM security_devices sd
+            JOIN api_keys k ON sd.api_key_id = k.id
+            JOIN businesses b ON sd.business_id = b.id
+            WHERE k.api_key = %s AND sd.deleted_at IS NULL;
+            """
+        ),
+        (api_key,),
+    )
+    return cur.fetchone()
 
 
 @device_bp.route("/api/send_alert", methods=["POST"], endpoint="send_alert_device")
@@ -124,33 +61,59 @@ def send_alert():
 
     try:
         with connection.cursor() as cur:
-            device_id = get_device_id_by_api_key(
-                request.headers["Authorization"].split(" ")[1]
+            device = get_device_by_api_key(
+                cur, request.headers["Authorization"].split(" ")[1]
             )
+            if device is None:
+                logger.warning("No device found for the API key")
+                return jsonify({"status": "error", "message": "Device not found"}), 404
+            device_id, business_id, device_name, business_name = device
+            alert_type = event_type_code(cur, "alert", alert_data["alert_type"])
+            if alert_type is None:
+                return (
+                    jsonify({"status": "error", "message": "Unknown alert type"}),
+                    400,
+                )
 
             cur.execute(
                 sql.SQL(
                     """
                     INSERT INTO alerts(
                         device_id,
+                        business_id,
                         alert_type,
-                        message) VALUES (%s, %s, %s) RETURNING id;
+                        message) VALUES (
+                        %s, %s, %s, %s
+                    ) RETURNING id, alert_time, pg_current_xact_id()::text::bigint;
                     """
                 ),
                 (
                     device_id,
-                    alert_data["alert_type"],
+                    business_id,
+                    alert_type,
                     alert_data["message"] if alert_data.get("message") else None,
                 ),
             )
 
-            alert_id = cur.fetchone()[0]
+            alert_id, alert_time, txid = cur.fetchone()
             connection.commit()
 
-            logger.info("Alert saved to database with ID: %s", alert_id)
+            # Mark the business dirty before the version bump lets a read
+            # rebuild the clusters
+            MapClusters.mark_dirty(business_id)
+            DeviceStates.record_event(
+                txid,
+                "alerts",
+                {
+                    "device_id": device_id,
+                    "type": alert_type,
+                    "time": alert_time,
+                    "opened": 1,
+                },
+            )
+            ChangeTracker.bump("alerts")
 
-            # Get the business name and ID associated with the device
-            business_id, business_name = get_device_business_info(device_id)
+            logger.info("Alert saved to database with ID: %s", alert_id)
 
             # Emit the alert to the Socket.IO server
             socket_client = SocketIOClient()
@@ -158,7 +121,7 @@ def send_alert():
                 {
                     "id": alert_id,
                     "device_id": device_id,
-                    "device_name": get_device_name(device_id),
+                    "device_name": device_name,
                     "alert_time": datetime.now().isoformat(),
                     "alert_type": alert_data["alert_type"],
                     "business_name": business_name,
@@ -206,22 +169,38 @@ def send_malfunction():
 
     try:
         with connection.cursor() as cur:
-            device_id = get_device_id_by_api_key(
-                request.headers["Authorization"].split(" ")[1]
+            device = get_device_by_api_key(
+                cur, request.headers["Authorization"].split(" ")[1]
             )
+            if device is None:
+                logger.warning("No device found for the API key")
+                return jsonify({"status": "error", "message": "Device not found"}), 404
+            device_id, business_id, device_name, business_name = device
+            malfunction_type = event_type_code(
+                cur, "malfunction", malfunction_data["malfunction_type"]
+            )
+            if malfunction_type is None:
+                return (
+                    jsonify({"status": "error", "message": "Unknown malfunction type"}),
+                    400,
+                )
 
             cur.execute(
                 sql.SQL(
                     """
                     INSERT INTO malfunctions(
                         device_id,
+                        business_id,
                         malfunction_type,
-                        message) VALUES (%s, %s, %s) RETURNING id;
+                        message) VALUES (
+                        %s, %s, %s, %s
+                    ) RETURNING id, malfunction_time, pg_current_xact_id()::text::bigint;
                     """
                 ),
                 (
                     device_id,
-                    malfunction_data["malfunction_type"],
+                    business_id,
+                    malfunction_type,
                     (
                         malfunction_data["message"]
                         if malfunction_data.get("message")
@@ -230,13 +209,25 @@ def send_malfunction():
                 ),
             )
 
-            malfunction_id = cur.fetchone()[0]
+            malfunction_id, malfunction_time, txid = cur.fetchone()
             connection.commit()
 
-            logger.info("Malfunction saved to database with ID: %s", malfunction_id)
+            # Mark the business dirty before the version bump lets a read
+            # rebuild the clusters
+            MapClusters.mark_dirty(business_id)
+            DeviceStates.record_event(
+                txid,
+                "malfunctions",
+                {
+                    "device_id": device_id,
+                    "type": malfunction_type,
+                    "time": malfunction_time,
+                    "opened": 1,
+                },
+            )
+            ChangeTracker.bump("malfunctions")
 
-            # Get the business name and ID associated with the device
-            business_id, business_name = get_device_business_info(device_id)
+            logger.info("Malfunction saved to database with ID: %s", malfunction_id)
 
             # Emit the malfunction to the Socket.IO server
             socket_client = SocketIOClient()
@@ -244,7 +235,7 @@ def send_malfunction():
                 {
                     "id": malfunction_id,
                     "device_id": device_id,
-                    "device_name": get_device_name(device_id),
+                    "device_name": device_name,
                     "malfunction_time": datetime.now().isoformat(),
                     "malfunction_type": malfunction_data["malfunction_type"],
                     "business_name": business_name,
@@ -295,41 +286,63 @@ def send_log():
 
     try:
         with connection.cursor() as cur:
-            device_id = get_device_id_by_api_key(
-                request.headers["Authorization"].split(" ")[1]
+            device = get_device_by_api_key(
+                cur, request.headers["Authorization"].split(" ")[1]
             )
+            if device is None:
+                logger.warning("No device found for the API key")
+                return jsonify({"status": "error", "message": "Device not found"}), 404
+            device_id, business_id, device_name, business_name = device
+            log_type = event_type_code(cur, "log", log_data["log_type"])
+            if log_type is None:
+                return (
+                    jsonify({"status": "error", "message": "Unknown log type"}),
+                    400,
+                )
 
             cur.execute(
                 sql.SQL(
                     """
                     INSERT INTO device_logs(
                         device_id,
+                        business_id,
                         log_type,
-                        message) VALUES (%s, %s, %s) RETURNING id;
+                        message) VALUES (
+                        %s, %s, %s, %s
+                    ) RETURNING id, log_time, pg_current_xact_id()::text::bigint;
                     """
                 ),
                 (
                     device_id,
-                    log_data["log_type"],
+                    business_id,
+                    log_type,
                     log_data["message"] if log_data.get("message") else None,
                 ),
             )
 
-            log_id = cur.fetchone()[0]
+            log_id, log_time, txid = cur.fetchone()
             connection.commit()
+            DeviceStates.record_event(
+                txid,
+                "device_logs",
+                {
+                    "device_id": device_id,
+                    "type": log_type,
+                    "time": log_time,
+                    "opened": 0,
+                },
+            )
+            ChangeTracker.bump("device_logs")
 
             logger.info("Log saved to database with ID: %s", log_id)
 
-            # Get the business name and ID associated with the device
-            business_id, business_name = get_device_business_info(device_id)
-
             # Emit the log to the Socket.IO server
             socket_client = SocketIOClient()
             socket_client.emit_new_log(
                 {
                     "id": log_id,
                     "device_id": device_id,
-                    "device_name": get_device_name(device_id),
+                    "device_name": device_name,
                     "log_time": datetime.now().isoformat(),
                     "log_type": log_data["log_type"],
                     "business_name": business_name,
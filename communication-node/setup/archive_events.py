@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Archives the closed months of the event tables outside of the hot window.
+Each month is exported to a compressed file of the event archive and its
+partition is dropped, in one transaction per month. Meant to run daily, e.g.
+from cron, before `maintain_partitions.py`.
+"""
+
+import sys
+import os
+import argparse
+import psycopg2
+from utils.logger_config import get_logger
+
+# Setup logging
+logger = get_logger("archive_events")
+
+# Add parent directory to path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.db import (  # noqa: E402 # pylint: disable=wrong-import-position
+    DatabaseManager,  # noqa: E402 # pylint: disable=wrong-import-position
+)  # noqa: E402 # pylint: disable=wrong-import-position
+from utils.archive import (  # noqa: E402 # pylint: disable=wrong-import-position
+    ARCHIVE_DIR,  # noqa: E402 # pylint: disable=wrong-import-position
+    add_to_manifest,  # noqa: E402 # pylint: disable=wrong-import-position
+    archive_partition,  # noqa: E402 # pylint: disable=wrong-import-position
+)  # noqa: E402 # pylint: disable=wrong-import-position
+from utils.partitions import (  # noqa: E402 # pylint: disable=wrong-import-position
+    PARTITIONED_TABLES,  # noqa: E402 # pylint: disable=wrong-import-position
+    add_months,  # noqa: E402 # pylint: disable=wrong-import-position
+    current_month,  # noqa: E402 # pylint: disable=wrong-import-position
+    drop_partition,  # noqa: E402 # pylint: disable=wrong-import-position
+    has_unresolved_rows,  # noqa: E402 # pylint: disable=wrong-import-position
+    list_partitions,  # noqa: E402 # pylint: disable=wrong-import-position
+)  # noqa: E402 # pylint: disable=wrong-import-position
+
+DEFAULT_HOT_MONTHS = 6
+
+
+def archive_table(connection, table: str, hot_months: int) -> list:
+    """
+    Archives the partitions of an event table older than the hot window.
+
+    Partitions are archived oldest first. A partition with unresolved
+    incidents stops the table, so the archived months stay contiguous.
+
+    Args:
+        connection: A connection borrowed from `DatabaseManager`
+        table (str): The partitioned table
+        hot_months (int): The number of months kept in the table, current one included
+
+    Returns:
+        list: The names of the partitions archived
+    """
+    cutoff = add_months(current_month(), 1 - hot_months)
+
+    with connection.cursor() as cur:
+        partitions = list_partitions(cur, table)
+    connection.commit()
+
+    archived = []
+    for name, month in partitions:
+        if month >= cutoff:
+            break
+
+        try:
+            with connection.cursor() as cur:
+                if has_unresolved_rows(cur, table, name):
+                    logger.warning(
+                        "Stopped archiving %s at %s, it has unresolved rows",
+                        table,
+                        name,
+                    )
+                    connection.rollback()
+                    break
+
+            add_to_manifest(archive_partition(connection, table, name, month))
+
+            # The rows still exist in the archive, so they stay counted
+            with connection.cursor() as cur:
+                drop_partition(cur, table, name, month, keep_counts=True)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+        archived.append(name)
+
+    return archived
+
+
+def main():
+    """
+    Parses the arguments and archives the old partitions of every event table.
+    """
+    parser = argparse.ArgumentParser(
+        description="Archive the old event table partitions"
+    )
+    parser.add_argument(
+        "--hot-months",
+        type=int,
+        default=DEFAULT_HOT_MONTHS,
+        help=(
+            "Months of events kept in the database, current one included "
+            f"(default: {DEFAULT_HOT_MONTHS})"
+        ),
+    )
+    args = parser.parse_args()
+
+    if args.hot_months < 1:
+        parser.error("--hot-months must be at least 1")
+
+    connection = None
+    try:
+        DatabaseManager.initialize_pool()
+        connection = DatabaseManager.get_connection()
+
+        archived = []
+        for partitioned_table in PARTITIONED_TABLES:
+            archived += archive_table(connection, partitioned_table, args.hot_months)
+
+        print(
+            f"Archived {len(archived)} partitions to {ARCHIVE_DIR}: "
+            f"{', '.join(archived) or '-'}"
+        )
+    except (psycopg2.Error, OSError) as err:
+        logger.critical("Error occurred while archiving the events: %s", err)
+        print(f"Error occurred while archiving the events: \n\t{err}")
+        sys.exit(1)
+    finally:
+        if connection:
+            DatabaseManager.release_connection(connection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Checks that the hot unresolved-incident queries use their partial indexes.
+Seeds a large synthetic dataset inside a transaction, explains the queries and
+rolls everything back, so it can be run against any initialized database.
+"""
+
+import sys
+import os
+import re
+import argparse
+import psycopg2
+from utils.logger_config import get_logger
+
+# Setup logging
+logger = get_logger("check_query_plans")
+
+# Add parent directory to path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.db import (  # noqa: E402 # pylint: disable=wrong-import-position
+    DatabaseManager,  # noqa: E402 # pylint: disable=wrong-import-position
+)  # noqa: E402 # pylint: disable=wrong-import-position
+
+DEFAULT_BUSINESSES = 2000
+DEFAULT_DEVICES_PER_BUSINESS = 3
+DEFAULT_EVENTS = 200000
+DEFAULT_UNRESOLVED_PERCENT = 1.0
+
+SEED_QUERIES = (
+    """
+    INSERT INTO api_keys (api_key, access_level, description)
+    VALUES ('query-plan-check', 1, 'Temporary key of check_query_plans.py')
+    """,
+    """
+    INSERT INTO businesses (name, lat, lon, address)
+    SELECT 'Business ' || i, 44 + random() * 4, 21 + random() * 8, 'Address ' || i
+    FROM generate_series(1, %(businesses)s) AS i
+    """,
+    """
+    INSERT INTO security_devices (
+        api_key_id, name, motion_sensor, sound_sensor, gas_sensor, fire_sensor,
+        business_id
+    )
+    SELECT k.id, 'Device ' || b.id || '-' || i, TRUE, TRUE, TRUE, TRUE, b.id
+    FROM businesses b
+    CROSS JOIN generate_series(1, %(devices_per_business)s) AS i
+    CROSS JOIN (SELECT id FROM api_keys WHERE api_key = 'query-plan-check') AS k
+    """,
+    """
+    INSERT INTO alerts (
+        device_id, business_id, alert_type, alert_time, resolved
+    )
+    SELECT d.ids[1 + (i %% array_length(d.ids, 1))],
+           d.business_ids[1 + (i %% array_length(d.ids, 1))],
+           t.codes[1 + (i %% array_length(t.codes, 1))],
+           NOW() - random() * INTERVAL '365 days',
+           random() * 100 >= %(unresolved_percent)s
+    FROM generate_series(1, %(events)s) AS i,
+         (SELECT array_agg(id ORDER BY id) AS ids,
+                 array_agg(business_id ORDER BY id) AS business_ids
+          FROM security_devices) AS d,
+         (SELECT array_agg(code) AS codes FROM event_types WHERE event = 'alert') AS t
+    """,
+    """
+    INSERT INTO malfunctions (
+        device_id, business_id, malfunction_type, malfunction_time, resolved
+    )
+    SELECT d.ids[1 + (i %% array_length(d.ids, 1))],
+           d.business_ids[1 + (i %% array_length(d.ids, 1))],
+           t.codes[1 + (i %% array_length(t.codes, 1))],
+           NOW() - random() * INTERVAL '365 days',
+           random() * 100 >= %(unresolved_percent)s
+    FROM generate_series(1, %(events)s) AS i,
+         (SELECT array_agg(id ORDER BY id) AS ids,
+                 array_agg(business_id ORDER BY id) AS business_ids
+          FROM security_devices) AS d,
+         (SELECT array_agg(code) AS codes FROM event_types
+          WHERE event = 'malfunction') AS t
+    """,
+    "ANALYZE businesses, security_devices, alerts, malfunctions",
+)
+
+# The hot read queries of the dashboard routes and the indexes they may use,
+# a plan passes if it reads the event table through one of them
+PLAN_CHECKS = (
+    (
+        "open alerts of a business (/api/businesses/<id>)",
+        """
+        SELECT a.id
+        FROM alerts a
+        JOIN security_devices sd ON a.device_id = sd.id AND sd.deleted_at IS NULL
+        WHERE a.business_id = (SELECT MIN(id) FROM businesses) AND a.resolved = FALSE
+        ORDER BY a.alert_time DESC, a.id DESC
+        LIMIT 500
+        """,
+        ("idx_alerts_unresolved_business",),
+    ),
+    (
+        "open alerts page (/api/alerts?limit=50)",
+        """
+        SELECT a.id, a.alert_time, sd.name, b.name
+        FROM alerts a
+        JOIN security_devices sd ON a.device_id = sd.id AND sd.deleted_at IS NULL
+        JOIN businesses b ON a.business_id = b.id
+        WHERE a.resolved = FALSE
+        ORDER BY a.alert_time DESC, a.id DESC
+        LIMIT 51
+        """,
+        ("idx_alerts_unresolved_time",),
+    ),
+    (
+        "open malfunctions page (/api/malfunctions?limit=50)",
+        """
+        SELECT m.id, m.malfunction_time, sd.name, b.name
+        FROM malfunctions m
+        JOIN security_devices sd ON m.device_id = sd.id AND sd.deleted_at IS NULL
+        JOIN businesses b ON m.business_id = b.id
+        WHERE m.resolved = FALSE
+        ORDER BY m.malfunction_time DESC, m.id DESC
+        LIMIT 51
+        """,
+        ("idx_malfunctions_unresolved_time",),
+    ),
+)
+
+
+def plan_indexes(cur, plan: str) -> set:
+    """
+    Returns the indexes scanned by a plan, together with the partitioned
+    indexes they were created from on the partitions of the event tables.
+
+    Args:
+        cur: An open database cursor
+        plan (str): The text of the plan
+
+    Returns:
+        set: The index names
+    """
+    names = re.findall(r"(?:using|Bitmap Index Scan on) (\S+)", plan)
+    cur.execute(
+        """
+        SELECT c.relname, p.relname
+        FROM pg_class c
+        LEFT JOIN pg_inherits i ON i.inhrelid = c.oid
+        LEFT JOIN pg_class p ON p.oid = i.inhparent
+        WHERE c.relname = ANY(%s)
+        """,
+        (names,),
+    )
+    return {name for row in cur.fetchall() for name in row if name is not None}
+
+
+def check_query_plans(cur, seed: dict) -> list:
+    """
+    Seeds the dataset and explains every query of `PLAN_CHECKS`.
+
+    Args:
+        cur: An open database cursor, inside a transaction the caller rolls back
+        seed (dict): The size of the dataset, see `SEED_QUERIES`
+
+    Returns:
+        list: The `(name, expected indexes, plan)` of the queries using none of them
+    """
+    for query in SEED_QUERIES:
+        cur.execute(query, seed)
+    logger.info("Seeded the query plan dataset: %s", seed)
+
+    failures = []
+    for name, query, indexes in PLAN_CHECKS:
+        cur.execute(f"EXPLAIN {query}")
+        plan = "\n".join(row[0] for row in cur.fetchall())
+
+        scanned = plan_indexes(cur, plan)
+        used = [index for index in indexes if index in scanned]
+        if used:
+            print(f"[OK] {name}: {', '.join(used)}")
+        else:
+            print(f"[FAIL] {name}")
+            failures.append((name, indexes, plan))
+
+    return failures
+
+
+def main():
+    """
+    Parses the arguments, checks the query plans and exits with 1 on failures.
+    """
+    parser = argparse.ArgumentParser(
+        description="Check the query plans of the unresolved-incident queries"
+    )
+    parser.add_argument(
+        "--businesses",
+        type=int,
+        default=DEFAULT_BUSINESSES,
+        help=f"Businesses to seed (default: {DEFAULT_BUSINESSES})",
+    )
+    parser.add_argument(
+        "--devices-per-business",
+        type=int,
+        default=DEFAULT_DEVICES_PER_BUSINESS,
+        help=f"Devices to seed per business (default: {DEFAULT_DEVICES_PER_BUSINESS})",
+    )
+    parser.add_argument(
+        "--events",
+        type=int,
+        default=DEFAULT_EVENTS,
+        help=f"Alerts and malfunctions to seed each (default: {DEFAULT_EVENTS})",
+    )
+    parser.add_argument(
+        "--unresolved-percent",
+        type=float,
+        default=DEFAULT_UNRESOLVED_PERCENT,
+        help=f"Percentage of unresolved events (default: {DEFAULT_UNRESOLVED_PERCENT})",
+    )
+    args = parser.parse_args()
+
+    connection = None
+    failed = []
+    try:
+        DatabaseManager.initialize_pool()
+        connection = DatabaseManager.get_connection()
+
+        with connection.cursor() as cur:
+            failed = check_query_plans(cur, vars(args))
+
+        for name, indexes, plan in failed:
+            print(f"\n{name} does not use {' or '.join(indexes)}:\n{plan}")
+    except psycopg2.Error as err:
+        logger.critical("Error occurred while checking the query plans: %s", err)
+        print(f"Error occurred while checking the query plans: \n\t{err}")
+        sys.exit(1)
+    finally:
+        # The seeded dataset is never kept
+        if connection:
+            connection.rollback()
+            DatabaseManager.release_connection(connection)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
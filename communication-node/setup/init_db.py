@@ -17,6 +17,718 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from utils.db import (  # noqa: E402 # pylint: disable=wrong-import-position
     DatabaseManager,  # noqa: E402 # pylint: disable=wrong-import-position
 )  # noqa: E402 # pylint: disable=wrong-import-position
+from utils.partitions import (  # noqa: E402 # pylint: disable=wrong-import-position
+    ensure_partitions,  # noqa: E402 # pylint: disable=wrong-import-position
+)  # noqa: E402 # pylint: disable=wrong-import-position
+from utils.event_types import (  # noqa: E402 # pylint: disable=wrong-import-position
+    SEEDED_EVENT_TYPES,  # noqa: E402 # pylint: disable=wrong-import-position
+)  # noqa: E402 # pylint: disable=wrong-import-position
+
+
+def create_event_types(cur):
+    """
+    Creates the event types table with the seeded types.
+    """
+    logger.info("Creating event_types table...")
+    cur.execute("DROP TABLE IF EXISTS event_types CASCADE;")
+    cur.execute(
+        """
+        CREATE TABLE event_types (
+            code SMALLINT GENERATED BY DEFAULT AS IDENTITY (START WITH 100)
+                PRIMARY KEY,
+            event VARCHAR(20) NOT NULL,
+            name VARCHAR(50) NOT NULL,
+            UNIQUE (event, name)
+        );
+    """
+    )
+    cur.executemany(
+        "INSERT INTO event_types(code, event, name) VALUES (%s, %s, %s)",
+        SEEDED_EVENT_TYPES,
+    )
+    logger.info("Table `event_types` created successfully.")
+
+
+def create_change_log(cur):
+    """
+    Creates the change log backing the delta-sync endpoint and its triggers.
+    """
+    logger.info("Creating change_log table...")
+    cur.execute("DROP TABLE IF EXISTS change_log CASCADE;")
+    cur.execute("DROP TABLE IF EXISTS change_log_horizon CASCADE;")
+    cur.execute(
+        """
+        CREATE TABLE change_log (
+            id BIGSERIAL PRIMARY KEY,
+            txid XID8 NOT NULL DEFAULT pg_current_xact_id(),
+            entity VARCHAR(50) NOT NULL,
+            entity_id INTEGER NOT NULL,
+            operation VARCHAR(10) NOT NULL,
+            changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+            -- What `ChangeListener` needs to apply the change in memory
+            detail JSONB,
+            -- The API process that made the change, see `DatabaseManager.origin`
+            origin TEXT DEFAULT current_setting('app.origin', TRUE)
+        );
+        CREATE INDEX idx_change_log_txid ON change_log(txid, id);
+        CREATE INDEX idx_change_log_changed_at ON change_log(changed_at);
+
+        -- Oldest transaction still covered by change_log after pruning
+        CREATE TABLE change_log_horizon (
+            id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+            txid BIGINT NOT NULL
+        );
+        INSERT INTO change_log_horizon(txid) VALUES (0);
+
+        -- The detail of an event: its device, business and type, its time
+        -- when inserted, and by how much it changed the open incidents
+        CREATE OR REPLACE FUNCTION event_change_detail(
+            device_id INTEGER, business_id INTEGER, event_type SMALLINT,
+            event_time TIMESTAMPTZ, was_open BOOLEAN, is_open BOOLEAN
+        ) RETURNS JSONB AS $$
+            SELECT jsonb_build_object(
+                'device_id', device_id,
+                'business_id', business_id,
+                'type', event_type,
+                'time', event_time,
+                'opened', is_open::INTEGER - was_open::INTEGER
+            );
+        $$ LANGUAGE sql IMMUTABLE;
+
+        -- Row triggers of partitioned tables run on the partitions, so
+        -- those pass their table name as TG_ARGV[0]. Each table reads its
+        -- own columns in its own branch, as PL/pgSQL plans a statement
+        -- for the table of the trigger when it first runs it.
+        CREATE OR REPLACE FUNCTION record_change() RETURNS TRIGGER AS $$
+        DECLARE
+            entity TEXT := COALESCE(TG_ARGV[0], TG_TABLE_NAME);
+            operation TEXT := 'upsert';
+            detail JSONB;
+            was_open BOOLEAN := FALSE;
+            is_open BOOLEAN := FALSE;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                IF entity = 'security_devices' THEN
+                    detail := jsonb_build_object('business_id', OLD.business_id);
+                END IF;
+                INSERT INTO change_log(entity, entity_id, operation, detail)
+                VALUES (entity, OLD.id, 'delete', detail);
+                RETURN OLD;
+            END IF;
+
+            -- A soft deleted business or device is gone for the readers
+            IF TG_OP = 'UPDATE' AND entity IN ('businesses', 'security_devices') THEN
+                IF NEW.deleted_at IS NOT NULL THEN
+                    operation := 'delete';
+                END IF;
+            END IF;
+
+            IF entity IN ('alerts', 'malfunctions') THEN
+                IF TG_OP = 'UPDATE' THEN
+                    was_open := NOT COALESCE(OLD.resolved, FALSE);
+                END IF;
+                is_open := NOT COALESCE(NEW.resolved, FALSE);
+            END IF;
+
+            IF entity = 'security_devices' THEN
+                detail := jsonb_build_object(
+                    'business_id', NEW.business_id,
+                    'motion_sensor', NEW.motion_sensor,
+                    'sound_sensor', NEW.sound_sensor,
+                    'gas_sensor', NEW.gas_sensor,
+                    'fire_sensor', NEW.fire_sensor
+                );
+            ELSIF entity = 'alerts' THEN
+                detail := event_change_detail(
+                    NEW.device_id, NEW.business_id, NEW.alert_type,
+                    CASE WHEN TG_OP = 'INSERT' THEN NEW.alert_time END,
+                    was_open, is_open
+                );
+            ELSIF entity = 'malfunctions' THEN
+                detail := event_change_detail(
+                    NEW.device_id, NEW.business_id, NEW.malfunction_type,
+                    CASE WHEN TG_OP = 'INSERT' THEN NEW.malfunction_time END,
+                    was_open, is_open
+                );
+            ELSIF entity = 'device_logs' THEN
+                detail := event_change_detail(
+                    NEW.device_id, NEW.business_id, NEW.log_type, NEW.log_time,
+                    was_open, is_open
+                );
+            END IF;
+
+            INSERT INTO change_log(entity, entity_id, operation, detail)
+            VALUES (entity, NEW.id, operation, detail);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        -- Deleting a business or device implies the deletion of its events,
+        -- so event tables only record inserts and updates.
+        -- Updates of the open incident counters alone are not changes, the
+        -- readers learn about them from the events themselves.
+        CREATE TRIGGER trg_businesses_change
+            AFTER INSERT OR DELETE ON businesses
+            FOR EACH ROW EXECUTE FUNCTION record_change();
+        CREATE TRIGGER trg_businesses_update_change
+            AFTER UPDATE ON businesses
+            FOR EACH ROW
+            WHEN (to_jsonb(OLD) - 'open_alert_count'
+                  IS DISTINCT FROM to_jsonb(NEW) - 'open_alert_count')
+            EXECUTE FUNCTION record_change();
+        CREATE TRIGGER trg_security_devices_change
+            AFTER INSERT OR DELETE ON security_devices
+            FOR EACH ROW EXECUTE FUNCTION record_change();
+        CREATE TRIGGER trg_security_devices_update_change
+            AFTER UPDATE ON security_devices
+            FOR EACH ROW
+            WHEN (to_jsonb(OLD) - '{open_alert_count,malfunction_mask}'::TEXT[]
+                  IS DISTINCT FROM
+                  to_jsonb(NEW) - '{open_alert_count,malfunction_mask}'::TEXT[])
+            EXECUTE FUNCTION record_change();
+        CREATE TRIGGER trg_alerts_change
+            AFTER INSERT OR UPDATE ON alerts
+            FOR EACH ROW EXECUTE FUNCTION record_change('alerts');
+        CREATE TRIGGER trg_malfunctions_change
+            AFTER INSERT OR UPDATE ON malfunctions
+            FOR EACH ROW EXECUTE FUNCTION record_change('malfunctions');
+        CREATE TRIGGER trg_device_logs_change
+            AFTER INSERT ON device_logs
+            FOR EACH ROW EXECUTE FUNCTION record_change('device_logs');
+
+        -- Tells the API processes about the changes `change_log` does not
+        -- record, which they cannot follow by polling it: employee changes
+        -- and deleted events. The payload names the table and the devices
+        -- and businesses of the rows; past 250 IDs the list is left null,
+        -- which means any.
+        CREATE OR REPLACE FUNCTION notify_change() RETURNS TRIGGER AS $$
+        DECLARE
+            devices INTEGER[] := '{}';
+            businesses INTEGER[] := '{}';
+        BEGIN
+            IF TG_TABLE_NAME <> 'employees' THEN
+                SELECT array_agg(DISTINCT device_id), array_agg(DISTINCT business_id)
+                INTO devices, businesses
+                FROM changed_rows;
+
+                -- No row changed
+                IF businesses IS NULL THEN
+                    RETURN NULL;
+                END IF;
+            END IF;
+
+            PERFORM pg_notify('table_changes', json_build_object(
+                'table', TG_TABLE_NAME,
+                'devices', CASE WHEN cardinality(devices) <= 250 THEN devices END,
+                'businesses', CASE WHEN cardinality(businesses) <= 250 THEN businesses END
+            )::TEXT);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trg_employees_notify
+            AFTER INSERT OR UPDATE OR DELETE ON employees
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_change();
+        CREATE TRIGGER trg_alerts_notify_delete
+            AFTER DELETE ON alerts REFERENCING OLD TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_change();
+        CREATE TRIGGER trg_malfunctions_notify_delete
+            AFTER DELETE ON malfunctions REFERENCING OLD TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_change();
+        CREATE TRIGGER trg_device_logs_notify_delete
+            AFTER DELETE ON device_logs REFERENCING OLD TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_change();
+    """
+    )
+    logger.info("Table `change_log` created successfully.")
+
+
+def create_dashboard_counters(cur):
+    """
+    Creates the counters backing /api/stats and the triggers maintaining them.
+    """
+    logger.info("Creating dashboard counter tables...")
+    cur.execute("DROP TABLE IF EXISTS dashboard_counters CASCADE;")
+    cur.execute("DROP TABLE IF EXISTS event_counts_daily CASCADE;")
+    cur.execute(
+        """
+        CREATE TABLE dashboard_counters (
+            name VARCHAR(100) PRIMARY KEY,
+            value BIGINT NOT NULL DEFAULT 0
+        );
+        INSERT INTO dashboard_counters(name, value)
+        VALUES ('businesses', 0), ('security_devices', 0);
+
+        -- Per-day event counts, days are UTC dates
+        CREATE TABLE event_counts_daily (
+            day DATE NOT NULL,
+            event VARCHAR(20) NOT NULL,
+            event_type SMALLINT NOT NULL,
+            count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (event, day, event_type)
+        );
+
+        -- Subtracts the events of soft deleted devices from the counters
+        -- and rollups. Their rows stay until the purge, which does not
+        -- count them again, see `count_event_rows`.
+        CREATE OR REPLACE FUNCTION uncount_device_events(device_ids INTEGER[])
+        RETURNS VOID AS $$
+        DECLARE
+            e RECORD;
+        BEGIN
+            FOR e IN
+                SELECT * FROM (VALUES
+                    ('alerts', 'alert', 'alert_type', 'alert_time'),
+                    ('malfunctions', 'malfunction', 'malfunction_type',
+                     'malfunction_time')
+                ) t(tbl, event, type_column, time_column)
+            LOOP
+                EXECUTE format(
+                    'INSERT INTO event_counts_daily AS c(day, event, event_type, count)
+                     SELECT (%4$I AT TIME ZONE ''UTC'')::date, %2$L, %3$I, -COUNT(*)
+                     FROM %1$I WHERE device_id = ANY($1) GROUP BY 1, 3
+                     ON CONFLICT (event, day, event_type)
+                     DO UPDATE SET count = c.count + EXCLUDED.count',
+                    e.tbl, e.event, e.type_column, e.time_column
+                ) USING device_ids;
+                EXECUTE format(
+                    'INSERT INTO dashboard_counters AS c(name, value)
+                     SELECT %1$L || '':'' || %2$I, -COUNT(*)
+                     FROM %1$I WHERE device_id = ANY($1) GROUP BY %2$I
+                     ON CONFLICT (name) DO UPDATE SET value = c.value + EXCLUDED.value',
+                    e.tbl, e.type_column
+                ) USING device_ids;
+            END LOOP;
+
+            PERFORM add_alert_rollups(
+                array_agg(bucket), array_agg(business_id),
+                array_agg(alert_type), array_agg(count)
+            )
+            FROM (
+                SELECT date_trunc('hour', alert_time) AS bucket,
+                       business_id, alert_type, -COUNT(*) AS count
+                FROM alerts
+                WHERE device_id = ANY(device_ids)
+                GROUP BY 1, 2, 3
+            ) deltas
+            HAVING COUNT(*) > 0;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        -- Soft deleted rows leave the counters when they are soft deleted,
+        -- so the purge of their rows does not count them again. The events
+        -- of soft deleted devices leave them at the same time.
+        CREATE OR REPLACE FUNCTION count_entity_rows() RETURNS TRIGGER AS $$
+        DECLARE
+            soft_deleted INTEGER[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE dashboard_counters
+                SET value = value + (SELECT COUNT(*) FROM new_rows)
+                WHERE name = TG_TABLE_NAME;
+            ELSIF TG_OP = 'UPDATE' THEN
+                SELECT array_agg(n.id) INTO soft_deleted
+                FROM new_rows n JOIN old_rows o ON o.id = n.id
+                WHERE n.deleted_at IS NOT NULL AND o.deleted_at IS NULL;
+
+                -- Other updates must not lock the counter row
+                IF soft_deleted IS NOT NULL THEN
+                    UPDATE dashboard_counters
+                    SET value = value - cardinality(soft_deleted)
+                    WHERE name = TG_TABLE_NAME;
+
+                    IF TG_TABLE_NAME = 'security_devices' THEN
+                        PERFORM uncount_device_events(soft_deleted);
+                    END IF;
+                END IF;
+            ELSE
+                UPDATE dashboard_counters
+                SET value = value - (
+                    SELECT COUNT(*) FROM old_rows WHERE deleted_at IS NULL
+                )
+                WHERE name = TG_TABLE_NAME;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        -- Keeps the per-day counts of an event table and the all-time
+        -- `alerts:<type code>` totals in step with inserted and deleted rows.
+        -- Rows of soft deleted devices are left out, they were subtracted
+        -- when their device was soft deleted.
+        -- TG_ARGV: event name, type column, time column
+        CREATE OR REPLACE FUNCTION count_event_rows() RETURNS TRIGGER AS $$
+        DECLARE
+            rows_table TEXT := format(
+                '(SELECT * FROM %I e WHERE NOT EXISTS (
+                    SELECT 1 FROM security_devices sd
+                    WHERE sd.id = e.device_id AND sd.deleted_at IS NOT NULL
+                 )) counted',
+                CASE WHEN TG_OP = 'INSERT' THEN 'new_rows' ELSE 'old_rows' END
+            );
+            delta INTEGER := CASE WHEN TG_OP = 'INSERT' THEN 1 ELSE -1 END;
+        BEGIN
+            EXECUTE format(
+                'INSERT INTO event_counts_daily AS c(day, event, event_type, count)
+                 SELECT (%3$I AT TIME ZONE ''UTC'')::date, %1$L, %2$I, %4$s * COUNT(*)
+                 FROM %5$s GROUP BY 1, 3
+                 ON CONFLICT (event, day, event_type)
+                 DO UPDATE SET count = c.count + EXCLUDED.count',
+                TG_ARGV[0], TG_ARGV[1], TG_ARGV[2], delta, rows_table
+            );
+            EXECUTE format(
+                'INSERT INTO dashboard_counters AS c(name, value)
+                 SELECT %1$L || '':'' || %2$I, %3$s * COUNT(*)
+                 FROM %4$s GROUP BY %2$I
+                 ON CONFLICT (name) DO UPDATE SET value = c.value + EXCLUDED.value',
+                TG_TABLE_NAME, TG_ARGV[1], delta, rows_table
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trg_businesses_count_insert
+            AFTER INSERT ON businesses REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_entity_rows();
+        CREATE TRIGGER trg_businesses_count_delete
+            AFTER DELETE ON businesses REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_entity_rows();
+        CREATE TRIGGER trg_businesses_count_soft_delete
+            AFTER UPDATE ON businesses
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_entity_rows();
+        CREATE TRIGGER trg_security_devices_count_insert
+            AFTER INSERT ON security_devices REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_entity_rows();
+        CREATE TRIGGER trg_security_devices_count_delete
+            AFTER DELETE ON security_devices REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_entity_rows();
+        CREATE TRIGGER trg_security_devices_count_soft_delete
+            AFTER UPDATE ON security_devices
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_entity_rows();
+
+        CREATE TRIGGER trg_alerts_count_insert
+            AFTER INSERT ON alerts REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT
+            EXECUTE FUNCTION count_event_rows('alert', 'alert_type', 'alert_time');
+        CREATE TRIGGER trg_alerts_count_delete
+            AFTER DELETE ON alerts REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT
+            EXECUTE FUNCTION count_event_rows('alert', 'alert_type', 'alert_time');
+        CREATE TRIGGER trg_malfunctions_count_insert
+            AFTER INSERT ON malfunctions REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_event_rows(
+                'malfunction', 'malfunction_type', 'malfunction_time'
+            );
+        CREATE TRIGGER trg_malfunctions_count_delete
+            AFTER DELETE ON malfunctions REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_event_rows(
+                'malfunction', 'malfunction_type', 'malfunction_time'
+            );
+    """
+    )
+    logger.info("Dashboard counter tables created successfully.")
+
+
+def create_alert_rollups(cur):
+    """
+    Creates the alert rollups backing /api/alerts_over_time.
+    """
+    logger.info("Creating alert rollup tables...")
+    cur.execute("DROP TABLE IF EXISTS alert_rollups_hourly CASCADE;")
+    cur.execute("DROP TABLE IF EXISTS alert_rollups_daily CASCADE;")
+    cur.execute(
+        """
+        CREATE TABLE alert_rollups_hourly (
+            bucket TIMESTAMP WITH TIME ZONE NOT NULL,
+            business_id INTEGER NOT NULL,
+            alert_type SMALLINT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, business_id, alert_type)
+        );
+
+        -- The hourly rows summed per UTC day, so the longer series read
+        -- one row per day instead of 24
+        CREATE TABLE alert_rollups_daily (
+            day DATE NOT NULL,
+            business_id INTEGER NOT NULL,
+            alert_type SMALLINT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, business_id, alert_type)
+        );
+
+        -- Adds hourly deltas to the hourly rollups and their sums per day
+        -- to the daily rollups, so both levels always agree
+        CREATE OR REPLACE FUNCTION add_alert_rollups(
+            buckets TIMESTAMP WITH TIME ZONE[],
+            business_ids INTEGER[],
+            alert_types SMALLINT[],
+            counts BIGINT[]
+        ) RETURNS VOID AS $$
+        BEGIN
+            INSERT INTO alert_rollups_hourly AS r(bucket, business_id, alert_type, count)
+            SELECT * FROM unnest(buckets, business_ids, alert_types, counts)
+            ON CONFLICT (bucket, business_id, alert_type)
+            DO UPDATE SET count = r.count + EXCLUDED.count;
+
+            INSERT INTO alert_rollups_daily AS r(day, business_id, alert_type, count)
+            SELECT (d.bucket AT TIME ZONE 'UTC')::date, d.business_id,
+                   d.alert_type, SUM(d.count)
+            FROM unnest(buckets, business_ids, alert_types, counts)
+                AS d(bucket, business_id, alert_type, count)
+            GROUP BY 1, 2, 3
+            ON CONFLICT (day, business_id, alert_type)
+            DO UPDATE SET count = r.count + EXCLUDED.count;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        -- Alerts cascading from a device or business delete are subtracted
+        -- here too. Like in `count_event_rows`, the alerts of soft deleted
+        -- devices are left out, `uncount_device_events` subtracted them.
+        CREATE OR REPLACE FUNCTION rollup_alert_rows() RETURNS TRIGGER AS $$
+        DECLARE
+            buckets TIMESTAMP WITH TIME ZONE[];
+            business_ids INTEGER[];
+            alert_types SMALLINT[];
+            counts BIGINT[];
+        BEGIN
+            EXECUTE format(
+                'SELECT array_agg(bucket), array_agg(business_id),
+                        array_agg(alert_type), array_agg(count)
+                 FROM (
+                     SELECT date_trunc(''hour'', alert_time) AS bucket,
+                            business_id, alert_type, %s * COUNT(*) AS count
+                     FROM %I e
+                     WHERE NOT EXISTS (
+                         SELECT 1 FROM security_devices sd
+                         WHERE sd.id = e.device_id AND sd.deleted_at IS NOT NULL
+                     )
+                     GROUP BY 1, 2, 3
+                 ) deltas',
+                CASE WHEN TG_OP = 'INSERT' THEN 1 ELSE -1 END,
+                CASE WHEN TG_OP = 'INSERT' THEN 'new_rows' ELSE 'old_rows' END
+            ) INTO buckets, business_ids, alert_types, counts;
+
+            IF buckets IS NOT NULL THEN
+                PERFORM add_alert_rollups(buckets, business_ids, alert_types, counts);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trg_alerts_rollup_insert
+            AFTER INSERT ON alerts REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION rollup_alert_rows();
+        CREATE TRIGGER trg_alerts_rollup_delete
+            AFTER DELETE ON alerts REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION rollup_alert_rows();
+    """
+    )
+    logger.info("Alert rollup tables created successfully.")
+
+
+def create_incident_counters(cur):
+    """
+    Creates the triggers maintaining the open incident counters.
+    """
+    logger.info("Creating open incident counter triggers...")
+    cur.execute(
+        """
+        -- Bit of a malfunction type code in `security_devices.malfunction_mask`,
+        -- types other than the four sensors share the last bit. The codes
+        -- are the `SEEDED_EVENT_TYPES` of the sensor malfunctions.
+        CREATE OR REPLACE FUNCTION sensor_bit(malfunction_type SMALLINT)
+        RETURNS SMALLINT AS $$
+            SELECT CASE malfunction_type
+                WHEN 11 THEN 1
+                WHEN 12 THEN 2
+                WHEN 13 THEN 4
+                WHEN 14 THEN 8
+                ELSE 16
+            END::SMALLINT;
+        $$ LANGUAGE sql IMMUTABLE;
+
+        -- Keeps `open_alert_count` of the devices and of their businesses in
+        -- step with the unresolved alerts inserted, resolved and deleted.
+        -- Rows are locked in ID order, so concurrent statements touching
+        -- several devices or businesses never deadlock.
+        CREATE OR REPLACE FUNCTION count_open_alerts() RETURNS TRIGGER AS $$
+        DECLARE
+            changed TEXT := CASE TG_OP
+                WHEN 'INSERT' THEN
+                    'SELECT device_id, 1 AS delta FROM new_rows WHERE resolved = FALSE'
+                WHEN 'DELETE' THEN
+                    'SELECT device_id, -1 AS delta FROM old_rows WHERE resolved = FALSE'
+                ELSE
+                    'SELECT device_id, 1 AS delta FROM new_rows WHERE resolved = FALSE
+                     UNION ALL
+                     SELECT device_id, -1 FROM old_rows WHERE resolved = FALSE'
+            END;
+            device_ids INTEGER[];
+            device_deltas INTEGER[];
+            business_ids INTEGER[];
+            business_deltas INTEGER[];
+        BEGIN
+            EXECUTE format(
+                'SELECT array_agg(device_id ORDER BY device_id),
+                        array_agg(delta ORDER BY device_id)
+                 FROM (SELECT device_id, SUM(delta)::INTEGER AS delta
+                       FROM (%s) c GROUP BY device_id HAVING SUM(delta) <> 0) d',
+                changed
+            ) INTO device_ids, device_deltas;
+
+            IF device_ids IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            PERFORM 1 FROM security_devices WHERE id = ANY(device_ids)
+            ORDER BY id FOR NO KEY UPDATE;
+
+            -- Alerts of soft deleted devices already left their business
+            WITH updated AS (
+                UPDATE security_devices sd
+                SET open_alert_count = sd.open_alert_count + c.delta
+                FROM unnest(device_ids, device_deltas) AS c(id, delta)
+                WHERE sd.id = c.id
+                RETURNING sd.business_id, sd.deleted_at, c.delta
+            )
+            SELECT array_agg(business_id ORDER BY business_id),
+                   array_agg(delta ORDER BY business_id)
+            INTO business_ids, business_deltas
+            FROM (SELECT business_id, SUM(delta)::INTEGER AS delta
+                  FROM updated WHERE deleted_at IS NULL
+                  GROUP BY business_id HAVING SUM(delta) <> 0) b;
+
+            IF business_ids IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            PERFORM 1 FROM businesses WHERE id = ANY(business_ids)
+            ORDER BY id FOR NO KEY UPDATE;
+
+            UPDATE businesses b
+            SET open_alert_count = b.open_alert_count + c.delta
+            FROM unnest(business_ids, business_deltas) AS c(id, delta)
+            WHERE b.id = c.id;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        -- Keeps `malfunction_mask` of the devices in step with the unresolved
+        -- malfunctions. New malfunctions set their bit; resolved or deleted ones
+        -- make the mask be recomputed from the remaining unresolved rows, once
+        -- the devices are locked, so it sees every malfunction committed before.
+        CREATE OR REPLACE FUNCTION track_malfunction_mask() RETURNS TRIGGER AS $$
+        DECLARE
+            device_ids INTEGER[];
+            device_bits SMALLINT[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT array_agg(device_id ORDER BY device_id),
+                       array_agg(bits ORDER BY device_id)
+                INTO device_ids, device_bits
+                FROM (SELECT device_id, bit_or(sensor_bit(malfunction_type)) AS bits
+                      FROM new_rows WHERE resolved = FALSE GROUP BY device_id) d;
+            ELSIF TG_OP = 'UPDATE' THEN
+                SELECT array_agg(DISTINCT device_id) INTO device_ids
+                FROM (SELECT device_id FROM old_rows WHERE resolved = FALSE
+                      UNION ALL
+                      SELECT device_id FROM new_rows WHERE resolved = FALSE) d;
+            ELSE
+                SELECT array_agg(DISTINCT device_id) INTO device_ids
+                FROM old_rows WHERE resolved = FALSE;
+            END IF;
+
+            IF device_ids IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            PERFORM 1 FROM security_devices WHERE id = ANY(device_ids)
+            ORDER BY id FOR NO KEY UPDATE;
+
+            IF TG_OP = 'INSERT' THEN
+                UPDATE security_devices sd
+                SET malfunction_mask = sd.malfunction_mask | c.bits
+                FROM unnest(device_ids, device_bits) AS c(id, bits)
+                WHERE sd.id = c.id AND sd.malfunction_mask | c.bits <> sd.malfunction_mask;
+            ELSE
+                UPDATE security_devices sd
+                SET malfunction_mask = c.mask
+                FROM (
+                    SELECT d.id, COALESCE((
+                        SELECT bit_or(sensor_bit(m.malfunction_type))
+                        FROM malfunctions m
+                        WHERE m.device_id = d.id AND m.resolved = FALSE
+                    ), 0) AS mask
+                    FROM unnest(device_ids) AS d(id)
+                ) c
+                WHERE sd.id = c.id AND sd.malfunction_mask <> c.mask;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        -- A soft deleted device takes its open alerts out of its business
+        CREATE OR REPLACE FUNCTION release_open_alerts() RETURNS TRIGGER AS $$
+        DECLARE
+            business_ids INTEGER[];
+            business_deltas INTEGER[];
+        BEGIN
+            SELECT array_agg(business_id ORDER BY business_id),
+                   array_agg(delta ORDER BY business_id)
+            INTO business_ids, business_deltas
+            FROM (SELECT n.business_id, SUM(n.open_alert_count)::INTEGER AS delta
+                  FROM new_rows n JOIN old_rows o ON o.id = n.id
+                  WHERE n.deleted_at IS NOT NULL AND o.deleted_at IS NULL
+                    AND n.open_alert_count > 0
+                  GROUP BY n.business_id) b;
+
+            IF business_ids IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            PERFORM 1 FROM businesses WHERE id = ANY(business_ids)
+            ORDER BY id FOR NO KEY UPDATE;
+
+            UPDATE businesses b
+            SET open_alert_count = b.open_alert_count - c.delta
+            FROM unnest(business_ids, business_deltas) AS c(id, delta)
+            WHERE b.id = c.id;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trg_alerts_open_insert
+            AFTER INSERT ON alerts REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_open_alerts();
+        CREATE TRIGGER trg_alerts_open_update
+            AFTER UPDATE ON alerts
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_open_alerts();
+        CREATE TRIGGER trg_alerts_open_delete
+            AFTER DELETE ON alerts REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_open_alerts();
+        CREATE TRIGGER trg_malfunctions_mask_insert
+            AFTER INSERT ON malfunctions REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION track_malfunction_mask();
+        CREATE TRIGGER trg_malfunctions_mask_update
+            AFTER UPDATE ON malfunctions
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION track_malfunction_mask();
+        CREATE TRIGGER trg_malfunctions_mask_delete
+            AFTER DELETE ON malfunctions REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION track_malfunction_mask();
+        CREATE TRIGGER trg_security_devices_release_alerts
+            AFTER UPDATE ON security_devices
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION release_open_alerts();
+    """
+    )
+    logger.info("Open incident counter triggers created successfully.")
 
 
 def create_tables():
@@ -80,9 +792,15 @@ def create_tables():
                 created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
                 contact_name VARCHAR(255),
                 contact_email VARCHAR(255),
-                contact_phone VARCHAR(50)
+                contact_phone VARCHAR(50),
+                deleted_at TIMESTAMP WITH TIME ZONE,
+                -- Unresolved alerts of the devices not deleted
+                open_alert_count INTEGER NOT NULL DEFAULT 0
             );
             CREATE INDEX idx_businesses_name ON businesses(name);
+            CREATE INDEX idx_businesses_deleted ON businesses(deleted_at)
+                WHERE deleted_at IS NOT NULL;
+            CREATE INDEX idx_businesses_location ON businesses USING GIST (point(lon, lat));
         """
         )
         logger.info("Table `businesses` created successfully.")
@@ -104,6 +822,10 @@ def create_tables():
                 created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
                 last_active_at TIMESTAMP WITH TIME ZONE,
                 status VARCHAR(50) DEFAULT 'inactive',
+                deleted_at TIMESTAMP WITH TIME ZONE,
+                -- Unresolved alerts, and `sensor_bit` of the unresolved malfunctions
+                open_alert_count INTEGER NOT NULL DEFAULT 0,
+                malfunction_mask SMALLINT NOT NULL DEFAULT 0,
                 CONSTRAINT fk_business FOREIGN KEY(business_id) REFERENCES businesses(id)
                 ON DELETE CASCADE,
                 CONSTRAINT fk_api_key FOREIGN KEY(api_key_id) REFERENCES api_keys(id)
@@ -111,6 +833,8 @@ def create_tables():
             );
             CREATE INDEX idx_devices_business ON security_devices(business_id);
             CREATE INDEX idx_devices_api_key ON security_devices(api_key_id);
+            CREATE INDEX idx_devices_deleted ON security_devices(deleted_at)
+                WHERE deleted_at IS NOT NULL;
         """
         )
         logger.info("Table `security_devices` created successfully.")
@@ -136,22 +860,41 @@ def create_tables():
         )
         logger.info("Table `employees` created successfully.")
 
+        # Event types referenced by the event tables
+        create_event_types(cur)
+
         # Create alerts table
         logger.info("Creating alerts table...")
         cur.execute("DROP TABLE IF EXISTS alerts CASCADE;")
         cur.execute(
             """
             CREATE TABLE alerts (
-                id SERIAL PRIMARY KEY,
+                id SERIAL,
                 device_id INTEGER NOT NULL,
-                alert_type VARCHAR(50) NOT NULL,
-                alert_time TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                -- Copied from the device at insert, devices never change business
+                business_id INTEGER NOT NULL,
+                alert_type SMALLINT NOT NULL,
+                alert_time TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
                 message TEXT DEFAULT NULL,
                 resolved BOOLEAN DEFAULT FALSE,
+                PRIMARY KEY (id, alert_time),
                 CONSTRAINT fk_device FOREIGN KEY(device_id) REFERENCES security_devices(id)
-                ON DELETE CASCADE
-            );
-            CREATE INDEX idx_alerts_device ON alerts(device_id);
+                ON DELETE CASCADE,
+                CONSTRAINT fk_event_type FOREIGN KEY(alert_type) REFERENCES event_types(code)
+            ) PARTITION BY RANGE (alert_time);
+            CREATE TABLE alerts_default PARTITION OF alerts DEFAULT;
+            CREATE INDEX idx_alerts_device_time ON alerts(device_id, alert_time, id);
+            CREATE INDEX idx_alerts_type_time ON alerts(alert_type, alert_time, id);
+            CREATE INDEX idx_alerts_time_id ON alerts(alert_time, id);
+            CREATE INDEX idx_alerts_business_time ON alerts(business_id, alert_time, id);
+            -- Open alerts are a small fraction of the table but back the
+            -- business alert flags and the default listing
+            CREATE INDEX idx_alerts_unresolved_device
+                ON alerts(device_id, alert_type) WHERE resolved = FALSE;
+            CREATE INDEX idx_alerts_unresolved_time
+                ON alerts(alert_time, id) WHERE resolved = FALSE;
+            CREATE INDEX idx_alerts_unresolved_business
+                ON alerts(business_id, alert_time, id) WHERE resolved = FALSE;
         """
         )
         logger.info("Table `alerts` created successfully.")
@@ -162,16 +905,34 @@ def create_tables():
         cur.execute(
             """
             CREATE TABLE malfunctions (
-                id SERIAL PRIMARY KEY,
+                id SERIAL,
                 device_id INTEGER NOT NULL,
-                malfunction_type VARCHAR(50) NOT NULL,
-                malfunction_time TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                -- Copied from the device at insert, devices never change business
+                business_id INTEGER NOT NULL,
+                malfunction_type SMALLINT NOT NULL,
+                malfunction_time TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
                 message TEXT DEFAULT NULL,
                 resolved BOOLEAN DEFAULT FALSE,
+                PRIMARY KEY (id, malfunction_time),
                 CONSTRAINT fk_device FOREIGN KEY(device_id) REFERENCES security_devices(id)
-                ON DELETE CASCADE
-            );
-            CREATE INDEX idx_malfunctions_device ON malfunctions(device_id);
+                ON DELETE CASCADE,
+                CONSTRAINT fk_event_type FOREIGN KEY(malfunction_type) REFERENCES event_types(code)
+            ) PARTITION BY RANGE (malfunction_time);
+            CREATE TABLE malfunctions_default PARTITION OF malfunctions DEFAULT;
+            CREATE INDEX idx_malfunctions_device_time
+                ON malfunctions(device_id, malfunction_time, id);
+            CREATE INDEX idx_malfunctions_type_time
+                ON malfunctions(malfunction_type, malfunction_time, id);
+            CREATE INDEX idx_malfunctions_time_id ON malfunctions(malfunction_time, id);
+            CREATE INDEX idx_malfunctions_business_time
+                ON malfunctions(business_id, malfunction_time, id);
+            -- Open malfunctions back the device sensor health and the default listing
+            CREATE INDEX idx_malfunctions_unresolved_device
+                ON malfunctions(device_id, malfunction_type) WHERE resolved = FALSE;
+            CREATE INDEX idx_malfunctions_unresolved_time
+                ON malfunctions(malfunction_time, id) WHERE resolved = FALSE;
+            CREATE INDEX idx_malfunctions_unresolved_business
+                ON malfunctions(business_id, malfunction_time, id) WHERE resolved = FALSE;
         """
         )
 
@@ -181,18 +942,39 @@ def create_tables():
         cur.execute(
             """
             CREATE TABLE device_logs (
-                id SERIAL PRIMARY KEY,
+                id SERIAL,
                 device_id INTEGER NOT NULL,
-                log_time TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                log_type VARCHAR(50) NOT NULL,
+                -- Copied from the device at insert, devices never change business
+                business_id INTEGER NOT NULL,
+                log_time TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+                log_type SMALLINT NOT NULL,
                 message TEXT DEFAULT NULL,
+                PRIMARY KEY (id, log_time),
                 CONSTRAINT fk_device FOREIGN KEY(device_id) REFERENCES security_devices(id)
-                ON DELETE CASCADE
-            );
-            CREATE INDEX idx_device_logs_device ON device_logs(device_id);
+                ON DELETE CASCADE,
+                CONSTRAINT fk_event_type FOREIGN KEY(log_type) REFERENCES event_types(code)
+            ) PARTITION BY RANGE (log_time);
+            CREATE TABLE device_logs_default PARTITION OF device_logs DEFAULT;
+            CREATE INDEX idx_device_logs_device_time
+                ON device_logs(device_id, log_time, id);
+            CREATE INDEX idx_device_logs_type_time ON device_logs(log_type, log_time, id);
+            CREATE INDEX idx_device_logs_time_id ON device_logs(log_time, id);
+            CREATE INDEX idx_device_logs_business_time
+                ON device_logs(business_id, log_time, id);
         """
         )
 
+        # Monthly partitions of the event tables
+        logger.info("Creating event table partitions...")
+        ensure_partitions(cur)
+        logger.info("Event table partitions created successfully.")
+
+        # Change log and denormalized state maintained by triggers
+        create_change_log(cur)
+        create_dashboard_counters(cur)
+        create_alert_rollups(cur)
+        create_incident_counters(cur)
+
         # Commit all changes
         connection.commit()
         logger.info("All tables created successfully.")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Maintains the monthly partitions of the event tables.
+Creates the partitions of the coming months and drops the partitions past the
+retention period. Meant to run daily, e.g. from cron.
+"""
+
+import sys
+import os
+import argparse
+import psycopg2
+from utils.logger_config import get_logger
+
+# Setup logging
+logger = get_logger("maintain_partitions")
+
+# Add parent directory to path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.db import (  # noqa: E402 # pylint: disable=wrong-import-position
+    DatabaseManager,  # noqa: E402 # pylint: disable=wrong-import-position
+)  # noqa: E402 # pylint: disable=wrong-import-position
+from utils.partitions import (  # noqa: E402 # pylint: disable=wrong-import-position
+    DEFAULT_MONTHS_AHEAD,  # noqa: E402 # pylint: disable=wrong-import-position
+    PARTITIONED_TABLES,  # noqa: E402 # pylint: disable=wrong-import-position
+    drop_expired_partitions,  # noqa: E402 # pylint: disable=wrong-import-position
+    ensure_partitions,  # noqa: E402 # pylint: disable=wrong-import-position
+)  # noqa: E402 # pylint: disable=wrong-import-position
+
+DEFAULT_RETENTION_MONTHS = 12
+
+
+def main():
+    """
+    Parses the arguments, then creates and drops the partitions.
+    """
+    parser = argparse.ArgumentParser(description="Maintain the event table partitions")
+    parser.add_argument(
+        "--months-ahead",
+        type=int,
+        default=DEFAULT_MONTHS_AHEAD,
+        help=f"Months to create after the current one (default: {DEFAULT_MONTHS_AHEAD})",
+    )
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=DEFAULT_RETENTION_MONTHS,
+        help=(
+            "Months of events to keep, current one included "
+            f"(default: {DEFAULT_RETENTION_MONTHS})"
+        ),
+    )
+    parser.add_argument(
+        "--keep-all",
+        action="store_true",
+        help="Only create partitions, never drop any",
+    )
+    args = parser.parse_args()
+
+    if args.retention_months < 1:
+        parser.error("--retention-months must be at least 1")
+
+    connection = None
+    try:
+        DatabaseManager.initialize_pool()
+        connection = DatabaseManager.get_connection()
+
+        with connection.cursor() as cur:
+            created = ensure_partitions(cur, args.months_ahead)
+            connection.commit()
+
+            dropped = []
+            if not args.keep_all:
+                # One transaction per table keeps the parent locks short
+                for table in PARTITIONED_TABLES:
+                    dropped += drop_expired_partitions(
+                        cur, table, args.retention_months
+                    )
+                    connection.commit()
+
+        print(f"Created {len(created)} partitions: {', '.join(created) or '-'}")
+        print(f"Dropped {len(dropped)} partitions: {', '.join(dropped) or '-'}")
+    except psycopg2.Error as err:
+        logger.critical("Error occurred while maintaining the partitions: %s", err)
+        print(f"Error occurred while maintaining the partitions: \n\t{err}")
+        if connection:
+            connection.rollback()
+        sys.exit(1)
+    finally:
+        if connection:
+            DatabaseManager.release_connection(connection)
+
+
+if __name__ == "__main__":
+    main()
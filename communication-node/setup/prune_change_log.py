@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Prunes old entries from the change log used by the dashboard delta-sync endpoint.
+Dashboards holding a cursor older than the retention period must reload fully.
+"""
+
+import sys
+import os
+import argparse
+import psycopg2
+from utils.logger_config import get_logger
+
+# Setup logging
+logger = get_logger("prune_change_log")
+
+# Add parent directory to path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.db import (  # noqa: E402 # pylint: disable=wrong-import-position
+    DatabaseManager,  # noqa: E402 # pylint: disable=wrong-import-position
+)  # noqa: E402 # pylint: disable=wrong-import-position
+from utils.change_log import (  # noqa: E402 # pylint: disable=wrong-import-position
+    prune_change_log,  # noqa: E402 # pylint: disable=wrong-import-position
+)  # noqa: E402 # pylint: disable=wrong-import-position
+
+DEFAULT_RETENTION_DAYS = 7
+
+
+def main():
+    """
+    Parses the arguments and prunes the change log.
+    """
+    parser = argparse.ArgumentParser(description="Prune the change log")
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=DEFAULT_RETENTION_DAYS,
+        help=f"Days of changes to keep (default: {DEFAULT_RETENTION_DAYS})",
+    )
+    args = parser.parse_args()
+
+    connection = None
+    try:
+        DatabaseManager.initialize_pool()
+        connection = DatabaseManager.get_connection()
+
+        with connection.cursor() as cur:
+            deleted = prune_change_log(cur, args.days)
+        connection.commit()
+
+        print(f"Pruned {deleted} change log entries older than {args.days} days.")
+    except psycopg2.Error as err:
+        logger.critical("Error occurred while pruning the change log: %s", err)
+        print(f"Error occurred while pruning the change log: \n\t{err}")
+        if connection:
+            connection.rollback()
+        sys.exit(1)
+    finally:
+        if connection:
+            DatabaseManager.release_connection(connection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Recomputes the open incident counters of the devices and businesses from the
+event tables. The triggers keep them exact, this repairs them after manual
+edits of the event tables with the triggers disabled.
+"""
+
+import sys
+import os
+import psycopg2
+from utils.logger_config import get_logger
+
+# Setup logging
+logger = get_logger("repair_incident_counters")
+
+# Add parent directory to path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.db import (  # noqa: E402 # pylint: disable=wrong-import-position
+    DatabaseManager,  # noqa: E402 # pylint: disable=wrong-import-position
+)  # noqa: E402 # pylint: disable=wrong-import-position
+from utils.incidents import (  # noqa: E402 # pylint: disable=wrong-import-position
+    repair_incident_counters,  # noqa: E402 # pylint: disable=wrong-import-position
+)  # noqa: E402 # pylint: disable=wrong-import-position
+
+
+def main():
+    """
+    Repairs the open incident counters in a single transaction.
+    """
+    connection = None
+    try:
+        DatabaseManager.initialize_pool()
+        connection = DatabaseManager.get_connection()
+
+        with connection.cursor() as cur:
+            devices, businesses = repair_incident_counters(cur)
+        connection.commit()
+
+        print(
+            f"Repaired the open incident counters of {devices} devices "
+            f"and {businesses} businesses."
+        )
+    except psycopg2.Error as err:
+        logger.critical("Error occurred while repairing the counters: %s", err)
+        print(f"Error occurred while repairing the counters: \n\t{err}")
+        if connection:
+            connection.rollback()
+        sys.exit(1)
+    finally:
+        if connection:
+            DatabaseManager.release_connection(connection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Tests of the event archive reader.
+"""
+
+import gzip
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from utils import archive
+from utils.archive import EventArchive, write_manifest
+
+
+def utc(*args):
+    """
+    Builds a datetime in UTC.
+    """
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def log_row(row_id, time):
+    """
+    Builds an archived device log row.
+    """
+    return [row_id, 1, time.isoformat(), 3, None, "device", "business", 1]
+
+
+@pytest.fixture(name="archived_logs")
+def fixture_archived_logs(tmp_path, monkeypatch):
+    """
+    Archives two months of device logs, one row a day at noon.
+    """
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path))
+    (tmp_path / "device_logs").mkdir()
+
+    files = []
+    for month, days in ((1, 31), (2, 28)):
+        rows = [
+            log_row(month * 100 + day, utc(2025, month, day, 12))
+            for day in range(days, 0, -1)
+        ]
+        path = f"device_logs/device_logs_2025_{month:02d}.jsonl.gz"
+        with gzip.open(tmp_path / path, "wt") as archive_file:
+            archive_file.writelines(json.dumps(row) + "\n" for row in rows)
+        files.append(
+            {
+                "table": "device_logs",
+                "month": f"2025-{month:02d}",
+                "path": path,
+                "rows": len(rows),
+                "min_time": rows[-1][2],
+                "max_time": rows[0][2],
+            }
+        )
+
+    write_manifest({"files": files})
+
+
+@pytest.mark.usefixtures("archived_logs")
+def test_archived_until():
+    """
+    The archive of a table ends with its last archived month.
+    """
+    assert EventArchive.archived_until("device_logs") == utc(2025, 3, 1)
+    assert EventArchive.archived_until("alerts") is None
+
+
+@pytest.mark.usefixtures("archived_logs")
+def test_covers():
+    """
+    Only times up to the end of the archive are covered by it.
+    """
+    assert EventArchive.covers("device_logs", utc(2025, 3, 1))
+    assert EventArchive.covers("device_logs", datetime(2025, 2, 10))
+    assert not EventArchive.covers("device_logs", utc(2025, 3, 1, 0, 0, 1))
+    assert not EventArchive.covers("alerts", utc(2025, 1, 1))
+
+
+@pytest.mark.parametrize(
+    "since, until, expected",
+    [
+        (utc(2025, 2, 1), utc(2025, 4, 1), True),
+        (None, utc(2025, 4, 1), True),
+        (utc(2025, 2, 1), None, True),
+        (None, None, True),
+        (utc(2025, 3, 1), utc(2025, 4, 1), False),
+        (utc(2025, 1, 1), utc(2025, 3, 1), False),
+    ],
+)
+@pytest.mark.usefixtures("archived_logs")
+def test_straddles(since, until, expected):
+    """
+    A range straddles the archive if it starts in it and ends after it.
+    """
+    assert EventArchive.straddles("device_logs", since, until) is expected
+    assert not EventArchive.straddles("alerts", since, until)
+
+
+@pytest.mark.usefixtures("archived_logs")
+def test_rows_are_read_newest_first_within_the_range():
+    """
+    Archived rows in the range are read newest first, across files.
+    """
+    rows = list(EventArchive.rows("device_logs", utc(2025, 1, 30), utc(2025, 2, 2, 12)))
+
+    assert [row[0] for row in rows] == [201, 131, 130]
+    assert rows[0][2] == utc(2025, 2, 1, 12)
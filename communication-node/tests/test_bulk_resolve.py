@@ -0,0 +1,98 @@
+"""
+Tests of the bulk resolve request parsing and job bookkeeping.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils import bulk_resolve
+from utils.bulk_resolve import (
+    MAX_RESOLVE_IDS,
+    ResolveFilter,
+    ResolveJob,
+    parse_resolve_filter,
+    run_resolve_job,
+)
+
+
+def test_parse_ids():
+    """
+    A body with IDs selects those rows only.
+    """
+    selection = parse_resolve_filter({"ids": [3, 1, 2]})
+
+    assert selection.ids == [3, 1, 2]
+    assert selection.business_id is None
+
+
+def test_parse_filters():
+    """
+    Filters are validated, types split and `before` converted to UTC.
+    """
+    selection = parse_resolve_filter(
+        {
+            "business_id": 4,
+            "device_id": 7,
+            "type": "fire_alert,,motion_alert",
+            "before": "2025-03-01T12:00:00+02:00",
+        }
+    )
+
+    assert (selection.business_id, selection.device_id) == (4, 7)
+    assert selection.types == ["fire_alert", "motion_alert"]
+    assert selection.before == datetime(2025, 3, 1, 10, tzinfo=timezone.utc)
+
+
+def test_parse_before_without_offset_is_utc():
+    """
+    A `before` without an offset is taken as UTC.
+    """
+    selection = parse_resolve_filter({"before": "2025-03-01T12:00:00"})
+
+    assert selection.before.utcoffset() == timedelta(0)
+    assert selection.before == datetime(2025, 3, 1, 12, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        None,
+        [],
+        {},
+        {"type": ""},
+        {"ids": []},
+        {"ids": [1, "2"]},
+        {"ids": [True]},
+        {"ids": list(range(MAX_RESOLVE_IDS + 1))},
+        {"business_id": "4"},
+        {"device_id": False},
+        {"type": [1]},
+        {"before": "yesterday"},
+        {"before": 1740830400},
+    ],
+)
+def test_parse_rejects_invalid_bodies(data):
+    """
+    Bodies that are not objects, empty or mistyped are rejected.
+    """
+    with pytest.raises(ValueError):
+        parse_resolve_filter(data)
+
+
+def test_unexpected_errors_fail_the_job(monkeypatch):
+    """
+    Errors other than database errors still finish the job as failed.
+    """
+
+    def fail(*_args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(bulk_resolve, "count_unresolved", fail)
+    job = ResolveJob("alerts", ResolveFilter(business_id=1))
+
+    run_resolve_job(job)
+
+    assert job.run.status == "failed"
+    assert job.run.error is not None
+    assert job.run.finished_at is not None
@@ -0,0 +1,141 @@
+"""
+Tests of the response cache decorator on the streamed listings.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+from flask import Flask
+
+from decorators import validate_auth
+from routes.dashboard import dashboard_bp
+from utils.change_tracker import ChangeTracker
+from utils.db import DatabaseManager
+from utils.event_types import FIRE_ALERT, SEEDED_EVENT_TYPES, EventTypes
+from utils.single_flight import Flight
+
+# Identical requests sent at once
+REQUESTS = 5
+
+ALERT_ROW = (
+    1,
+    7,
+    FIRE_ALERT,
+    datetime(2025, 3, 1, 12, tzinfo=timezone.utc),
+    None,
+    False,
+    "hall",
+    "shop",
+    3,
+)
+
+
+class FakeCursor:
+    """
+    Server-side cursor of the alerts listing, held open until released.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.itersize = 1000
+        self.rows = None
+
+    def execute(self, *_):
+        """
+        Counts the query and waits until the test lets it finish.
+        """
+        self.database.queries += 1
+        self.database.release.wait(5)
+        self.rows = [ALERT_ROW]
+
+    def fetchmany(self, _):
+        """
+        Returns the rows once.
+        """
+        rows, self.rows = self.rows or [], []
+        return rows
+
+
+class FakeDatabase:
+    """
+    Stands in for the connection pool, counting the queries run.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.release = threading.Event()
+
+    def cursor(self, name=None):
+        """
+        Opens a cursor, always a server-side one for the streamed listing.
+        """
+        assert name is not None
+        return FakeCursor(self)
+
+    def finish(self):
+        """
+        Lets the queries finish.
+        """
+        self.release.set()
+
+
+@pytest.fixture(name="database")
+def fixture_database(monkeypatch):
+    """
+    Replaces the pool and the API key check.
+    """
+    database = FakeDatabase()
+    monkeypatch.setattr(DatabaseManager, "get_connection", lambda: database)
+    monkeypatch.setattr(DatabaseManager, "release_connection", lambda _: None)
+    monkeypatch.setattr(validate_auth, "check_api_key", lambda *_: True)
+    EventTypes.load(SEEDED_EVENT_TYPES)
+    # Starts from an empty cache
+    ChangeTracker.bump("alerts")
+    return database
+
+
+def test_concurrent_alert_listings_run_the_query_once(database, monkeypatch):
+    """
+    Identical unpaginated /api/alerts requests arriving while the first one
+    streams share its body instead of querying again.
+    """
+    app = Flask(__name__)
+    app.register_blueprint(dashboard_bp)
+
+    waiting = []
+    wait = Flight.wait
+
+    def counting_wait(flight, *args):
+        waiting.append(flight)
+        return wait(flight, *args)
+
+    monkeypatch.setattr(Flight, "wait", counting_wait)
+
+    bodies = []
+
+    def fetch():
+        response = app.test_client().get(
+            "/api/alerts", headers={"Authorization": "Bearer key"}
+        )
+        bodies.append((response.status_code, response.get_data()))
+
+    threads = [threading.Thread(target=fetch) for _ in range(REQUESTS)]
+    threads[0].start()
+    while database.queries == 0:
+        time.sleep(0.01)
+    for thread in threads[1:]:
+        thread.start()
+    while len(waiting) < REQUESTS - 1:
+        time.sleep(0.01)
+
+    database.finish()
+    for thread in threads:
+        thread.join(5)
+
+    assert database.queries == 1
+    assert len(bodies) == REQUESTS
+    assert len(set(bodies)) == 1
+    assert bodies[0][0] == 200
+    assert b'"count":1' in bodies[0][1]
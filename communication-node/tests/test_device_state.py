@@ -0,0 +1,167 @@
+"""
+Tests of the live device state registry and its change deltas.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.device_state import DeviceStates, parse_snapshot
+from utils.event_types import (
+    FIRE_ALERT,
+    GAS_SENSOR_MALFUNCTION,
+    SEEDED_EVENT_TYPES,
+    EventTypes,
+)
+from utils.incidents import SENSOR_HEALTHY, SENSOR_MALFUNCTION
+
+NOW = datetime(2025, 3, 1, 12, tzinfo=timezone.utc)
+
+# Snapshot of the load: transactions below 100 and 102 are included
+SNAPSHOT = "100:103:101"
+
+
+def row(device_id: int, business_id: int = 1, alerts: dict = None) -> tuple:
+    """
+    Builds a row of `DEVICE_STATES_QUERY` for a device using every sensor.
+    """
+    return (device_id, business_id, True, True, True, True, NOW, alerts, None, SNAPSHOT)
+
+
+class FakeCursor:
+    """
+    Cursor returning the given rows, running a hook while the query runs.
+    """
+
+    def __init__(self, rows: list, during=None):
+        self.rows = rows
+        self.during = during
+
+    def execute(self, *_):
+        """
+        Runs the hook, as if another thread changed a device meanwhile.
+        """
+        if self.during is not None:
+            self.during()
+
+    def fetchall(self) -> list:
+        """
+        Returns the rows.
+        """
+        return self.rows
+
+
+def alert(device_id: int, opened: int = 1, time: datetime = NOW) -> dict:
+    """
+    Builds the detail of a fire alert.
+    """
+    return {"device_id": device_id, "type": FIRE_ALERT, "time": time, "opened": opened}
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    """
+    Starts every test with a registry loaded with two devices.
+    """
+    EventTypes.load(SEEDED_EVENT_TYPES)
+    DeviceStates.reset()
+    DeviceStates.refresh(FakeCursor([row(2, alerts={str(FIRE_ALERT): 1}), row(1)]))
+    yield
+    DeviceStates.reset()
+
+
+def test_parse_snapshot():
+    """
+    Snapshots are split into xmin, xmax and the running transactions.
+    """
+    assert parse_snapshot("100:103:101") == (100, 103, frozenset({101}))
+    assert parse_snapshot("7:7:") == (7, 7, frozenset())
+
+
+def test_load_keeps_id_order():
+    """
+    Devices are listed by ID, whatever order the rows came in.
+    """
+    assert [state["id"] for state in DeviceStates.states()] == [1, 2]
+    assert DeviceStates.states(business_id=2) == []
+
+
+def test_changes_included_in_the_load_are_skipped():
+    """
+    Only the transactions the load snapshot did not see are applied.
+    """
+    DeviceStates.record_event(99, "alerts", alert(1))
+    DeviceStates.record_event(102, "alerts", alert(1))
+    assert DeviceStates.states()[0]["open_alerts"] == []
+
+    DeviceStates.record_event(101, "alerts", alert(1))
+    DeviceStates.record_event(103, "alerts", alert(1, time=NOW + timedelta(1)))
+    state = DeviceStates.states()[0]
+    assert state["open_alerts"] == ["fire_alert"]
+    assert state["last_seen"] == NOW + timedelta(1)
+
+
+def test_resolve_counts_down_per_type():
+    """
+    A type stays open until all its events are resolved.
+    """
+    DeviceStates.record_event(200, "alerts", alert(2))
+    DeviceStates.resolve(201, "alerts", [(2, FIRE_ALERT)])
+    assert DeviceStates.states()[1]["open_alerts"] == ["fire_alert"]
+
+    DeviceStates.resolve(202, "alerts", [(2, FIRE_ALERT)])
+    assert DeviceStates.states()[1]["open_alerts"] == []
+
+
+def test_malfunction_marks_the_sensor():
+    """
+    An open sensor malfunction shows on the sensor status.
+    """
+    DeviceStates.record_event(
+        200,
+        "malfunctions",
+        {"device_id": 1, "type": GAS_SENSOR_MALFUNCTION, "time": NOW, "opened": 1},
+    )
+    assert DeviceStates.states()[0]["gas_sensor"] == SENSOR_MALFUNCTION
+    assert DeviceStates.states()[1]["gas_sensor"] == SENSOR_HEALTHY
+
+
+def test_devices_added_and_removed():
+    """
+    New devices are kept in ID order, deleted devices never come back.
+    """
+    DeviceStates.add_device(200, 4, 3, {"motion_sensor": True})
+    DeviceStates.add_device(201, 3, 3, {"gas_sensor": True})
+    assert [state["id"] for state in DeviceStates.states()] == [1, 2, 3, 4]
+
+    DeviceStates.remove_devices(None, 3)
+    DeviceStates.add_device(202, 3, 3, {"fire_sensor": True})
+    assert [state["id"] for state in DeviceStates.states()] == [1, 2, 4]
+
+
+def test_changes_during_a_load_wait_for_it():
+    """
+    Changes arriving while the registry loads are applied once it is loaded,
+    unless the load included them.
+    """
+
+    def during():
+        DeviceStates.record_event(99, "alerts", alert(1))
+        DeviceStates.record_event(150, "alerts", alert(1))
+
+    DeviceStates.reset()
+    DeviceStates.refresh(FakeCursor([row(1)], during))
+
+    assert DeviceStates.loaded()
+    assert DeviceStates.states()[0]["open_alerts"] == ["fire_alert"]
+
+
+def test_deleted_events_reload_known_devices():
+    """
+    Deleted events of a known device schedule a full reload.
+    """
+    DeviceStates.delete_events(7)
+    assert DeviceStates.loaded()
+
+    DeviceStates.delete_events(7, 2)
+    assert not DeviceStates.loaded()
@@ -0,0 +1,95 @@
+"""
+Tests of the event type lookups and registration.
+"""
+
+import pytest
+
+from utils import event_types
+from utils.event_types import (
+    FIRE_ALERT,
+    MAX_EVENT_TYPES,
+    SEEDED_EVENT_TYPES,
+    EventTypes,
+    event_type_code,
+    event_type_codes,
+)
+
+
+class FakeCursor:
+    """
+    Cursor answering the registration query with a fixed row.
+    """
+
+    def __init__(self, row):
+        self.row = row
+        self.params = []
+
+    def execute(self, _, params):
+        """
+        Records the query parameters.
+        """
+        self.params.append(params)
+
+    def fetchone(self):
+        """
+        Returns the row.
+        """
+        return self.row
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    """
+    Starts every test with the seeded types cached and no recent miss.
+    """
+    EventTypes.load(SEEDED_EVENT_TYPES)
+    monkeypatch.setattr(EventTypes, "_missed_at", None)
+
+
+def test_cached_type_reads_nothing():
+    """
+    Known types are translated without a query.
+    """
+    cur = FakeCursor(None)
+
+    assert event_type_code(cur, "alert", "fire_alert") == FIRE_ALERT
+    assert not cur.params
+
+
+def test_existing_type_is_cached():
+    """
+    A type committed by another process is cached once looked up.
+    """
+    cur = FakeCursor((120, True))
+
+    assert event_type_code(cur, "alert", "smoke_alert") == 120
+    assert cur.params[0]["limit"] == MAX_EVENT_TYPES
+    assert EventTypes.code("alert", "smoke_alert") == 120
+
+
+def test_registered_type_is_not_cached_before_commit():
+    """
+    A type registered by the transaction of the cursor may still roll back.
+    """
+    assert event_type_code(FakeCursor((121, False)), "alert", "flood_alert") == 121
+    assert EventTypes.code("alert", "flood_alert") is None
+
+
+def test_type_over_the_limit_is_rejected():
+    """
+    New types are refused once the event has `MAX_EVENT_TYPES` types.
+    """
+    assert event_type_code(FakeCursor(None), "log", "made_up") is None
+
+
+def test_unknown_filter_names_reload_once(monkeypatch):
+    """
+    Unknown filter names reload the cache once per interval, not per request.
+    """
+    reloads = []
+    monkeypatch.setattr(event_types, "reload_event_types", lambda: reloads.append(1))
+
+    for _ in range(3):
+        assert event_type_codes("alert", ["fire_alert", "nope"]) == [FIRE_ALERT]
+
+    assert len(reloads) == 1
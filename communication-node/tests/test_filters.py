@@ -0,0 +1,55 @@
+"""
+Tests of the listing filter helpers.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.filters import parse_row_filter, parse_time_arg
+
+COLUMNS = ("id", "device_id", "business_id", "alert_type", "alert_time", "resolved")
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("2025-03-01T12:00:00", datetime(2025, 3, 1, 12, tzinfo=timezone.utc)),
+        ("2025-03-01T12:00:00+00:00", datetime(2025, 3, 1, 12, tzinfo=timezone.utc)),
+        (
+            "2025-03-01T14:00:00+02:00",
+            datetime(2025, 3, 1, 14, tzinfo=timezone(timedelta(hours=2))),
+        ),
+    ],
+)
+def test_parse_time_arg_is_always_aware(value, expected):
+    """
+    Timestamps without an offset are read as UTC, the others keep theirs.
+    """
+    time = parse_time_arg({"since": value}, "since")
+
+    assert time == expected
+    assert time.tzinfo is not None
+
+
+def test_parse_time_arg_rejects_garbage():
+    """
+    Values that are not ISO 8601 timestamps are rejected.
+    """
+    assert parse_time_arg({}, "since") is None
+    with pytest.raises(ValueError):
+        parse_time_arg({"since": "yesterday"}, "since")
+
+
+def test_naive_range_compares_with_archived_rows():
+    """
+    A naive range can be compared with the aware times of archived rows.
+    """
+    _, since, until = parse_row_filter(
+        {"since": "2025-03-01T00:00:00", "until": "2025-03-02"},
+        COLUMNS,
+        "alert_type",
+        resolvable=True,
+    )
+
+    assert since <= datetime(2025, 3, 1, 12, tzinfo=timezone.utc) < until
@@ -0,0 +1,83 @@
+"""
+Tests of the map viewport helpers.
+"""
+
+import pytest
+
+from utils.geo import MAX_ZOOM, bbox_condition, parse_bbox, parse_zoom
+
+
+def test_parse_bbox():
+    """
+    Bounding boxes are read as west, south, east, north.
+    """
+    assert parse_bbox({"bbox": "20.5,45,22,46.25"}) == (20.5, 45.0, 22.0, 46.25)
+
+
+def test_parse_bbox_keeps_antimeridian_boxes():
+    """
+    Boxes crossing the antimeridian keep a west edge past their east edge.
+    """
+    assert parse_bbox({"bbox": "170,-10,-170,10"}) == (170.0, -10.0, -170.0, 10.0)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None,
+        "",
+        "1,2,3",
+        "1,2,3,4,5",
+        "a,2,3,4",
+        "-181,0,10,10",
+        "0,0,181,10",
+        "0,-91,10,10",
+        "0,10,10,0",
+    ],
+)
+def test_parse_bbox_rejects_invalid_boxes(value):
+    """
+    Missing, malformed and out of range boxes are rejected.
+    """
+    args = {} if value is None else {"bbox": value}
+
+    with pytest.raises(ValueError):
+        parse_bbox(args)
+
+
+def test_parse_zoom():
+    """
+    Zoom levels are integers, defaulting when absent.
+    """
+    assert parse_zoom({"zoom": "12"}) == 12
+    assert parse_zoom({}, default=3) == 3
+
+
+@pytest.mark.parametrize("args", [{}, {"zoom": "1.5"}, {"zoom": str(MAX_ZOOM + 1)}])
+def test_parse_zoom_rejects_invalid_levels(args):
+    """
+    Missing, fractional and too deep zoom levels are rejected.
+    """
+    with pytest.raises(ValueError):
+        parse_zoom(args)
+
+
+def test_bbox_condition():
+    """
+    A box is a single range condition.
+    """
+    condition, params = bbox_condition((20.0, 45.0, 22.0, 46.0))
+
+    assert params == [20.0, 45.0, 22.0, 46.0]
+    assert "OR" not in repr(condition)
+
+
+def test_bbox_condition_splits_antimeridian_boxes():
+    """
+    A box crossing the antimeridian is split in two.
+    """
+    condition, params = bbox_condition((170.0, -10.0, -170.0, 10.0))
+
+    # One box up to the antimeridian, one box past it
+    assert params == [170.0, -10.0, 180.0, 10.0, -180.0, -10.0, -170.0, 10.0]
+    assert "OR" in repr(condition)
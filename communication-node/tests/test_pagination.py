@@ -0,0 +1,190 @@
+"""
+Tests of the keyset pagination helpers.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.pagination import (
+    MAX_PAGE_LIMIT,
+    PageRequest,
+    decode_cursor,
+    encode_cursor,
+    merge_rows,
+    page_rows,
+    parse_page_args,
+    select_page_rows,
+)
+
+START = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+# Rows of (id, time), newest first, two rows sharing each time
+ROWS = [(i, START - timedelta(minutes=(20 - i) // 2)) for i in range(20, 0, -1)]
+
+
+def key(row):
+    """
+    Returns the `(time, id)` position of a row.
+    """
+    return row[1], row[0]
+
+
+def test_cursor_round_trip():
+    """
+    Cursors decode to the position they encode, without padding.
+    """
+    cursor = encode_cursor(START, 42)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (START, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", encode_cursor(START, 1)[:-3]])
+def test_decode_cursor_rejects_malformed_cursors(cursor):
+    """
+    Empty, garbled and truncated cursors are rejected.
+    """
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_parse_page_args_without_pagination():
+    """
+    Requests without pagination parameters are not paginated.
+    """
+    assert parse_page_args({}) is None
+
+
+def test_parse_page_args_defaults_the_limit():
+    """
+    A cursor without a limit pages with the largest limit.
+    """
+    page = parse_page_args({"after": encode_cursor(START, 7)})
+
+    assert page.limit == MAX_PAGE_LIMIT
+    assert page.after == (START, 7)
+    assert page.before is None
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        {"limit": "x"},
+        {"limit": "0"},
+        {"limit": str(MAX_PAGE_LIMIT + 1)},
+        {"before": encode_cursor(START, 1), "after": encode_cursor(START, 2)},
+    ],
+)
+def test_parse_page_args_rejects_invalid_arguments(args):
+    """
+    Invalid limits and conflicting cursors are rejected.
+    """
+    with pytest.raises(ValueError):
+        parse_page_args(args)
+
+
+def test_pages_cover_every_row_in_both_directions():
+    """
+    Walking the pages either way returns every row once, in order.
+    """
+    forward = []
+    page = PageRequest(3)
+    while True:
+        rows, next_cursor, _ = page_rows(select_page_rows(ROWS, page, 1, 0), page, 1, 0)
+        forward.extend(rows)
+        if next_cursor is None:
+            break
+        page = PageRequest(3, before=decode_cursor(next_cursor))
+
+    assert forward == ROWS
+
+    backward = []
+    page = PageRequest(3, after=key(ROWS[-1]))
+    while True:
+        rows, _, prev_cursor = page_rows(select_page_rows(ROWS, page, 1, 0), page, 1, 0)
+        backward = rows + backward
+        if prev_cursor is None:
+            break
+        page = PageRequest(3, after=decode_cursor(prev_cursor))
+
+    assert backward == ROWS[:-1]
+
+
+def test_first_page_has_no_previous_cursor():
+    """
+    The first page only links to older rows.
+    """
+    page = PageRequest(5)
+    rows, next_cursor, prev_cursor = page_rows(
+        select_page_rows(ROWS, page, 1, 0), page, 1, 0
+    )
+
+    assert rows == ROWS[:5]
+    assert decode_cursor(next_cursor) == key(ROWS[4])
+    assert prev_cursor is None
+
+
+def test_after_selects_the_rows_closest_to_the_cursor():
+    """
+    Paging towards newer rows starts right after the cursor.
+    """
+    page = PageRequest(2, after=key(ROWS[10]))
+    selected = select_page_rows(ROWS, page, 1, 0)
+
+    # Oldest first, one extra row telling that newer rows exist
+    assert selected == [ROWS[9], ROWS[8], ROWS[7]]
+
+    rows, next_cursor, prev_cursor = page_rows(selected, page, 1, 0)
+    assert rows == [ROWS[8], ROWS[9]]
+    assert decode_cursor(next_cursor) == key(ROWS[9])
+    assert decode_cursor(prev_cursor) == key(ROWS[8])
+
+
+def test_before_skips_the_rows_up_to_the_cursor():
+    """
+    Paging towards older rows starts right before the cursor.
+    """
+    page = PageRequest(4, before=key(ROWS[15]))
+
+    assert select_page_rows(ROWS, page, 1, 0) == ROWS[16:]
+
+
+def test_merged_pages_match_the_unsplit_rows():
+    """
+    Pages merged from two row sources match the pages of the whole rows.
+    """
+    # Rows split at a time boundary, like the hot window and the archive
+    hot, archived = ROWS[:7], ROWS[7:]
+
+    forward = []
+    page = PageRequest(4)
+    while True:
+        selected = list(
+            merge_rows(
+                select_page_rows(hot, page, 1, 0),
+                select_page_rows(archived, page, 1, 0),
+                1,
+                0,
+                newest_first=page.after is None,
+            )
+        )[: page.limit + 1]
+        rows, next_cursor, _ = page_rows(selected, page, 1, 0)
+        forward.extend(rows)
+        if next_cursor is None:
+            break
+        page = PageRequest(4, before=decode_cursor(next_cursor))
+
+    assert forward == ROWS
+
+
+def test_merge_rows_interleaves_by_time_and_id():
+    """
+    Merged rows are ordered on `(time, id)`, in either direction.
+    """
+    odd, even = ROWS[::2], ROWS[1::2]
+
+    assert list(merge_rows(even, odd, 1, 0)) == ROWS
+    assert (
+        list(merge_rows(odd[::-1], even[::-1], 1, 0, newest_first=False)) == ROWS[::-1]
+    )
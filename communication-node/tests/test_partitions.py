@@ -0,0 +1,54 @@
+"""
+Tests of the monthly partition helpers.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from utils.partitions import add_months, current_month, partition_name
+
+
+def month(year, number):
+    """
+    Returns the first instant of a month in UTC.
+    """
+    return datetime(year, number, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "start, months, expected",
+    [
+        (month(2025, 3), 0, month(2025, 3)),
+        (month(2025, 3), 1, month(2025, 4)),
+        (month(2025, 11), 2, month(2026, 1)),
+        (month(2025, 12), 1, month(2026, 1)),
+        (month(2025, 1), -1, month(2024, 12)),
+        (month(2025, 3), -15, month(2023, 12)),
+        (month(2025, 3), 24, month(2027, 3)),
+    ],
+)
+def test_add_months(start, months, expected):
+    """
+    Months are added across year boundaries, both ways.
+    """
+    assert add_months(start, months) == expected
+
+
+def test_current_month_is_the_first_utc_instant():
+    """
+    The current month starts at midnight UTC on its first day.
+    """
+    first = current_month()
+
+    assert first.tzinfo == timezone.utc
+    assert (first.day, first.hour, first.minute, first.second) == (1, 0, 0, 0)
+    assert first <= datetime.now(timezone.utc) < add_months(first, 1)
+
+
+def test_partition_name():
+    """
+    Partitions are named after their table, year and month.
+    """
+    assert partition_name("alerts", month(2025, 3)) == "alerts_2025_03"
+    assert partition_name("device_logs", month(2026, 11)) == "device_logs_2026_11"
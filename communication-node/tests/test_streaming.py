@@ -0,0 +1,134 @@
+"""
+Tests of the cap on concurrently streamed listings.
+"""
+
+import pytest
+from flask import Flask
+
+from decorators import validate_auth
+from routes.dashboard import dashboard_bp
+from utils.db import DatabaseManager
+from utils.event_types import SEEDED_EVENT_TYPES, EventTypes
+from utils.streaming import DEFAULT_MAX_STREAMS, StreamSlots
+
+
+class FakeCursor:
+    """
+    Server-side cursor of a listing without rows.
+    """
+
+    itersize = 1000
+
+    def execute(self, *_):
+        """
+        Runs nothing.
+        """
+
+    def fetchmany(self, _):
+        """
+        Returns no rows.
+        """
+        return []
+
+
+class FakeConnection:
+    """
+    Stands in for a pooled connection, counting the borrowed ones.
+    """
+
+    borrowed = 0
+
+    def cursor(self, name=None):
+        """
+        Opens a server-side cursor.
+        """
+        assert name is not None
+        return FakeCursor()
+
+    @classmethod
+    def borrow(cls):
+        """
+        Borrows a connection from the pool.
+        """
+        cls.borrowed += 1
+        return cls()
+
+    @classmethod
+    def give_back(cls, _):
+        """
+        Returns a connection to the pool.
+        """
+        cls.borrowed -= 1
+
+
+@pytest.fixture(autouse=True)
+def slots(monkeypatch):
+    """
+    Starts every test with every slot free and the default cap.
+    """
+    monkeypatch.setattr(StreamSlots, "_active", 0)
+    monkeypatch.delenv("DB_MAX_STREAMS", raising=False)
+
+
+@pytest.fixture(name="client")
+def fixture_client(monkeypatch):
+    """
+    Serves the dashboard routes over the fake pool.
+    """
+    monkeypatch.setattr(FakeConnection, "borrowed", 0)
+    monkeypatch.setattr(DatabaseManager, "get_connection", FakeConnection.borrow)
+    monkeypatch.setattr(DatabaseManager, "release_connection", FakeConnection.give_back)
+    monkeypatch.setattr(validate_auth, "check_api_key", lambda *_: True)
+    EventTypes.load(SEEDED_EVENT_TYPES)
+
+    app = Flask(__name__)
+    app.register_blueprint(dashboard_bp)
+    return app.test_client()
+
+
+def open_stream(client, device_id: int):
+    """
+    Starts streaming the device logs of a device without reading them.
+    """
+    return client.get(
+        f"/api/devices_logs?device_id={device_id}",
+        headers={"Authorization": "Bearer key"},
+        buffered=False,
+    )
+
+
+def test_streams_beyond_the_cap_are_refused(client):
+    """
+    Once every slot holds an unread stream, listings are answered with 503
+    without keeping a connection, until a stream is closed.
+    """
+    streams = [open_stream(client, i) for i in range(DEFAULT_MAX_STREAMS)]
+    assert all(stream.status_code == 200 for stream in streams)
+
+    refused = open_stream(client, DEFAULT_MAX_STREAMS)
+    assert refused.status_code == 503
+    assert refused.headers["Retry-After"] == "1"
+    assert FakeConnection.borrowed == DEFAULT_MAX_STREAMS
+
+    streams.pop().close()
+    accepted = open_stream(client, DEFAULT_MAX_STREAMS)
+    assert accepted.status_code == 200
+    assert accepted.get_data() == b'{"status":"success","data":[],"count":0}'
+
+    accepted.close()
+    for stream in streams:
+        stream.close()
+    assert FakeConnection.borrowed == 0
+
+
+def test_slot_count_follows_the_environment(monkeypatch):
+    """
+    The cap is read from `DB_MAX_STREAMS`.
+    """
+    monkeypatch.setenv("DB_MAX_STREAMS", "1")
+
+    assert StreamSlots.acquire()
+    assert not StreamSlots.acquire()
+    StreamSlots.release()
+    assert StreamSlots.acquire()
+    StreamSlots.release()
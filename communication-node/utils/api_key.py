@@ -4,7 +4,9 @@ Handles validation and tracking of API key usage.
 """
 
 from datetime import datetime
+import psycopg
 import psycopg2
+from utils.async_db import AsyncDatabaseManager
 from utils.db import DatabaseManager
 from utils.logger_config import get_logger
 
@@ -72,3 +74,46 @@ def check_api_key(key: str, required_access_level: int = None) -> bool:
         return False
     finally:
         DatabaseManager.release_connection(connection)
+
+
+async def check_api_key_async(key: str, required_access_level: int = None) -> bool:
+    """
+    Asynchronous counterpart of `check_api_key` used by the ASGI entry point.
+    Validation and the last_used_at update are folded into a single statement.
+
+    Args:
+        key (str): The API key to check
+        required_access_level (int, optional): If provided, checks if the key has
+                                              this access level or better (lower number)
+
+    Returns:
+        bool: True if the API key is valid and has sufficient access, False otherwise
+    """
+    if not key:
+        logger.warning("Empty API key provided")
+        return False
+
+    try:
+        async with AsyncDatabaseManager.connection() as connection:
+            cur = await connection.execute(
+                """
+                UPDATE api_keys SET last_used_at = NOW()
+                WHERE api_key = %s AND (%s::int IS NULL OR access_level <= %s)
+                RETURNING id
+                """,
+                (key, required_access_level, required_access_level),
+            )
+            valid = await cur.fetchone() is not None
+
+        if valid:
+            logger.info("API key validated successfully: %s...", key[:8])
+        else:
+            logger.warning(
+                "Invalid API key or insufficient access level: %s...", key[:8]
+            )
+
+        return valid
+    except psycopg.Error as e:
+        logger.error("Database error validating API key: %s", e)
+
+        return False
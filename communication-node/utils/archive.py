@@ -0,0 +1,307 @@
+"""
+Event archive utilities.
+Moves closed months of events out of the hot tables into gzip-compressed JSONL
+files on local disk and reads them back for listings of older time ranges.
+
+Each archived partition becomes one file holding its listing rows, newest
+first, one JSON array per line. The column names are stored once, in the
+manifest (`manifest.json`), next to the month, row count and time range of
+every file. Rows are archived together with the device and business names of
+the listing, so they stay readable after their device is deleted. Event types
+are archived as their codes, which are never reused. Rows of devices deleted
+but not purged yet are left out.
+
+Months are archived oldest first and only while they are contiguous, so every
+event before `archived_until` lives in the archive, except for the rows of the
+default partition.
+"""
+
+import gzip
+import os
+from datetime import datetime, timezone
+from threading import Lock
+
+import orjson
+from psycopg2 import sql
+
+from utils.logger_config import get_logger
+from utils.partitions import PARTITIONED_TABLES, add_months
+
+# Configure logging
+logger = get_logger("archive")
+
+# Directory of the archive files and their manifest
+ARCHIVE_DIR = os.getenv(
+    "EVENT_ARCHIVE_DIR",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "archive"
+    ),
+)
+
+MANIFEST_FILE = "manifest.json"
+
+# Number of rows fetched from the server per round trip while exporting
+EXPORT_ITERSIZE = 5000
+
+# Archived columns of each event table, in the SELECT order of its listing,
+# followed by the device name, business name and business ID
+ARCHIVED_COLUMNS = {
+    "alerts": ("id", "device_id", "alert_type", "alert_time", "message", "resolved"),
+    "malfunctions": (
+        "id",
+        "device_id",
+        "malfunction_type",
+        "malfunction_time",
+        "message",
+        "resolved",
+    ),
+    "device_logs": ("id", "device_id", "log_time", "log_type", "message"),
+}
+
+LISTING_COLUMNS = ("device_name", "business_name", "business_id")
+
+
+def archive_columns(table: str) -> tuple:
+    """
+    Returns the column names of the archived rows of an event table.
+    """
+    return ARCHIVED_COLUMNS[table] + LISTING_COLUMNS
+
+
+def as_utc(value: datetime) -> datetime:
+    """
+    Makes a timestamp timezone aware, naive timestamps being UTC.
+    """
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def month_key(month: datetime) -> str:
+    """
+    Returns the manifest key of a month, e.g. `2025-08`.
+    """
+    return f"{month.year:04d}-{month.month:02d}"
+
+
+class EventArchive:
+    """
+    Process-wide view of the archive manifest.
+
+    The manifest is cached and reloaded when the archive job rewrites it, so
+    routing a listing to the archive costs a `stat` call.
+    """
+
+    _manifest = {"files": []}
+    _mtime = None
+    _lock = Lock()
+
+    @classmethod
+    def manifest(cls) -> dict:
+        """
+        Returns the current manifest, reloading it if the file changed.
+
+        Returns:
+            dict: The manifest, with no files if the archive is empty
+        """
+        path = os.path.join(ARCHIVE_DIR, MANIFEST_FILE)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {"files": []}
+
+        with cls._lock:
+            if mtime != cls._mtime:
+                with open(path, "rb") as manifest_file:
+                    cls._manifest = orjson.loads(manifest_file.read())
+                cls._mtime = mtime
+                logger.info("Loaded the archive manifest")
+            return cls._manifest
+
+    @classmethod
+    def files(cls, table: str) -> list:
+        """
+        Returns the manifest entries of the archived months of a table, newest first.
+        """
+        entries = [e for e in cls.manifest()["files"] if e["table"] == table]
+        return sorted(entries, key=lambda entry: entry["month"], reverse=True)
+
+    @classmethod
+    def archived_until(cls, table: str):
+        """
+        Returns the end of the archived time range of a table.
+
+        Returns:
+            datetime: The first instant after the newest archived month,
+                      or None if nothing was archived
+        """
+        entries = cls.files(table)
+        if not entries:
+            return None
+
+        year, month = map(int, entries[0]["month"].split("-"))
+        return add_months(datetime(year, month, 1, tzinfo=timezone.utc), 1)
+
+    @classmethod
+    def covers(cls, table: str, until: datetime) -> bool:
+        """
+        Tells whether a time range ending at `until` lies entirely in the archive.
+        """
+        archived_until = cls.archived_until(table)
+        return archived_until is not None and as_utc(until) <= archived_until
+
+    @classmethod
+    def straddles(cls, table: str, since: datetime, until: datetime) -> bool:
+        """
+        Tells whether a time range starts in the archive and ends after it, so
+        its rows are split between the archive and the event table.
+
+        Args:
+            table (str): The event table
+            since (datetime): The start of the range, None if unbounded
+            until (datetime): The end of the range, None if unbounded
+        """
+        archived_until = cls.archived_until(table)
+        return (
+            archived_until is not None
+            and (since is None or as_utc(since) < archived_until)
+            and (until is None or as_utc(until) > archived_until)
+        )
+
+    @classmethod
+    def rows(cls, table: str, since: datetime = None, until: datetime = None):
+        """
+        Reads the archived rows of a table within a time range, newest first.
+
+        Files whose time range does not overlap the requested one are skipped
+        without being opened. Rows are decoded one line at a time.
+
+        Args:
+            table (str): The event table
+            since (datetime, optional): Only rows at or after this time
+            until (datetime, optional): Only rows strictly before this time
+
+        Yields:
+            tuple: The archived rows, in `archive_columns` order
+        """
+        since = as_utc(since) if since is not None else None
+        until = as_utc(until) if until is not None else None
+        time_index = archive_columns(table).index(PARTITIONED_TABLES[table][0])
+
+        for entry in cls.files(table):
+            if not entry["rows"]:
+                continue
+            if until is not None and datetime.fromisoformat(entry["min_time"]) >= until:
+                continue
+            if since is not None and datetime.fromisoformat(entry["max_time"]) < since:
+                # Older files cannot hold later rows either
+                break
+
+            with gzip.open(os.path.join(ARCHIVE_DIR, entry["path"]), "rb") as lines:
+                for line in lines:
+                    row = orjson.loads(line)
+                    row[time_index] = datetime.fromisoformat(row[time_index])
+                    if until is not None and row[time_index] >= until:
+                        continue
+                    if since is not None and row[time_index] < since:
+                        break
+                    yield tuple(row)
+
+
+def write_manifest(manifest: dict):
+    """
+    Replaces the manifest atomically, readers never see a partial file.
+    """
+    path = os.path.join(ARCHIVE_DIR, MANIFEST_FILE)
+    with open(f"{path}.tmp", "wb") as manifest_file:
+        manifest_file.write(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
+        manifest_file.flush()
+        os.fsync(manifest_file.fileno())
+    os.replace(f"{path}.tmp", path)
+
+
+def archive_partition(connection, table: str, partition: str, month: datetime) -> dict:
+    """
+    Exports a monthly partition of an event table to the archive.
+
+    The partition is locked against writes for the rest of the transaction,
+    so no row can be added between the export and the drop of the caller.
+
+    Args:
+        connection: A connection borrowed from `DatabaseManager`, in a transaction
+        table (str): The partitioned table
+        partition (str): The name of the partition
+        month (datetime): The first instant of the UTC month of the partition
+
+    Returns:
+        dict: The manifest entry of the archived month
+    """
+    time_column = PARTITIONED_TABLES[table][0]
+    relative_path = os.path.join(table, f"{partition}.jsonl.gz")
+    path = os.path.join(ARCHIVE_DIR, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with connection.cursor() as cur:
+        cur.execute(
+            sql.SQL("LOCK TABLE {} IN SHARE MODE").format(sql.Identifier(partition))
+        )
+
+    cur = connection.cursor(name=f"archive_{partition}")
+    cur.itersize = EXPORT_ITERSIZE
+    cur.execute(
+        sql.SQL(
+            """
+            SELECT {columns}, sd.name, b.name, e.business_id
+            FROM {partition} e
+            JOIN security_devices sd ON e.device_id = sd.id
+            JOIN businesses b ON e.business_id = b.id
+            WHERE sd.deleted_at IS NULL
+            ORDER BY e.{time} DESC, e.id DESC
+            """
+        ).format(
+            columns=sql.SQL(", ").join(
+                sql.Identifier("e", column) for column in ARCHIVED_COLUMNS[table]
+            ),
+            partition=sql.Identifier(partition),
+            time=sql.Identifier(time_column),
+        )
+    )
+
+    time_index = archive_columns(table).index(time_column)
+    count = 0
+    min_time = max_time = None
+    try:
+        with gzip.open(f"{path}.tmp", "wb") as archive_file:
+            for row in cur:
+                archive_file.write(orjson.dumps(row) + b"\n")
+                if max_time is None:
+                    max_time = row[time_index]
+                min_time = row[time_index]
+                count += 1
+    finally:
+        cur.close()
+    os.replace(f"{path}.tmp", path)
+
+    logger.info("Archived %s rows of %s to %s", count, partition, relative_path)
+
+    return {
+        "table": table,
+        "month": month_key(month),
+        "path": relative_path,
+        "columns": list(archive_columns(table)),
+        "rows": count,
+        "min_time": min_time.isoformat() if min_time is not None else None,
+        "max_time": max_time.isoformat() if max_time is not None else None,
+        "archived_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def add_to_manifest(entry: dict):
+    """
+    Adds or replaces the manifest entry of an archived month.
+    """
+    manifest = EventArchive.manifest()
+    files = [
+        e
+        for e in manifest["files"]
+        if (e["table"], e["month"]) != (entry["table"], entry["month"])
+    ]
+    write_manifest({**manifest, "files": files + [entry]})
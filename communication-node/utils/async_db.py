@@ -0,0 +1,117 @@
+"""
+Asynchronous database connection utilities.
+Provides a psycopg 3 async connection pool mirroring `DatabaseManager`, for use by
+the ASGI entry point.
+"""
+
+import os
+from contextlib import asynccontextmanager
+import psycopg
+from dotenv import load_dotenv
+from psycopg_pool import AsyncConnectionPool
+
+from utils.db import (
+    DEFAULT_MIN_CONNECTIONS,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_CONNECTION_TIMEOUT,
+)
+from utils.logger_config import get_logger
+
+# Configure logging
+logger = get_logger("async_db_manager")
+
+
+class AsyncDatabaseManager:
+    """
+    Manages asynchronous database connections using psycopg's native async pool.
+    """
+
+    _connection_pool = None
+
+    @classmethod
+    async def initialize_pool(
+        cls, min_connections: int = None, max_connections: int = None
+    ):
+        """
+        Initialize and open the async connection pool.
+
+        Args:
+            min_connections (int): Minimum number of connections to maintain
+            max_connections (int): Maximum number of connections allowed
+        """
+        if cls._connection_pool is not None:
+            logger.info("Async connection pool already initialized")
+            return
+
+        load_dotenv()
+
+        # Use default values if not specified
+        min_conn = min_connections or int(
+            os.getenv("DB_MIN_CONNECTIONS", str(DEFAULT_MIN_CONNECTIONS))
+        )
+        max_conn = max_connections or int(
+            os.getenv("DB_MAX_CONNECTIONS", str(DEFAULT_MAX_CONNECTIONS))
+        )
+
+        db_config = {
+            "host": os.getenv("DATABASE_HOST"),
+            "dbname": os.getenv("DATABASE_NAME"),
+            "user": os.getenv("DATABASE_USER"),
+            "password": os.getenv("DATABASE_PASSWORD"),
+            "port": os.getenv("DATABASE_PORT", "5432"),
+            "connect_timeout": int(
+                os.getenv("DATABASE_TIMEOUT", str(DEFAULT_CONNECTION_TIMEOUT))
+            ),
+        }
+
+        # Log connection attempt (without sensitive information)
+        safe_config = db_config.copy()
+        if "password" in safe_config:
+            safe_config["password"] = "******"
+        logger.info("Initializing async connection pool with config: %s", safe_config)
+
+        try:
+            pool = AsyncConnectionPool(
+                kwargs=db_config,
+                min_size=min_conn,
+                max_size=max_conn,
+                timeout=db_config["connect_timeout"],
+                open=False,
+            )
+            await pool.open(wait=True)
+            cls._connection_pool = pool
+
+            logger.info(
+                "Async connection pool initialized with %s-%s connections",
+                min_conn,
+                max_conn,
+            )
+
+        except (psycopg.Error, TimeoutError) as err:
+            logger.error("Failed to initialize async connection pool: %s", err)
+            raise
+
+    @classmethod
+    @asynccontextmanager
+    async def connection(cls):
+        """
+        Borrow a connection from the pool for the duration of an `async with` block.
+        The transaction is committed on success and rolled back on error.
+
+        Yields:
+            AsyncConnection: A PostgreSQL database connection
+        """
+        if cls._connection_pool is None:
+            await cls.initialize_pool()
+
+        async with cls._connection_pool.connection() as connection:
+            logger.debug("Retrieved async connection from pool")
+            yield connection
+
+    @classmethod
+    async def close_all_connections(cls):
+        """Close all connections in the pool and shut down the pool."""
+        if cls._connection_pool is not None:
+            await cls._connection_pool.close()
+            cls._connection_pool = None
+            logger.info("All async connections closed and pool shut down")
@@ -0,0 +1,424 @@
+"""
+Bulk resolve utilities.
+Resolves large sets of alerts or malfunctions in small keyset-driven batches,
+each in its own short transaction, so mass resolution never holds row locks
+long enough to block ingestion.
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from threading import Lock, Thread
+
+import psycopg2
+from psycopg2 import sql
+
+from utils.change_tracker import ChangeTracker
+from utils.db import DatabaseManager
+from utils.device_state import DeviceStates
+from utils.event_types import event_type_codes
+from utils.jobs import JobRun
+from utils.logger_config import get_logger
+from utils.map_clusters import MapClusters
+from utils.partitions import PARTITIONED_TABLES
+from utils.websocket_client import SocketIOClient
+
+# Configure logging
+logger = get_logger("bulk_resolve")
+
+# Rows resolved per transaction
+BATCH_SIZE = 1000
+
+# Seconds to yield to other requests between two batches
+BATCH_PAUSE = 0.05
+
+# Upper bound for the number of IDs of one request
+MAX_RESOLVE_IDS = 50000
+
+# Number of finished jobs kept for progress queries
+MAX_FINISHED_JOBS = 100
+
+# `SocketIOClient` method broadcasting the rows resolved, per table
+RESOLVED_EMITTERS = {
+    "alerts": "emit_alerts_resolved",
+    "malfunctions": "emit_malfunctions_resolved",
+}
+
+
+@dataclass(slots=True)
+class ResolveFilter:
+    """
+    The validated selection of a bulk resolve request.
+    """
+
+    ids: list = None
+    business_id: int = None
+    device_id: int = None
+    types: list = None
+    before: datetime = None
+
+    def to_dict(self) -> dict:
+        """
+        Converts the filter to its JSON representation.
+        """
+        return {
+            "ids": len(self.ids) if self.ids is not None else None,
+            "business_id": self.business_id,
+            "device_id": self.device_id,
+            "type": self.types,
+            "before": self.before,
+        }
+
+
+def parse_resolve_filter(data: dict) -> ResolveFilter:
+    """
+    Parses the body of a bulk resolve request.
+
+    The body holds either `ids`, a list of event IDs, or at least one of the
+    filters `business_id`, `device_id`, `type` (a list or comma separated
+    string) and `before` (an ISO 8601 timestamp, exclusive, in UTC unless it
+    has an offset).
+
+    Args:
+        data (dict): The JSON body
+
+    Returns:
+        ResolveFilter: The selection
+
+    Raises:
+        ValueError: If the body is invalid
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object")
+
+    def optional_int(name):
+        value = data.get(name)
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f"'{name}' must be an integer")
+        return value
+
+    ids = data.get("ids")
+    if ids is not None:
+        if (
+            not isinstance(ids, list)
+            or not ids
+            or any(isinstance(i, bool) or not isinstance(i, int) for i in ids)
+        ):
+            raise ValueError("'ids' must be a non-empty list of integers")
+        if len(ids) > MAX_RESOLVE_IDS:
+            raise ValueError(f"'ids' must hold at most {MAX_RESOLVE_IDS} IDs")
+
+    types = data.get("type")
+    if isinstance(types, str):
+        types = [t for t in types.split(",") if t]
+    if types is not None and (
+        not isinstance(types, list) or not all(isinstance(t, str) for t in types)
+    ):
+        raise ValueError("'type' must be a list of strings")
+
+    before = data.get("before")
+    if before is not None:
+        try:
+            before = datetime.fromisoformat(before)
+        except (TypeError, ValueError) as e:
+            raise ValueError("'before' must be an ISO 8601 timestamp") from e
+        if before.tzinfo is None:
+            before = before.replace(tzinfo=timezone.utc)
+
+    selection = ResolveFilter(
+        ids=ids,
+        business_id=optional_int("business_id"),
+        device_id=optional_int("device_id"),
+        types=types or None,
+        before=before,
+    )
+
+    if ids is None and all(
+        value is None
+        for value in (
+            selection.business_id,
+            selection.device_id,
+            selection.types,
+            selection.before,
+        )
+    ):
+        raise ValueError(
+            "Provide 'ids' or at least one of 'business_id', 'device_id', 'type', 'before'"
+        )
+
+    return selection
+
+
+def filter_conditions(table: str, selection: ResolveFilter) -> tuple:
+    """
+    Compiles a selection into SQL conditions on the event table aliased `e`.
+
+    Returns:
+        tuple: The list of SQL conditions and the list of their parameters
+    """
+    time_column, type_column, event, _ = PARTITIONED_TABLES[table]
+    conditions = [sql.SQL("e.resolved = FALSE")]
+    params = []
+
+    if selection.ids is not None:
+        conditions.append(sql.SQL("e.id = ANY(%s)"))
+        params.append(selection.ids)
+    if selection.business_id is not None:
+        conditions.append(sql.SQL("e.business_id = %s"))
+        params.append(selection.business_id)
+    if selection.device_id is not None:
+        conditions.append(sql.SQL("e.device_id = %s"))
+        params.append(selection.device_id)
+    if selection.types is not None:
+        conditions.append(
+            sql.SQL("{} = ANY(%s)").format(sql.Identifier("e", type_column))
+        )
+        params.append(event_type_codes(event, selection.types))
+    if selection.before is not None:
+        conditions.append(sql.SQL("{} < %s").format(sql.Identifier("e", time_column)))
+        params.append(selection.before)
+
+    return conditions, params
+
+
+@dataclass(slots=True)
+class ResolveJob:
+    """
+    A bulk resolution and its progress.
+    """
+
+    table: str
+    selection: ResolveFilter
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    run: JobRun = field(default_factory=lambda: JobRun("pending"))
+    total: int = None
+    resolved: int = 0
+
+    def to_dict(self) -> dict:
+        """
+        Converts the job to its JSON representation.
+        """
+        return {
+            "id": self.id,
+            "table": self.table,
+            "filter": self.selection.to_dict(),
+            "total": self.total,
+            "resolved": self.resolved,
+            **self.run.to_dict(),
+        }
+
+
+class ResolveJobs:
+    """
+    Process-wide registry of the bulk resolve jobs.
+
+    Running jobs are always kept, finished ones only up to `MAX_FINISHED_JOBS`.
+    """
+
+    _jobs = OrderedDict()
+    _lock = Lock()
+
+    @classmethod
+    def start(cls, table: str, selection: ResolveFilter) -> ResolveJob:
+        """
+        Starts a bulk resolution in the background.
+
+        Args:
+            table (str): `alerts` or `malfunctions`
+            selection (ResolveFilter): The rows to resolve
+
+        Returns:
+            ResolveJob: The started job
+        """
+        job = ResolveJob(table, selection)
+        with cls._lock:
+            cls._jobs[job.id] = job
+
+            finished = [
+                j.id for j in cls._jobs.values() if j.run.finished_at is not None
+            ]
+            for job_id in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del cls._jobs[job_id]
+
+        Thread(target=run_resolve_job, args=(job,), daemon=True).start()
+        logger.info("Started bulk resolve job %s on %s", job.id, table)
+        return job
+
+    @classmethod
+    def get(cls, job_id: str) -> ResolveJob:
+        """
+        Returns a job by ID, or None if it is unknown or was forgotten.
+        """
+        with cls._lock:
+            return cls._jobs.get(job_id)
+
+
+def count_unresolved(table: str, selection: ResolveFilter) -> int:
+    """
+    Counts the unresolved rows of a selection, to report progress against.
+    """
+    conditions, params = filter_conditions(table, selection)
+    connection = DatabaseManager.get_connection()
+    try:
+        with connection.cursor() as cur:
+            cur.execute(
+                sql.SQL("SELECT COUNT(*) FROM {} e WHERE {}").format(
+                    sql.Identifier(table), sql.SQL(" AND ").join(conditions)
+                ),
+                params,
+            )
+            total = cur.fetchone()[0]
+        connection.commit()
+        return total
+    finally:
+        DatabaseManager.release_connection(connection)
+
+
+def resolve_batch(table: str, selection: ResolveFilter, after: tuple) -> tuple:
+    """
+    Resolves the next batch of a selection in its own transaction.
+
+    Batches walk the unresolved rows on `(time, id)`, which the partial
+    unresolved index serves directly, so every batch costs the same.
+
+    Args:
+        table (str): `alerts` or `malfunctions`
+        selection (ResolveFilter): The rows to resolve
+        after (tuple): The `(time, id)` key of the last row of the previous
+                       batch, or None for the first batch
+
+    Returns:
+        tuple: The number of rows selected, the IDs of the rows resolved, the
+               key of the last row selected, the IDs of the businesses changed
+               and the transaction ID with the `(device_id, type code)` pairs
+               of the rows resolved
+    """
+    time_column, type_column, _, _ = PARTITIONED_TABLES[table]
+    conditions, params = filter_conditions(table, selection)
+    key = sql.SQL("({}, e.id)").format(sql.Identifier("e", time_column))
+    if after is not None:
+        conditions.append(sql.SQL("{} > (%s, %s)").format(key))
+        params.extend(after)
+
+    query = sql.SQL(
+        """
+        WITH batch AS (
+            SELECT e.id, {time} AS time
+            FROM {table} e
+            WHERE {conditions}
+            ORDER BY {key}
+            LIMIT %s
+        ),
+        solved AS (
+            UPDATE {table} e SET resolved = TRUE
+            FROM batch
+            WHERE e.id = batch.id AND {time} = batch.time AND e.resolved = FALSE
+            RETURNING e.id, e.business_id, e.device_id, {type}
+        )
+        SELECT
+            (SELECT COUNT(*) FROM batch),
+            (SELECT time FROM batch ORDER BY time DESC, id DESC LIMIT 1),
+            (SELECT id FROM batch ORDER BY time DESC, id DESC LIMIT 1),
+            ARRAY(SELECT id FROM solved ORDER BY id),
+            ARRAY(SELECT DISTINCT business_id FROM solved),
+            ARRAY(SELECT ARRAY[device_id, {type_column}] FROM solved),
+            pg_current_xact_id()::text::bigint
+        """
+    ).format(
+        time=sql.Identifier("e", time_column),
+        type=sql.Identifier("e", type_column),
+        type_column=sql.Identifier(type_column),
+        table=sql.Identifier(table),
+        conditions=sql.SQL(" AND ").join(conditions),
+        key=key,
+    )
+
+    connection = DatabaseManager.get_connection()
+    try:
+        with connection.cursor() as cur:
+            cur.execute(query, (*params, BATCH_SIZE))
+            (
+                selected,
+                last_time,
+                last_id,
+                resolved_ids,
+                business_ids,
+                resolved_types,
+                txid,
+            ) = cur.fetchone()
+        connection.commit()
+    except psycopg2.Error:
+        connection.rollback()
+        raise
+    finally:
+        DatabaseManager.release_connection(connection)
+
+    return (
+        selected,
+        resolved_ids,
+        (last_time, last_id),
+        business_ids,
+        (txid, resolved_types),
+    )
+
+
+def run_resolve_job(job: ResolveJob):
+    """
+    Runs a bulk resolve job to completion, batch after batch.
+
+    Each committed batch is published right away: the dashboard caches are
+    invalidated, the map clusters of the businesses and the live states of the
+    devices changed are updated and the IDs resolved are broadcast in one
+    Socket.IO event.
+    A failed job keeps the batches committed before the failure.
+
+    Args:
+        job (ResolveJob): The job to run
+    """
+    job.run.start()
+
+    try:
+        job.total = count_unresolved(job.table, job.selection)
+
+        after = None
+        while True:
+            selected, resolved_ids, after, business_ids, resolved = resolve_batch(
+                job.table, job.selection, after
+            )
+            job.run.batches += 1
+            job.resolved += len(resolved_ids)
+
+            if resolved_ids:
+                MapClusters.mark_dirty(*business_ids)
+                txid, resolved_types = resolved
+                DeviceStates.resolve(txid, job.table, resolved_types)
+                ChangeTracker.bump(job.table)
+                getattr(SocketIOClient(), RESOLVED_EMITTERS[job.table])(
+                    {"ids": resolved_ids, "business_ids": business_ids}
+                )
+
+            if selected < BATCH_SIZE:
+                break
+            time.sleep(BATCH_PAUSE)
+
+        job.run.status = "done"
+        logger.info(
+            "Bulk resolve job %s resolved %s %s in %s batches",
+            job.id,
+            job.resolved,
+            job.table,
+            job.run.batches,
+        )
+    except psycopg2.Error as e:
+        job.run.fail("Database error while resolving")
+        logger.error("Database error in bulk resolve job %s: %s", job.id, e)
+    except Exception as e:
+        # Never leave the job running, e.g. when publishing a batch failed
+        job.run.fail("Unexpected error while resolving")
+        logger.error("Unexpected error in bulk resolve job %s: %s", job.id, e)
+    finally:
+        job.run.finish()
@@ -0,0 +1,250 @@
+"""
+Database change notification utilities.
+A background thread of each API process follows the writes of every other
+process and job, and invalidates the in-memory caches built from the changed
+tables, so the caches of the Flask and ASGI processes follow each other.
+
+The inserted and updated rows are read from `change_log` about every second,
+along with the origin and the detail of each change; the changes of the
+process itself were applied when it made them and are skipped. Ingestion thus
+sends no notification. The changes `change_log` does not record, employee
+changes, deleted events and dropped partitions, are announced on
+`CHANGES_CHANNEL` by the `notify_change` triggers and `notify_table_change`.
+"""
+
+import json
+import select
+import threading
+import time
+from datetime import datetime
+
+import psycopg2
+
+from utils.change_log import (
+    CursorExpiredError,
+    current_watermark,
+    decode_change_cursor,
+    read_changes,
+)
+from utils.change_tracker import ChangeTracker
+from utils.db import DatabaseManager
+from utils.logger_config import get_logger
+from utils.device_state import DeviceStates
+from utils.map_clusters import MapClusters
+
+# Configure logging
+logger = get_logger("change_listener")
+
+# Channel of the `notify_change` triggers
+CHANGES_CHANNEL = "table_changes"
+
+# Tables whose changes are followed by the listener
+TRACKED_TABLES = (
+    "businesses",
+    "employees",
+    "security_devices",
+    "alerts",
+    "malfunctions",
+    "device_logs",
+)
+
+# Tables whose rows are deleted along with their business or device
+EVENT_TABLES = ("alerts", "malfunctions", "device_logs")
+
+# Seconds between two reads of `change_log`, which also check the connection
+CHANGE_LOG_POLL_INTERVAL = 1
+
+# Seconds to wait before reconnecting after a lost connection
+RECONNECT_DELAY = 5
+
+
+def notify_table_change(cur, table: str):
+    """
+    Announces a change the triggers do not see, such as a dropped partition.
+    The notification names no rows, so listeners treat every row as changed.
+    The notification is only sent once the transaction commits.
+
+    Args:
+        cur: An open database cursor
+        table (str): The name of the table that changed
+    """
+    cur.execute(
+        "SELECT pg_notify(%s, %s)",
+        (CHANGES_CHANNEL, json.dumps({"table": table})),
+    )
+
+
+class ChangeListener:
+    """
+    Process-wide listener of the change notifications.
+    """
+
+    _thread = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def start(cls):
+        """
+        Starts the listener thread, once per process.
+        """
+        with cls._lock:
+            if cls._thread is not None:
+                return
+            cls._thread = threading.Thread(
+                target=cls._run, name="change-listener", daemon=True
+            )
+            cls._thread.start()
+
+        logger.info("Listening to database changes on %s", CHANGES_CHANNEL)
+
+    @classmethod
+    def _run(cls):
+        """
+        Follows the changes, reconnecting whenever the connection is lost or a
+        change could not be applied.
+        """
+        while True:
+            try:
+                cls._listen()
+            except Exception as e:
+                logger.error(
+                    "Change listener failed, reconnecting: %s", e, exc_info=True
+                )
+            time.sleep(RECONNECT_DELAY)
+
+    @classmethod
+    def _listen(cls):
+        """
+        Opens a dedicated connection and applies the changes until it fails.
+        """
+        connection = psycopg2.connect(**DatabaseManager.connection_config())
+        try:
+            connection.set_session(autocommit=True)
+            with connection.cursor() as cur:
+                cur.execute(f"LISTEN {CHANGES_CHANNEL}")
+                position = decode_change_cursor(current_watermark(cur))
+
+            # Changes made while no connection was listening were missed
+            cls.apply([{"table": table} for table in TRACKED_TABLES])
+
+            while True:
+                ready, _, _ = select.select(
+                    [connection], [], [], CHANGE_LOG_POLL_INTERVAL
+                )
+                if ready:
+                    connection.poll()
+                    changes = cls._notifications(connection)
+                    if changes:
+                        cls.apply(changes)
+
+                with connection.cursor() as cur:
+                    position = cls._follow(cur, position)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _notifications(connection) -> list:
+        """
+        Decodes the pending notifications, skipping the invalid ones.
+        """
+        changes = []
+        while connection.notifies:
+            notify = connection.notifies.pop(0)
+            try:
+                change = json.loads(notify.payload)
+            except ValueError:
+                change = None
+            if isinstance(change, dict) and change.get("table") in TRACKED_TABLES:
+                changes.append(change)
+            else:
+                logger.warning("Invalid change notification: %s", notify.payload)
+        return changes
+
+    @classmethod
+    def _follow(cls, cur, position: tuple) -> tuple:
+        """
+        Applies the changes of the other processes committed after a position.
+
+        Args:
+            cur: A cursor of the listener connection
+            position (tuple): The `(txid, id)` change log position to read after
+
+        Returns:
+            tuple: The position to continue from
+        """
+        origin = DatabaseManager.origin()
+        while True:
+            try:
+                entries, cursor, has_more = read_changes(cur, position, details=True)
+            except CursorExpiredError:
+                logger.warning("Missed pruned changes, invalidating every cache")
+                cls.apply([{"table": table} for table in TRACKED_TABLES])
+                return decode_change_cursor(current_watermark(cur))
+
+            cls.apply_entries([entry for entry in entries if entry[4] != origin])
+            position = decode_change_cursor(cursor)
+            if not has_more:
+                return position
+
+    @staticmethod
+    def apply(changes: list):
+        """
+        Invalidates the caches built from the changed tables. The map clusters
+        are marked dirty before the versions are bumped, see `MapClusters`.
+        The notified changes are deleted events, see `DeviceStates.delete_events`.
+
+        Args:
+            changes (list): The decoded notification payloads, whose `devices`
+                            and `businesses` are None or absent for any row
+        """
+        if any(change.get("businesses") is None for change in changes):
+            MapClusters.reset()
+        else:
+            MapClusters.mark_dirty(*(i for c in changes for i in c["businesses"]))
+
+        if any(change.get("devices") is None for change in changes):
+            DeviceStates.reset()
+        else:
+            DeviceStates.delete_events(*(i for c in changes for i in c["devices"]))
+
+        ChangeTracker.bump(*{change["table"] for change in changes})
+
+    @staticmethod
+    def apply_entries(entries: list):
+        """
+        Applies the rows of change log entries to the device states, and
+        invalidates the other caches built from them.
+
+        Args:
+            entries (list): The `(entity, entity_id, operation, detail, origin,
+                            txid)` entries returned by `read_changes`
+        """
+        tables = set()
+        businesses = set()
+        for entity, entity_id, operation, detail, _, txid in entries:
+            tables.add(entity)
+
+            if entity == "businesses":
+                businesses.add(entity_id)
+            elif entity == "security_devices":
+                businesses.add(detail["business_id"])
+                if operation == "delete":
+                    DeviceStates.remove_devices(txid, entity_id)
+                else:
+                    DeviceStates.add_device(
+                        txid, entity_id, detail["business_id"], detail
+                    )
+            else:
+                # Only opened and resolved incidents change the business state
+                if detail["opened"]:
+                    businesses.add(detail["business_id"])
+                if detail["time"] is not None:
+                    detail["time"] = datetime.fromisoformat(detail["time"])
+                DeviceStates.record_event(txid, entity, detail)
+
+            if operation == "delete":
+                tables.update(EVENT_TABLES)
+
+        if tables:
+            MapClusters.mark_dirty(*businesses)
+            ChangeTracker.bump(*tables)
@@ -0,0 +1,166 @@
+"""
+Change log utilities.
+Reads the trigger-maintained `change_log` table behind a monotonic cursor.
+
+Cursors are positions on `(txid, id)`. Entries are only handed out once every
+transaction that could still write an earlier position has finished (their
+txid is below the snapshot xmin), so a reader can never skip a change that
+commits late.
+"""
+
+import base64
+import binascii
+
+from utils.logger_config import get_logger
+
+# Configure logging
+logger = get_logger("change_log")
+
+# Upper bound for the number of change log entries returned per request
+MAX_CHANGES = 1000
+
+
+class CursorExpiredError(Exception):
+    """Raised when a cursor points before the pruned part of the change log."""
+
+
+def encode_change_cursor(txid: int, entry_id: int) -> str:
+    """
+    Encodes a change log position as an opaque, URL-safe cursor.
+
+    Args:
+        txid (int): The transaction ID of the position
+        entry_id (int): The change log entry ID of the position
+
+    Returns:
+        str: The cursor
+    """
+    raw = f"{txid}|{entry_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_change_cursor(cursor: str) -> tuple:
+    """
+    Decodes a cursor produced by `encode_change_cursor`.
+
+    Args:
+        cursor (str): The cursor
+
+    Returns:
+        tuple: The `(txid, id)` position
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        txid, entry_id = raw.split("|")
+        return int(txid), int(entry_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid change cursor") from e
+
+
+def current_watermark(cur) -> str:
+    """
+    Returns a cursor pointing after every change committed so far.
+
+    Args:
+        cur: An open database cursor
+
+    Returns:
+        str: The cursor
+    """
+    cur.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text")
+    return encode_change_cursor(int(cur.fetchone()[0]), 0)
+
+
+def read_changes(
+    cur, since: tuple, limit: int = MAX_CHANGES, details: bool = False
+) -> tuple:
+    """
+    Reads the change log entries after a position.
+
+    Args:
+        cur: An open database cursor
+        since (tuple): The `(txid, id)` position to read after
+        limit (int): Maximum number of entries to return
+        details (bool): Also return the `detail`, `origin` and `txid` of the
+                        entries
+
+    Returns:
+        tuple: The `(entity, entity_id, operation)` entries in commit-safe order,
+               followed by `detail`, `origin` and `txid` if requested, the cursor to
+               continue from and whether more entries are pending
+
+    Raises:
+        CursorExpiredError: If the position was pruned from the change log
+    """
+    cur.execute(
+        """
+        SELECT txid, pg_snapshot_xmin(pg_current_snapshot())::text
+        FROM change_log_horizon
+        """
+    )
+    horizon, xmin = (int(value) for value in cur.fetchone())
+
+    if since[0] < horizon:
+        raise CursorExpiredError("Change cursor expired, a full resync is required")
+
+    columns = (
+        ", detail, origin, txid::text::bigint AS transaction_id" if details else ""
+    )
+    cur.execute(
+        f"""
+        SELECT txid::text, id, entity, entity_id, operation{columns}
+        FROM change_log
+        WHERE (txid, id) > (%s::text::xid8, %s) AND txid < %s::text::xid8
+        ORDER BY txid, id
+        LIMIT %s
+        """,
+        (str(since[0]), since[1], str(xmin), limit + 1),
+    )
+    rows = cur.fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if has_more:
+        next_cursor = encode_change_cursor(int(rows[-1][0]), rows[-1][1])
+    else:
+        # Every transaction below xmin has been read
+        next_cursor = encode_change_cursor(max(xmin, since[0]), 0)
+
+    return [row[2:] for row in rows], next_cursor, has_more
+
+
+def prune_change_log(cur, retention_days: int) -> int:
+    """
+    Deletes change log entries older than the retention period and moves the
+    horizon so that cursors pointing into the pruned range are rejected.
+
+    Args:
+        cur: An open database cursor
+        retention_days (int): Number of days of changes to keep
+
+    Returns:
+        int: The number of deleted entries
+    """
+    cur.execute(
+        """
+        WITH pruned AS (
+            DELETE FROM change_log
+            WHERE changed_at < NOW() - make_interval(days => %s)
+            RETURNING txid
+        )
+        UPDATE change_log_horizon
+        SET txid = GREATEST(txid, (SELECT MAX(txid::text::bigint) FROM pruned) + 1)
+        WHERE EXISTS (SELECT 1 FROM pruned)
+        RETURNING (SELECT COUNT(*) FROM pruned)
+        """,
+        (retention_days,),
+    )
+    row = cur.fetchone()
+    deleted = row[0] if row else 0
+
+    logger.info("Pruned %s change log entries", deleted)
+    return deleted
@@ -0,0 +1,65 @@
+"""
+Change tracking utilities.
+Keeps a version counter per table, bumped by the write paths, so readers can
+tell cheaply whether a resource changed since it was last served. Bumping a
+table also invalidates the cached responses tagged with it.
+"""
+
+import time
+import uuid
+from threading import Lock
+
+from utils.logger_config import get_logger
+from utils.response_cache import ResponseCache
+
+# Configure logging
+logger = get_logger("change_tracker")
+
+
+class ChangeTracker:
+    """
+    Process-wide table version counters.
+
+    Counters live in memory. They are bumped by the write paths of this
+    process, and by `ChangeListener` for the writes of the other processes and
+    jobs, announced by the database. A random epoch is part of every token so
+    tokens issued before a restart never match.
+    """
+
+    _versions = {}
+    _epoch = uuid.uuid4().hex[:8]
+    _lock = Lock()
+
+    @classmethod
+    def bump(cls, *tables: str):
+        """
+        Records a change to the given tables and invalidates the cached
+        responses built from them.
+
+        Args:
+            *tables: The names of the tables that changed
+        """
+        with cls._lock:
+            for table in tables:
+                cls._versions[table] = cls._versions.get(table, 0) + 1
+        ResponseCache.invalidate(*tables)
+        logger.debug("Bumped version of %s", ", ".join(tables))
+
+    @classmethod
+    def version_token(cls, *tables: str, time_bucket: int = None) -> str:
+        """
+        Builds a token that changes whenever one of the tables changes.
+
+        Args:
+            *tables: The names of the tables the resource is built from
+            time_bucket (int, optional): Also change the token every `time_bucket`
+                                         seconds, for resources that depend on NOW()
+
+        Returns:
+            str: The version token
+        """
+        versions = "-".join(str(cls._versions.get(table, 0)) for table in tables)
+        token = f"{cls._epoch}-{versions}"
+        if time_bucket:
+            token += f"-{int(time.time() // time_bucket)}"
+        return token
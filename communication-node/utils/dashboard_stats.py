@@ -0,0 +1,61 @@
+"""
+Dashboard statistics utilities.
+Reads /api/stats from the trigger-maintained counters instead of scanning the event tables.
+
+`dashboard_counters` holds the business and device totals and the all-time
+`<table>:<type code>` event totals, `event_counts_daily` holds per-day (UTC) event
+counts for the time windows. Both are updated by statement-level triggers in
+the same transaction as the inserts and deletes, cascades included, so the
+read below costs the same whatever the size of the event tables.
+"""
+
+from utils.event_types import FIRE_ALERT, MOTION_ALERT
+
+# Number of days covered by the recent alerts and malfunctions statistics
+RECENT_ALERTS_DAYS = 7
+RECENT_MALFUNCTIONS_DAYS = 30
+
+# The time windows are counted in whole UTC days, the oldest day included
+STATS_QUERY = f"""
+    SELECT
+        (SELECT COALESCE(SUM(value), 0) FROM dashboard_counters
+         WHERE name = 'businesses') AS total_clients,
+        (SELECT COALESCE(SUM(value), 0) FROM dashboard_counters
+         WHERE name = 'security_devices') AS active_devices,
+        (SELECT COALESCE(SUM(count), 0) FROM event_counts_daily
+         WHERE event = 'alert'
+           AND day >= (
+               (NOW() AT TIME ZONE 'UTC') - INTERVAL '{RECENT_ALERTS_DAYS} days'
+           )::date
+        ) AS recent_alerts,
+        (SELECT COALESCE(SUM(value), 0) FROM dashboard_counters
+         WHERE name = 'alerts:{MOTION_ALERT}') AS total_intrusions,
+        (SELECT COALESCE(SUM(value), 0) FROM dashboard_counters
+         WHERE name = 'alerts:{FIRE_ALERT}') AS total_fires,
+        (SELECT COALESCE(SUM(count), 0) FROM event_counts_daily
+         WHERE event = 'malfunction'
+           AND day >= (
+               (NOW() AT TIME ZONE 'UTC') - INTERVAL '{RECENT_MALFUNCTIONS_DAYS} days'
+           )::date
+        ) AS recent_malfunctions
+"""
+
+
+def stats_from_row(row: tuple) -> dict:
+    """
+    Maps a `STATS_QUERY` row to the /api/stats payload.
+
+    Args:
+        row (tuple): The row returned by `STATS_QUERY`
+
+    Returns:
+        dict: The dashboard statistics
+    """
+    return {
+        "clients": int(row[0]),
+        "activeDevices": int(row[1]),
+        "alerts": int(row[2]),
+        "detectedIntruders": int(row[3]),
+        "detectedFires": int(row[4]),
+        "deviceMalfunctions": int(row[5]),
+    }
@@ -4,6 +4,7 @@ Provides a robust PostgreSQL connection pool with configuration management.
 """
 
 import os
+import uuid
 import psycopg2
 from dotenv import load_dotenv
 from psycopg2 import pool
@@ -25,6 +26,45 @@ class DatabaseManager:
     """
 
     _connection_pool = None
+    _origin = None
+    _origin_pid = None
+
+    @classmethod
+    def origin(cls) -> str:
+        """
+        Returns the token of this process, recorded as the origin of its writes
+        in `change_log` so `ChangeListener` can skip the changes it already
+        applied. A forked child gets a token of its own.
+
+        Returns:
+            str: The origin token of the process
+        """
+        if cls._origin_pid != os.getpid():
+            cls._origin = uuid.uuid4().hex
+            cls._origin_pid = os.getpid()
+        return cls._origin
+
+    @classmethod
+    def connection_config(cls) -> dict:
+        """
+        Builds the connection parameters from the environment.
+
+        Returns:
+            dict: The keyword arguments of `psycopg2.connect`
+        """
+        load_dotenv()
+
+        return {
+            "host": os.getenv("DATABASE_HOST"),
+            "database": os.getenv("DATABASE_NAME"),
+            "user": os.getenv("DATABASE_USER"),
+            "password": os.getenv("DATABASE_PASSWORD"),
+            "port": os.getenv("DATABASE_PORT", "5432"),
+            "connect_timeout": int(
+                os.getenv("DATABASE_TIMEOUT", str(DEFAULT_CONNECTION_TIMEOUT))
+            ),
+            "options": f"-c app.origin={cls.origin()}",
+        }
 
     @classmethod
     def initialize_pool(cls, min_connections: int = None, max_connections: int = None):
@@ -47,19 +87,8 @@ class DatabaseManager:
             os.getenv("DB_MAX_CONNECTIONS", str(DEFAULT_MAX_CONNECTIONS))
         )
 
-        load_dotenv()
-
         try:
-            db_config = {
-                "host": os.getenv("DATABASE_HOST"),
-                "database": os.getenv("DATABASE_NAME"),
-                "user": os.getenv("DATABASE_USER"),
-                "password": os.getenv("DATABASE_PASSWORD"),
-                "port": os.getenv("DATABASE_PORT", "5432"),
-                "connect_timeout": int(
-                    os.getenv("DATABASE_TIMEOUT", str(DEFAULT_CONNECTION_TIMEOUT))
-                ),
-            }
+            db_config = cls.connection_config()
 
             # Log connection attempt (without sensitive information)
             safe_config = db_config.copy()
@@ -0,0 +1,418 @@
+"""
+Live device state utilities.
+Keeps the current state of every device in memory, so the live fleet status
+is served without reading the database.
+
+The registry is loaded with `DEVICE_STATES_QUERY` on first use. Afterwards
+the write paths of this process apply their events, resolutions and devices
+to it in memory, and `ChangeListener` applies those of the other processes
+from the details of `change_log`. Every process thus serves the committed
+state, whichever process ingested the events, and only reloads it after a
+change it cannot apply, see `DeviceStates.reset`.
+"""
+
+from datetime import datetime
+from threading import Lock
+
+from utils.event_types import SENSOR_MALFUNCTION_TYPES, event_type_name
+from utils.incidents import (
+    SENSOR_BITS,
+    SENSOR_HEALTHY,
+    SENSOR_MALFUNCTION,
+    SENSOR_NOT_USED,
+)
+from utils.logger_config import get_logger
+
+# Configure logging
+logger = get_logger("device_state")
+
+# `DeviceState` attribute counting the open events, per event table
+OPEN_EVENTS = {"alerts": "alerts", "malfunctions": "malfunctions"}
+
+# Loads the state of every device not deleted. The open incidents come from
+# the partial unresolved indexes and the last event times from one index
+# probe per device and table. Every row also carries the snapshot of the
+# query, which tells the changes the rows include, see `DeviceStates`.
+DEVICE_STATES_QUERY = """
+    SELECT sd.id, sd.business_id,
+           sd.motion_sensor, sd.sound_sensor, sd.gas_sensor, sd.fire_sensor,
+           GREATEST(
+               sd.last_active_at,
+               (SELECT MAX(alert_time) FROM alerts WHERE device_id = sd.id),
+               (SELECT MAX(malfunction_time) FROM malfunctions WHERE device_id = sd.id),
+               (SELECT MAX(log_time) FROM device_logs WHERE device_id = sd.id)
+           ) AS last_seen,
+           a.open_alerts, m.open_malfunctions,
+           (SELECT pg_current_snapshot()::text) AS snapshot
+    FROM security_devices sd
+    LEFT JOIN LATERAL (
+        SELECT json_object_agg(alert_type, count) AS open_alerts
+        FROM (
+            SELECT alert_type, COUNT(*) AS count
+            FROM alerts WHERE device_id = sd.id AND resolved = FALSE
+            GROUP BY alert_type
+        ) open_alerts
+    ) a ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT json_object_agg(malfunction_type, count) AS open_malfunctions
+        FROM (
+            SELECT malfunction_type, COUNT(*) AS count
+            FROM malfunctions WHERE device_id = sd.id AND resolved = FALSE
+            GROUP BY malfunction_type
+        ) open_malfunctions
+    ) m ON TRUE
+    WHERE sd.deleted_at IS NULL
+"""
+
+
+class DeviceState:
+    """
+    The live state of a device.
+
+    `sensors` holds the `SENSOR_BITS` of the sensors the device uses, the open
+    alerts and malfunctions are counted per type code and left None while empty.
+    """
+
+    __slots__ = ("id", "business_id", "sensors", "last_seen", "alerts", "malfunctions")
+
+    def __init__(self, device_id: int, business_id: int, sensors: int):
+        self.id = device_id
+        self.business_id = business_id
+        self.sensors = sensors
+        self.last_seen = None
+        self.alerts = None
+        self.malfunctions = None
+
+    def seen(self, event_time: datetime):
+        """
+        Moves the last seen time forward to an event time.
+        """
+        if event_time is not None and (
+            self.last_seen is None or event_time > self.last_seen
+        ):
+            self.last_seen = event_time
+
+    def sensor_status(self, sensor: str) -> int:
+        """
+        Returns SENSOR_NOT_USED, SENSOR_HEALTHY or SENSOR_MALFUNCTION for a sensor.
+        """
+        if not self.sensors & SENSOR_BITS[sensor]:
+            return SENSOR_NOT_USED
+        if self.malfunctions and SENSOR_MALFUNCTION_TYPES[sensor] in self.malfunctions:
+            return SENSOR_MALFUNCTION
+        return SENSOR_HEALTHY
+
+    def to_dict(self) -> dict:
+        """
+        Converts the state to its JSON representation.
+        """
+        state = {
+            "id": self.id,
+            "business_id": self.business_id,
+            "last_seen": self.last_seen,
+        }
+        for sensor in SENSOR_BITS:
+            state[sensor] = self.sensor_status(sensor)
+        state["open_alerts"] = sorted(map(event_type_name, self.alerts or ()))
+        state["open_malfunctions"] = sorted(
+            map(event_type_name, self.malfunctions or ())
+        )
+        return state
+
+
+def count_open(counts: dict, event_type: int, delta: int) -> dict:
+    """
+    Adds to the open count of an event type code, dropping the types back to zero.
+
+    Returns:
+        dict: The updated counts, or None once no type is open
+    """
+    counts = counts or {}
+    count = counts.get(event_type, 0) + delta
+    if count > 0:
+        counts[event_type] = count
+    else:
+        counts.pop(event_type, None)
+    return counts or None
+
+
+def sort_by_id(rows) -> list:
+    """
+    Sorts rows of `DEVICE_STATES_QUERY` by device ID.
+    """
+    return sorted(rows, key=lambda row: row[0])
+
+
+def parse_snapshot(snapshot: str) -> tuple:
+    """
+    Parses a `pg_snapshot` into its xmin, its xmax and its running transactions.
+    """
+    xmin, xmax, running = snapshot.split(":")
+    return int(xmin), int(xmax), frozenset(int(i) for i in running.split(",") if i)
+
+
+def device_state(row) -> DeviceState:
+    """
+    Builds the state of a device from a row of `DEVICE_STATES_QUERY`.
+    """
+    sensors = 0
+    for sensor, enabled in zip(SENSOR_BITS, row[2:6]):
+        if enabled:
+            sensors |= SENSOR_BITS[sensor]
+
+    state = DeviceState(row[0], row[1], sensors)
+    state.last_seen = row[6]
+    state.alerts = {int(t): int(n) for t, n in row[7].items()} if row[7] else None
+    state.malfunctions = {int(t): int(n) for t, n in row[8].items()} if row[8] else None
+    return state
+
+
+class DeviceStates:
+    """
+    Process-wide registry of the live device states, by device ID.
+
+    Every change is applied along with the ID of the transaction that made
+    it. The registry keeps the snapshot it was loaded with and skips the
+    changes the load already included, so it neither misses nor repeats a
+    change whichever order the writes, the load and `ChangeListener` run in.
+    The changes arriving during a load wait for it to finish.
+    """
+
+    _devices = {}
+    # Includes no transaction until loaded
+    _snapshot = (0, 0, frozenset())
+    _loaded = False
+    _pending = None
+    _removed = set()
+    _generation = 0
+    _lock = Lock()
+    _load_lock = Lock()
+
+    @classmethod
+    def loaded(cls) -> bool:
+        """
+        Tells whether the registry was loaded.
+        """
+        with cls._lock:
+            return cls._loaded
+
+    @classmethod
+    def reset(cls):
+        """
+        Schedules a full reload before the next read, for changes that cannot
+        be applied as deltas, such as deleted events.
+        """
+        with cls._lock:
+            cls._loaded = False
+            cls._generation += 1
+
+    @classmethod
+    def refresh(cls, cur):
+        """
+        Loads the registry unless it is loaded already, then applies the
+        changes that arrived during the load and were not included in it.
+
+        Args:
+            cur: An open database cursor
+        """
+        with cls._load_lock:
+            with cls._lock:
+                if cls._loaded:
+                    return
+                generation = cls._generation
+                cls._pending = []
+
+            rows = None
+            try:
+                cur.execute(DEVICE_STATES_QUERY)
+                rows = cur.fetchall()
+            finally:
+                with cls._lock:
+                    pending = cls._pending
+                    cls._pending = None
+                    if rows is not None:
+                        cls._install(rows, pending)
+                        cls._loaded = cls._generation == generation
+
+        logger.info("Loaded the state of %s devices", len(rows))
+
+    @classmethod
+    def _install(cls, rows, pending: list):
+        """
+        Replaces the registry with loaded rows and applies the pending changes
+        they do not include. Called with the lock held.
+        """
+        cls._snapshot = parse_snapshot(rows[0][9]) if rows else (0, 0, frozenset())
+        cls._devices = {row[0]: device_state(row) for row in sort_by_id(rows)}
+        for txid, change in pending:
+            if not cls._included(txid):
+                change(cls._devices)
+
+    @classmethod
+    def _included(cls, txid: int) -> bool:
+        """
+        Tells whether the loaded rows include the changes of a transaction.
+        """
+        if txid is None:
+            return False
+        xmin, xmax, running = cls._snapshot
+        return txid < xmin or (txid < xmax and txid not in running)
+
+    @classmethod
+    def _apply(cls, txid: int, change):
+        """
+        Applies a change, unless the loaded rows include it already.
+
+        Args:
+            txid (int): The ID of the transaction that made the change
+            change (callable): Called with the device states by ID
+        """
+        with cls._lock:
+            if cls._pending is not None:
+                cls._pending.append((txid, change))
+            elif cls._loaded and not cls._included(txid):
+                change(cls._devices)
+
+    @classmethod
+    def add_device(cls, txid: int, device_id: int, business_id: int, sensors: dict):
+        """
+        Adds a newly registered device, or updates a changed one.
+
+        Args:
+            txid (int): The ID of the transaction that made the change
+            device_id (int): The ID of the device
+            business_id (int): The business of the device
+            sensors (dict): Maps the sensor columns to whether the device uses them
+        """
+        mask = 0
+        for sensor, bit in SENSOR_BITS.items():
+            if sensors.get(sensor):
+                mask |= bit
+
+        def change(devices):
+            # Deleted devices never come back, a late change of one is stale
+            if device_id in cls._removed:
+                return
+            state = devices.get(device_id)
+            if state is not None:
+                state.business_id = business_id
+                state.sensors = mask
+                return
+
+            # Devices are registered with growing IDs, so the registry stays
+            # in ID order unless a device got a lower ID
+            ordered = device_id > next(reversed(devices), 0)
+            devices[device_id] = DeviceState(device_id, business_id, mask)
+            if not ordered:
+                ordered_devices = dict(sorted(devices.items()))
+                devices.clear()
+                devices.update(ordered_devices)
+
+        cls._apply(txid, change)
+
+    @classmethod
+    def remove_devices(cls, txid: int, *device_ids: int):
+        """
+        Forgets deleted devices.
+
+        Args:
+            txid (int): The ID of the transaction that deleted the devices, or
+                        None, as deleting them again changes nothing
+            *device_ids: The IDs of the devices
+        """
+
+        def change(devices):
+            cls._removed.update(device_ids)
+            for device_id in device_ids:
+                devices.pop(device_id, None)
+
+        cls._apply(txid, change)
+
+    @classmethod
+    def delete_events(cls, *device_ids: int):
+        """
+        Applies deleted events. Those cannot be applied as deltas, so the
+        registry is reloaded if it knows any of their devices, or is loading.
+        """
+        with cls._lock:
+            if cls._pending is not None or any(i in cls._devices for i in device_ids):
+                cls._loaded = False
+                cls._generation += 1
+
+    @classmethod
+    def record_event(cls, txid: int, table: str, event: dict):
+        """
+        Applies an event reported by a device, or a change of its resolution.
+
+        Args:
+            txid (int): The ID of the transaction that made the change
+            table (str): `alerts`, `malfunctions` or `device_logs`
+            event (dict): The `device_id` and `type` code of the event, the
+                          `time` it was stored with, None for a change of its
+                          resolution, and by how much it `opened` the open
+                          count of its type, like the `change_log` details
+        """
+        attribute = OPEN_EVENTS.get(table)
+
+        def change(devices):
+            state = devices.get(event["device_id"])
+            if state is None:
+                return
+            state.seen(event["time"])
+            if attribute is not None and event["opened"]:
+                setattr(
+                    state,
+                    attribute,
+                    count_open(
+                        getattr(state, attribute), event["type"], event["opened"]
+                    ),
+                )
+
+        cls._apply(txid, change)
+
+    @classmethod
+    def resolve(cls, txid: int, table: str, rows):
+        """
+        Applies resolved alerts or malfunctions.
+
+        Args:
+            txid (int): The ID of the transaction that resolved them
+            table (str): `alerts` or `malfunctions`
+            rows: The `(device_id, type code)` pairs of the rows resolved
+        """
+        for device_id, event_type in rows:
+            cls.record_event(
+                txid,
+                table,
+                {
+                    "device_id": device_id,
+                    "type": event_type,
+                    "time": None,
+                    "opened": -1,
+                },
+            )
+
+    @classmethod
+    def states(cls, business_id: int = None) -> list:
+        """
+        Returns the JSON representation of the device states, by device ID.
+
+        Args:
+            business_id (int, optional): Only the devices of this business
+        """
+        with cls._lock:
+            return [
+                state.to_dict()
+                for state in cls._devices.values()
+                if business_id is None or state.business_id == business_id
+            ]
+
+
+def load_device_states(cur):
+    """
+    Loads the registry with one query.
+
+    Args:
+        cur: An open database cursor
+    """
+    DeviceStates.refresh(cur)
@@ -0,0 +1,268 @@
+"""
+Event type utilities.
+Maps the event type names reported by the devices to the `SMALLINT` codes the
+event tables store, through the `event_types` reference table.
+
+The mapping is loaded into memory at startup, so the API translates names and
+codes without touching the database. Types a device reports for the first time
+are registered on the fly, up to `MAX_EVENT_TYPES` per event. Codes are never
+reused, so a cached entry stays valid; a code or name registered by another
+process is picked up by reloading the mapping when a lookup misses, at most
+once per `MISS_RELOAD_INTERVAL` for names.
+
+The types the server itself refers to are seeded with fixed codes, see
+`SEEDED_EVENT_TYPES`, which the SQL `sensor_bit` function and the statistics
+queries rely on.
+"""
+
+import time
+from threading import Lock
+
+from utils.db import DatabaseManager
+from utils.logger_config import get_logger
+
+# Configure logging
+logger = get_logger("event_types")
+
+# Codes of the seeded event types
+MOTION_ALERT = 1
+SOUND_ALERT = 2
+GAS_ALERT = 3
+FIRE_ALERT = 4
+MOTION_SENSOR_MALFUNCTION = 11
+SOUND_SENSOR_MALFUNCTION = 12
+GAS_SENSOR_MALFUNCTION = 13
+FIRE_SENSOR_MALFUNCTION = 14
+GENERAL_MALFUNCTION = 15
+ESP32_BOOT_LOG = 21
+GAS_SENSOR_WARMUP_LOG = 22
+
+# Malfunction type of each sensor column
+SENSOR_MALFUNCTION_TYPES = {
+    "motion_sensor": MOTION_SENSOR_MALFUNCTION,
+    "sound_sensor": SOUND_SENSOR_MALFUNCTION,
+    "gas_sensor": GAS_SENSOR_MALFUNCTION,
+    "fire_sensor": FIRE_SENSOR_MALFUNCTION,
+}
+
+# Event types created with the database, as (code, event, name). Types
+# registered later get codes from 100 onwards.
+SEEDED_EVENT_TYPES = (
+    (MOTION_ALERT, "alert", "motion_alert"),
+    (SOUND_ALERT, "alert", "sound_alert"),
+    (GAS_ALERT, "alert", "gas_alert"),
+    (FIRE_ALERT, "alert", "fire_alert"),
+    (MOTION_SENSOR_MALFUNCTION, "malfunction", "motion_sensor"),
+    (SOUND_SENSOR_MALFUNCTION, "malfunction", "sound_sensor"),
+    (GAS_SENSOR_MALFUNCTION, "malfunction", "gas_sensor"),
+    (FIRE_SENSOR_MALFUNCTION, "malfunction", "fire_sensor"),
+    (GENERAL_MALFUNCTION, "malfunction", "general_malfunction"),
+    (ESP32_BOOT_LOG, "log", "esp32_boot"),
+    (GAS_SENSOR_WARMUP_LOG, "log", "gas_sensor_warmup"),
+)
+
+# Upper bound for the number of types of each event, so devices cannot use
+# up the `SMALLINT` codes by reporting made up names
+MAX_EVENT_TYPES = 256
+
+# Seconds during which names missing from the cache are not looked up again
+MISS_RELOAD_INTERVAL = 30
+
+EVENT_TYPES_QUERY = "SELECT code, event, name FROM event_types"
+
+# Returns the code of a type and whether it existed, registering it first if
+# needed and `%(limit)s` types of the event are not reached. Existing types
+# are read without an insert, which would draw a code from the identity. Two
+# processes registering the same type at once both get the winner's code, the
+# no-op update making the row visible to the loser.
+REGISTER_EVENT_TYPE_QUERY = """
+    WITH existing AS (
+        SELECT code FROM event_types WHERE event = %(event)s AND name = %(name)s
+    ), inserted AS (
+        INSERT INTO event_types(event, name)
+        SELECT %(event)s, %(name)s
+        WHERE NOT EXISTS (SELECT 1 FROM existing)
+          AND (SELECT COUNT(*) FROM event_types WHERE event = %(event)s) < %(limit)s
+        ON CONFLICT (event, name) DO UPDATE SET name = EXCLUDED.name
+        RETURNING code
+    )
+    SELECT code, TRUE FROM existing UNION ALL SELECT code, FALSE FROM inserted
+"""
+
+
+class EventTypes:
+    """
+    Process-wide cache of the `event_types` table.
+    """
+
+    _codes = {}
+    _names = {}
+    _missed_at = None
+    _lock = Lock()
+
+    @classmethod
+    def load(cls, rows):
+        """
+        Replaces the cache with the rows of `EVENT_TYPES_QUERY`.
+        """
+        codes = {}
+        names = {}
+        for code, event, name in rows:
+            codes[(event, name)] = code
+            names[code] = name
+
+        with cls._lock:
+            cls._codes = codes
+            cls._names = names
+
+        logger.info("Loaded %s event types", len(names))
+
+    @classmethod
+    def add(cls, code: int, event: str, name: str):
+        """
+        Caches a registered event type.
+        """
+        with cls._lock:
+            cls._codes[(event, name)] = code
+            cls._names[code] = name
+
+    @classmethod
+    def code(cls, event: str, name: str):
+        """
+        Returns the cached code of a type, or None if it is not cached.
+
+        Args:
+            event (str): `alert`, `malfunction` or `log`
+            name (str): The type name, e.g. `fire_alert`
+        """
+        return cls._codes.get((event, name))
+
+    @classmethod
+    def name(cls, code: int):
+        """
+        Returns the cached name of a code, or None if it is not cached.
+        """
+        return cls._names.get(code)
+
+    @classmethod
+    def reload_missed(cls) -> bool:
+        """
+        Tells whether names missing from the cache are worth a reload, which
+        they are once per `MISS_RELOAD_INTERVAL`.
+        """
+        now = time.monotonic()
+        with cls._lock:
+            if (
+                cls._missed_at is not None
+                and now - cls._missed_at < MISS_RELOAD_INTERVAL
+            ):
+                return False
+            cls._missed_at = now
+            return True
+
+
+def load_event_types(cur):
+    """
+    Loads the cache with one query.
+
+    Args:
+        cur: An open database cursor
+    """
+    cur.execute(EVENT_TYPES_QUERY)
+    EventTypes.load(cur.fetchall())
+
+
+def reload_event_types():
+    """
+    Reloads the cache in its own transaction, after a lookup missed.
+    """
+    connection = DatabaseManager.get_connection()
+    try:
+        with connection.cursor() as cur:
+            load_event_types(cur)
+        connection.commit()
+    finally:
+        DatabaseManager.release_connection(connection)
+
+
+def event_type_code(cur, event: str, name: str) -> int:
+    """
+    Returns the code of a reported event type, registering new types.
+
+    The registration is part of the transaction of the cursor, so the code is
+    only cached once a later lookup finds it committed; the cache thus never
+    holds a code the database rolled back.
+
+    Args:
+        cur: An open database cursor
+        event (str): `alert`, `malfunction` or `log`
+        name (str): The type name reported by the device
+
+    Returns:
+        int: The code of the type, or None if it is new and `MAX_EVENT_TYPES`
+             types of the event are registered already
+
+    Raises:
+        psycopg2.Error: If the registration fails
+    """
+    code = EventTypes.code(event, name)
+    if code is not None:
+        return code
+
+    cur.execute(
+        REGISTER_EVENT_TYPE_QUERY,
+        {"event": event, "name": name, "limit": MAX_EVENT_TYPES},
+    )
+    row = cur.fetchone()
+    if row is None:
+        logger.warning("Rejected %s type %s, too many types registered", event, name)
+        return None
+
+    code, existing = row
+    if existing:
+        EventTypes.add(code, event, name)
+        logger.info("Cached %s type %s with code %s", event, name, code)
+    return code
+
+
+def event_type_codes(event: str, names: list) -> list:
+    """
+    Translates the type names of a filter to their codes.
+
+    Names unknown to the database have no rows to match and are left out, so
+    a filter of unknown names only yields an empty list. Unknown names reload
+    the cache at most once per `MISS_RELOAD_INTERVAL`, so repeated requests
+    for them do not read the table every time.
+
+    Args:
+        event (str): `alert`, `malfunction` or `log`
+        names (list): The type names
+
+    Returns:
+        list: The codes of the known names
+    """
+    if (
+        any(EventTypes.code(event, name) is None for name in names)
+        and EventTypes.reload_missed()
+    ):
+        reload_event_types()
+
+    codes = (EventTypes.code(event, name) for name in names)
+    return [code for code in codes if code is not None]
+
+
+def event_type_name(code: int) -> str:
+    """
+    Translates a stored type code to its name.
+
+    Args:
+        code (int): The code read from an event table
+
+    Returns:
+        str: The type name
+    """
+    name = EventTypes.name(code)
+    if name is None:
+        reload_event_types()
+        name = EventTypes.name(code)
+    return name
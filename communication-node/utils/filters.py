@@ -0,0 +1,186 @@
+"""
+Listing filter utilities.
+Compiles listing query parameters into parameterized SQL predicates, or into
+row predicates for listings that are not read from the database.
+
+Event types are filtered by name and compared as their stored codes. Type
+columns are named `<event>_type`, after the event of `utils.event_types`.
+"""
+
+from datetime import datetime, timezone
+from psycopg2 import sql
+
+from utils.event_types import event_type_codes
+
+RESOLVED_VALUES = {"true": True, "false": False, "all": None}
+
+
+def parse_int_arg(args, name: str):
+    """
+    Parses an optional integer query parameter.
+
+    Args:
+        args: The request query parameters
+        name (str): The parameter name
+
+    Returns:
+        int: The value, or None if the parameter is absent
+
+    Raises:
+        ValueError: If the value is not an integer
+    """
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError as e:
+        raise ValueError(f"'{name}' must be an integer") from e
+
+
+def parse_time_arg(args, name: str):
+    """
+    Parses an optional ISO 8601 timestamp query parameter.
+    Timestamps without an offset are taken as UTC.
+
+    Args:
+        args: The request query parameters
+        name (str): The parameter name
+
+    Returns:
+        datetime: The value, or None if the parameter is absent
+
+    Raises:
+        ValueError: If the value is not an ISO 8601 timestamp
+    """
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        time = datetime.fromisoformat(value)
+    except ValueError as e:
+        raise ValueError(f"'{name}' must be an ISO 8601 timestamp") from e
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=timezone.utc)
+    return time
+
+
+def parse_listing_filters(
+    args, alias: str, type_column: str, time_column: str, resolvable: bool
+) -> tuple:
+    """
+    Compiles the listing filters of the request into SQL conditions.
+
+    Supported query parameters:
+        business_id (int): Only rows of devices owned by this business
+        device_id (int): Only rows of this device
+        type (str): Only rows of these types (comma separated)
+        resolved (str): 'false' (default), 'true' or 'all'. Resolvable listings only.
+        since (str): Only rows at or after this ISO 8601 timestamp
+        until (str): Only rows strictly before this ISO 8601 timestamp
+
+    Args:
+        args: The request query parameters
+        alias (str): The alias of the event table in the listing query
+        type_column (str): The event type column
+        time_column (str): The event time column
+        resolvable (bool): Whether the event table has a `resolved` column
+
+    Returns:
+        tuple: The list of SQL conditions and the list of their parameters
+
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+    conditions = []
+    params = []
+
+    def column(name):
+        return sql.Identifier(alias, name)
+
+    business_id = parse_int_arg(args, "business_id")
+    if business_id is not None:
+        conditions.append(sql.SQL("{} = %s").format(column("business_id")))
+        params.append(business_id)
+
+    device_id = parse_int_arg(args, "device_id")
+    if device_id is not None:
+        conditions.append(sql.SQL("{} = %s").format(column("device_id")))
+        params.append(device_id)
+
+    types = [t for t in args.get("type", "").split(",") if t]
+    if types:
+        conditions.append(sql.SQL("{} = ANY(%s)").format(column(type_column)))
+        params.append(event_type_codes(type_column[: -len("_type")], types))
+
+    if resolvable:
+        resolved = args.get("resolved", "false").lower()
+        if resolved not in RESOLVED_VALUES:
+            raise ValueError("'resolved' must be 'true', 'false' or 'all'")
+        if RESOLVED_VALUES[resolved] is not None:
+            conditions.append(sql.SQL("{} = %s").format(column("resolved")))
+            params.append(RESOLVED_VALUES[resolved])
+
+    since = parse_time_arg(args, "since")
+    if since is not None:
+        conditions.append(sql.SQL("{} >= %s").format(column(time_column)))
+        params.append(since)
+
+    until = parse_time_arg(args, "until")
+    if until is not None:
+        conditions.append(sql.SQL("{} < %s").format(column(time_column)))
+        params.append(until)
+
+    return conditions, params
+
+
+def parse_row_filter(args, columns: tuple, type_column: str, resolvable: bool) -> tuple:
+    """
+    Compiles the listing filters of the request into a predicate over row
+    tuples, for listings that are not read from the database.
+
+    Supports the query parameters of `parse_listing_filters`. The time range
+    is returned separately so the reader can skip rows outside of it.
+
+    Args:
+        args: The request query parameters
+        columns (tuple): The column names of the rows
+        type_column (str): The event type column
+        resolvable (bool): Whether the rows have a `resolved` column
+
+    Returns:
+        tuple: The predicate, the `since` and the `until` timestamps
+
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+    checks = []
+
+    business_id = parse_int_arg(args, "business_id")
+    if business_id is not None:
+        checks.append((columns.index("business_id"), {business_id}))
+
+    device_id = parse_int_arg(args, "device_id")
+    if device_id is not None:
+        checks.append((columns.index("device_id"), {device_id}))
+
+    types = [t for t in args.get("type", "").split(",") if t]
+    if types:
+        checks.append(
+            (
+                columns.index(type_column),
+                set(event_type_codes(type_column[: -len("_type")], types)),
+            )
+        )
+
+    if resolvable:
+        resolved = args.get("resolved", "false").lower()
+        if resolved not in RESOLVED_VALUES:
+            raise ValueError("'resolved' must be 'true', 'false' or 'all'")
+        if RESOLVED_VALUES[resolved] is not None:
+            checks.append((columns.index("resolved"), {RESOLVED_VALUES[resolved]}))
+
+    def predicate(row: tuple) -> bool:
+        return all(row[index] in values for index, values in checks)
+
+    return predicate, parse_time_arg(args, "since"), parse_time_arg(args, "until")
@@ -0,0 +1,98 @@
+"""
+Geospatial utilities.
+Parses the map viewport parameters and compiles them into predicates served by
+the GiST index on `point(businesses.lon, businesses.lat)`.
+"""
+
+from psycopg2 import sql
+
+# Web map zoom levels accepted by the map endpoints
+MIN_ZOOM = 0
+MAX_ZOOM = 22
+
+
+def parse_bbox(args) -> tuple:
+    """
+    Parses the `bbox` query parameter, formatted as `west,south,east,north`
+    in degrees. A west edge greater than the east edge denotes a box crossing
+    the antimeridian.
+
+    Args:
+        args: The request query parameters
+
+    Returns:
+        tuple: The `(west, south, east, north)` box
+
+    Raises:
+        ValueError: If the parameter is missing or invalid
+    """
+    value = args.get("bbox")
+    if value is None:
+        raise ValueError("'bbox' is required, formatted as 'west,south,east,north'")
+
+    try:
+        west, south, east, north = (float(part) for part in value.split(","))
+    except ValueError as e:
+        raise ValueError("'bbox' must be formatted as 'west,south,east,north'") from e
+
+    if not (-180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError("'bbox' longitudes must be between -180 and 180")
+    if not -90 <= south <= north <= 90:
+        raise ValueError("'bbox' latitudes must be between -90 and 90, south first")
+
+    return west, south, east, north
+
+
+def parse_zoom(args, default: int = None) -> int:
+    """
+    Parses the `zoom` query parameter.
+
+    Args:
+        args: The request query parameters
+        default (int, optional): The value used when the parameter is absent
+
+    Returns:
+        int: The zoom level
+
+    Raises:
+        ValueError: If the parameter is invalid
+    """
+    value = args.get("zoom")
+    if value is None:
+        if default is None:
+            raise ValueError("'zoom' is required")
+        return default
+
+    try:
+        zoom = int(value)
+    except ValueError as e:
+        raise ValueError("'zoom' must be an integer") from e
+
+    if not MIN_ZOOM <= zoom <= MAX_ZOOM:
+        raise ValueError(f"'zoom' must be between {MIN_ZOOM} and {MAX_ZOOM}")
+    return zoom
+
+
+def bbox_condition(bbox: tuple, alias: str = "b") -> tuple:
+    """
+    Compiles a box into an index-backed containment predicate on
+    `point(lon, lat)`, split in two when the box crosses the antimeridian.
+
+    Args:
+        bbox (tuple): The `(west, south, east, north)` box
+        alias (str): The alias of the businesses table in the query
+
+    Returns:
+        tuple: The SQL condition and its parameters
+    """
+    west, south, east, north = bbox
+    location = sql.SQL("point({}, {})").format(
+        sql.Identifier(alias, "lon"), sql.Identifier(alias, "lat")
+    )
+    contained = sql.SQL("{} <@ box(point(%s, %s), point(%s, %s))").format(location)
+
+    if west <= east:
+        return contained, [west, south, east, north]
+
+    condition = sql.SQL("({} OR {})").format(contained, contained)
+    return condition, [west, south, 180.0, north, -180.0, south, east, north]
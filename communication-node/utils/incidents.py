@@ -0,0 +1,114 @@
+"""
+Open incident counter utilities.
+Reads and repairs the open incident counters stored on the devices and
+businesses, which replace the per-read EXISTS lookups on the event tables.
+
+`security_devices.open_alert_count` and `businesses.open_alert_count` count
+the unresolved alerts, a business only counting its devices not deleted.
+`security_devices.malfunction_mask` holds one bit per sensor with an
+unresolved malfunction, see `SENSOR_BITS`. Statement-level triggers update
+them in the same transaction as every insert, resolve and delete of events,
+so they only drift after manual edits with the triggers disabled, which
+`repair_incident_counters` corrects.
+"""
+
+from utils.logger_config import get_logger
+
+# Configure logging
+logger = get_logger("incidents")
+
+# Sensor Status
+SENSOR_NOT_USED = -1
+SENSOR_HEALTHY = 1
+SENSOR_MALFUNCTION = 2
+
+# Bits of `security_devices.malfunction_mask`, the SQL `sensor_bit` function
+# maps the codes of the sensor malfunction types the same way
+SENSOR_BITS = {
+    "motion_sensor": 1,
+    "sound_sensor": 2,
+    "gas_sensor": 4,
+    "fire_sensor": 8,
+}
+
+# Bit of the malfunctions of any other type
+OTHER_MALFUNCTION_BIT = 16
+
+
+def sensor_malfunctioning(malfunction_mask: int, sensor: str) -> bool:
+    """
+    Tells whether a sensor has unresolved malfunctions.
+
+    Args:
+        malfunction_mask (int): The `malfunction_mask` of the device
+        sensor (str): The sensor column, e.g. `gas_sensor`
+
+    Returns:
+        bool: True if the bit of the sensor is set
+    """
+    return bool(malfunction_mask & SENSOR_BITS[sensor])
+
+
+def repair_incident_counters(cur) -> tuple:
+    """
+    Recomputes the open incident counters from the event tables.
+
+    The devices are locked first, so events inserted or resolved meanwhile
+    wait for the repair and apply their change on top of the repaired value.
+    Only the rows whose counters drifted are written.
+
+    Args:
+        cur: An open database cursor, the caller commits
+
+    Returns:
+        tuple: The number of devices and of businesses repaired
+    """
+    cur.execute("SELECT 1 FROM security_devices ORDER BY id FOR NO KEY UPDATE")
+    cur.execute(
+        """
+        UPDATE security_devices sd
+        SET open_alert_count = c.open_alert_count,
+            malfunction_mask = c.malfunction_mask
+        FROM (
+            SELECT d.id,
+                   (SELECT COUNT(*) FROM alerts a
+                    WHERE a.device_id = d.id AND a.resolved = FALSE) AS open_alert_count,
+                   COALESCE((
+                       SELECT bit_or(sensor_bit(m.malfunction_type))
+                       FROM malfunctions m
+                       WHERE m.device_id = d.id AND m.resolved = FALSE
+                   ), 0) AS malfunction_mask
+            FROM security_devices d
+        ) c
+        WHERE sd.id = c.id
+          AND (sd.open_alert_count, sd.malfunction_mask)
+              IS DISTINCT FROM (c.open_alert_count, c.malfunction_mask)
+        """
+    )
+    devices = cur.rowcount
+
+    cur.execute("SELECT 1 FROM businesses ORDER BY id FOR NO KEY UPDATE")
+    cur.execute(
+        """
+        UPDATE businesses b
+        SET open_alert_count = c.open_alert_count
+        FROM (
+            SELECT b.id, COALESCE(SUM(sd.open_alert_count), 0) AS open_alert_count
+            FROM businesses b
+            LEFT JOIN security_devices sd
+                ON sd.business_id = b.id AND sd.deleted_at IS NULL
+            GROUP BY b.id
+        ) c
+        WHERE b.id = c.id AND b.open_alert_count <> c.open_alert_count
+        """
+    )
+    businesses = cur.rowcount
+
+    if devices or businesses:
+        logger.warning(
+            "Repaired the open incident counters of %s devices and %s businesses",
+            devices,
+            businesses,
+        )
+
+    return devices, businesses
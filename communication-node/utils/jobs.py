@@ -0,0 +1,64 @@
+"""
+Background job utilities.
+Tracks the status and timing shared by the bulk resolve and purge jobs.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+
+def utc_now() -> datetime:
+    """
+    Returns the current time in UTC.
+    """
+    return datetime.now(timezone.utc)
+
+
+@dataclass(slots=True)
+class JobRun:
+    """
+    The run of a background job: its status, batch count and timing.
+
+    A run goes from its initial status to `running`, then to `done` or
+    `failed`. It is finished once `finished_at` is set, whatever its status.
+    """
+
+    status: str
+    batches: int = 0
+    queued_at: datetime = field(default_factory=utc_now)
+    started_at: datetime = None
+    finished_at: datetime = None
+    error: str = None
+
+    def start(self):
+        """
+        Marks the job as running.
+        """
+        self.status = "running"
+        self.started_at = utc_now()
+
+    def fail(self, error: str):
+        """
+        Marks the job as failed with an error message safe to show to clients.
+        """
+        self.status = "failed"
+        self.error = error
+
+    def finish(self):
+        """
+        Records the end of the job, successful or not.
+        """
+        self.finished_at = utc_now()
+
+    def to_dict(self) -> dict:
+        """
+        Converts the run to the JSON fields of its job.
+        """
+        return {
+            "status": self.status,
+            "batches": self.batches,
+            "queued_at": self.queued_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
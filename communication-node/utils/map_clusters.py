@@ -0,0 +1,287 @@
+"""
+Map clustering utilities.
+Keeps grid clusters of the business locations for every zoom level in memory
+and updates them incrementally as businesses and their alert states change.
+"""
+
+import math
+from threading import Lock
+
+from utils.logger_config import get_logger
+
+# Configure logging
+logger = get_logger("map_clusters")
+
+# Cluster alert states, a cluster carries the highest state of its businesses
+STATE_NORMAL = 0
+STATE_MALFUNCTION = 1
+STATE_ALERT = 2
+
+# Highest zoom level with clusters, past it the map shows individual pins
+MAX_CLUSTER_ZOOM = 16
+
+# Side of a grid cell in screen pixels, on 256 pixel map tiles
+CELL_PIXELS = 64
+
+# Web Mercator latitude limit
+MAX_LATITUDE = 85.05112878
+
+BUSINESS_STATES_QUERY = """
+    SELECT b.id, b.lat, b.lon,
+           b.open_alert_count > 0 AS alert,
+           EXISTS (
+               SELECT 1
+               FROM security_devices sd
+               WHERE sd.business_id = b.id AND sd.deleted_at IS NULL
+                 AND sd.malfunction_mask <> 0
+           ) AS malfunction
+    FROM businesses b
+    WHERE b.deleted_at IS NULL
+"""
+
+
+def project(lat: float, lon: float) -> tuple:
+    """
+    Projects a location to Web Mercator coordinates in the unit square.
+
+    Args:
+        lat (float): The latitude in degrees
+        lon (float): The longitude in degrees
+
+    Returns:
+        tuple: The `(x, y)` coordinates, y growing southwards
+    """
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    sin_lat = math.sin(math.radians(lat))
+    x = (lon + 180.0) / 360.0
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return x, y
+
+
+def grid_cell(x: float, y: float, zoom: int) -> tuple:
+    """
+    Returns the grid cell of projected coordinates at a zoom level.
+
+    Args:
+        x (float): The projected x coordinate
+        y (float): The projected y coordinate
+        zoom (int): The zoom level
+
+    Returns:
+        tuple: The `(column, row)` of the cell
+    """
+    cells = (256 << zoom) // CELL_PIXELS
+    return (
+        min(int(x * cells), cells - 1),
+        min(int(y * cells), cells - 1),
+    )
+
+
+class Cluster:
+    """
+    The businesses of one grid cell at one zoom level.
+    """
+
+    __slots__ = ("count", "lat_sum", "lon_sum", "state_counts", "id_xor")
+
+    def __init__(self):
+        self.count = 0
+        self.lat_sum = 0.0
+        self.lon_sum = 0.0
+        self.state_counts = [0, 0, 0]
+        # XOR of the business IDs, the ID of the business when it is alone
+        self.id_xor = 0
+
+    @property
+    def state(self) -> int:
+        """
+        Returns the highest alert state of the businesses in the cluster.
+        """
+        for state in (STATE_ALERT, STATE_MALFUNCTION):
+            if self.state_counts[state]:
+                return state
+        return STATE_NORMAL
+
+    def to_dict(self) -> dict:
+        """
+        Converts the cluster to its JSON representation.
+        """
+        data = {
+            "lat": self.lat_sum / self.count,
+            "lon": self.lon_sum / self.count,
+            "count": self.count,
+            "state": self.state,
+        }
+        if self.count == 1:
+            data["business_id"] = self.id_xor
+        return data
+
+
+class MapClusters:
+    """
+    Process-wide grid cluster index of the business locations.
+
+    The index is loaded with one query on first use. Afterwards the write
+    paths, and `ChangeListener` for the writes of the other processes, mark
+    the businesses they changed as dirty, and the next read reloads only
+    those businesses and moves them between clusters, so a change costs
+    O(zoom levels) instead of a rebuild. Businesses are marked dirty before
+    the version bump of the write, so a read served after the bump never
+    caches clusters missing the change.
+    """
+
+    _businesses = {}
+    _clusters = [{} for _ in range(MAX_CLUSTER_ZOOM + 1)]
+    _dirty = set()
+    _loaded = False
+    _lock = Lock()
+    _refresh_lock = Lock()
+
+    @classmethod
+    def mark_dirty(cls, *business_ids: int):
+        """
+        Schedules businesses to be reloaded before the next read.
+
+        Args:
+            *business_ids: The IDs of the businesses added, deleted or whose
+                           alert state may have changed
+        """
+        with cls._lock:
+            cls._dirty.update(i for i in business_ids if i is not None)
+
+    @classmethod
+    def reset(cls):
+        """
+        Schedules a full reload before the next read, for changes whose
+        businesses are unknown.
+        """
+        with cls._lock:
+            cls._loaded = False
+            cls._dirty.clear()
+
+    @classmethod
+    def refresh(cls, cur):
+        """
+        Loads the index on first use, then applies the pending dirty businesses.
+
+        Refreshes are serialized, so an older refresh can never overwrite the
+        state loaded by a newer one.
+
+        Args:
+            cur: An open database cursor
+        """
+        with cls._refresh_lock:
+            with cls._lock:
+                loaded = cls._loaded
+                dirty = list(cls._dirty)
+                cls._dirty.clear()
+
+            if not loaded:
+                cur.execute(BUSINESS_STATES_QUERY)
+                rows = cur.fetchall()
+                with cls._lock:
+                    cls._businesses = {}
+                    cls._clusters = [{} for _ in range(MAX_CLUSTER_ZOOM + 1)]
+                    for row in rows:
+                        cls._upsert(row)
+                    cls._loaded = True
+                logger.info("Loaded map clusters for %s businesses", len(rows))
+                return
+
+            if not dirty:
+                return
+
+            rows = None
+            try:
+                cur.execute(f"{BUSINESS_STATES_QUERY} AND b.id = ANY(%s)", (dirty,))
+                rows = cur.fetchall()
+            finally:
+                if rows is None:
+                    cls.mark_dirty(*dirty)
+
+            with cls._lock:
+                for business_id in dirty:
+                    cls._remove(business_id)
+                for row in rows:
+                    cls._upsert(row)
+            logger.debug("Refreshed map clusters of %s businesses", len(dirty))
+
+    @classmethod
+    def clusters(cls, zoom: int, bbox: tuple = None) -> list:
+        """
+        Returns the clusters of a zoom level, optionally within a box.
+
+        Args:
+            zoom (int): The zoom level, at most `MAX_CLUSTER_ZOOM`
+            bbox (tuple, optional): The `(west, south, east, north)` box
+
+        Returns:
+            list: The clusters in their JSON representation
+        """
+        with cls._lock:
+            result = [cluster.to_dict() for cluster in cls._clusters[zoom].values()]
+
+        if bbox is None:
+            return result
+
+        west, south, east, north = bbox
+
+        def visible(cluster):
+            if not south <= cluster["lat"] <= north:
+                return False
+            if west <= east:
+                return west <= cluster["lon"] <= east
+            return cluster["lon"] >= west or cluster["lon"] <= east
+
+        return [cluster for cluster in result if visible(cluster)]
+
+    @classmethod
+    def _upsert(cls, row: tuple):
+        """
+        Adds a business, given as a row of `BUSINESS_STATES_QUERY`, to the
+        clusters of every zoom level. Caller holds the lock.
+        """
+        business_id, lat, lon, alert, malfunction = row
+        cls._remove(business_id)
+
+        if alert:
+            state = STATE_ALERT
+        elif malfunction:
+            state = STATE_MALFUNCTION
+        else:
+            state = STATE_NORMAL
+
+        x, y = project(lat, lon)
+        cells = tuple(grid_cell(x, y, zoom) for zoom in range(MAX_CLUSTER_ZOOM + 1))
+        cls._businesses[business_id] = (lat, lon, state, cells)
+
+        for zoom, cell in enumerate(cells):
+            cluster = cls._clusters[zoom].get(cell)
+            if cluster is None:
+                cluster = cls._clusters[zoom][cell] = Cluster()
+            cluster.count += 1
+            cluster.lat_sum += lat
+            cluster.lon_sum += lon
+            cluster.state_counts[state] += 1
+            cluster.id_xor ^= business_id
+
+    @classmethod
+    def _remove(cls, business_id):
+        """
+        Removes a business from the clusters of every zoom level. Caller holds the lock.
+        """
+        entry = cls._businesses.pop(business_id, None)
+        if entry is None:
+            return
+
+        lat, lon, state, cells = entry
+        for zoom, cell in enumerate(cells):
+            cluster = cls._clusters[zoom][cell]
+            cluster.count -= 1
+            if not cluster.count:
+                del cls._clusters[zoom][cell]
+                continue
+            cluster.lat_sum -= lat
+            cluster.lon_sum -= lon
+            cluster.state_counts[state] -= 1
+            cluster.id_xor ^= business_id
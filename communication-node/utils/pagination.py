@@ -0,0 +1,233 @@
+"""
+Keyset pagination utilities.
+Pages through time-ordered listings on `(time, id)` so deep pages cost the same as the first.
+"""
+
+import base64
+import binascii
+import heapq
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from psycopg2 import sql
+
+# Upper bound for the `limit` query parameter
+MAX_PAGE_LIMIT = 500
+
+
+@dataclass(slots=True)
+class PageRequest:
+    """
+    A validated page request parsed from the query string.
+    """
+
+    limit: int
+    before: tuple = None
+    after: tuple = None
+
+
+def encode_cursor(time: datetime, row_id: int) -> str:
+    """
+    Encodes a `(time, id)` position as an opaque, URL-safe cursor.
+
+    Args:
+        time (datetime): The time of the row
+        row_id (int): The ID of the row
+
+    Returns:
+        str: The cursor
+    """
+    raw = f"{time.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor
+
+    Returns:
+        tuple: The `(time, id)` position
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        time, row_id = raw.split("|")
+        return datetime.fromisoformat(time), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+
+def parse_page_args(args) -> PageRequest:
+    """
+    Parses the `limit`, `before` and `after` query parameters.
+
+    Args:
+        args: The request query parameters
+
+    Returns:
+        PageRequest: The page request, or None if no pagination was requested
+
+    Raises:
+        ValueError: If the parameters are invalid
+    """
+    limit = args.get("limit")
+    before = args.get("before")
+    after = args.get("after")
+
+    if limit is None and before is None and after is None:
+        return None
+
+    if before is not None and after is not None:
+        raise ValueError("Use either 'before' or 'after', not both")
+
+    try:
+        limit = int(limit) if limit is not None else MAX_PAGE_LIMIT
+    except ValueError as e:
+        raise ValueError("'limit' must be an integer") from e
+
+    if not 1 <= limit <= MAX_PAGE_LIMIT:
+        raise ValueError(f"'limit' must be between 1 and {MAX_PAGE_LIMIT}")
+
+    return PageRequest(
+        limit,
+        before=decode_cursor(before) if before is not None else None,
+        after=decode_cursor(after) if after is not None else None,
+    )
+
+
+def keyset_query(base_query, time_column: str, id_column: str, page: PageRequest):
+    """
+    Appends the keyset predicate, ordering and limit of a page to a listing query.
+
+    Pages are always returned newest first. When paging forward with `after`,
+    the rows are read oldest first and must be reversed with `page_rows`.
+
+    Args:
+        base_query (sql.Composable): The listing query, ending with its WHERE clause
+        time_column (str): The qualified time column, e.g. `a.alert_time`
+        id_column (str): The qualified ID column, e.g. `a.id`
+        page (PageRequest): The requested page
+
+    Returns:
+        tuple: The composed query and its parameters
+    """
+    key = sql.SQL("({}, {})").format(
+        sql.Identifier(*time_column.split(".")), sql.Identifier(*id_column.split("."))
+    )
+
+    if page.after is not None:
+        predicate = sql.SQL("AND {} > (%s, %s)").format(key)
+        order = sql.SQL("ORDER BY {} ASC, {} ASC")
+        params = page.after
+    elif page.before is not None:
+        predicate = sql.SQL("AND {} < (%s, %s)").format(key)
+        order = sql.SQL("ORDER BY {} DESC, {} DESC")
+        params = page.before
+    else:
+        predicate = sql.SQL("")
+        order = sql.SQL("ORDER BY {} DESC, {} DESC")
+        params = ()
+
+    query = sql.SQL("{base} {predicate} {order} LIMIT %s").format(
+        base=base_query,
+        predicate=predicate,
+        order=order.format(
+            sql.Identifier(*time_column.split(".")),
+            sql.Identifier(*id_column.split(".")),
+        ),
+    )
+    # One extra row tells whether another page exists
+    return query, (*params, page.limit + 1)
+
+
+def page_rows(rows: list, page: PageRequest, time_index: int, id_index: int) -> tuple:
+    """
+    Trims the extra row fetched by `keyset_query` and computes the page cursors.
+
+    Args:
+        rows (list): The rows returned by the page query
+        page (PageRequest): The requested page
+        time_index (int): Position of the time column in a row
+        id_index (int): Position of the ID column in a row
+
+    Returns:
+        tuple: The rows newest first, the cursor of the next (older) page
+               and the cursor of the previous (newer) page
+    """
+    has_more = len(rows) > page.limit
+    rows = rows[: page.limit]
+
+    if page.after is not None:
+        rows.reverse()
+        has_older, has_newer = True, has_more
+    else:
+        has_older, has_newer = has_more, page.before is not None
+
+    def cursor_of(row):
+        return encode_cursor(row[time_index], row[id_index])
+
+    next_cursor = cursor_of(rows[-1]) if rows and has_older else None
+    prev_cursor = cursor_of(rows[0]) if rows and has_newer else None
+
+    return rows, next_cursor, prev_cursor
+
+
+def select_page_rows(rows, page: PageRequest, time_index: int, id_index: int) -> list:
+    """
+    Selects the rows of a page from rows already sorted newest first, the
+    in-memory counterpart of `keyset_query`. The result is passed to `page_rows`.
+
+    Args:
+        rows: The rows, newest first
+        page (PageRequest): The requested page
+        time_index (int): Position of the time column in a row
+        id_index (int): Position of the ID column in a row
+
+    Returns:
+        list: Up to `page.limit + 1` rows, oldest first when paging with `after`
+    """
+
+    def key(row):
+        return row[time_index], row[id_index]
+
+    if page.after is not None:
+        # The rows closest to the cursor are the last ones newer than it
+        newer = deque(maxlen=page.limit + 1)
+        for row in rows:
+            if key(row) <= page.after:
+                break
+            newer.append(row)
+        return list(reversed(newer))
+
+    if page.before is not None:
+        rows = (row for row in rows if key(row) < page.before)
+
+    return list(islice(rows, page.limit + 1))
+
+
+def merge_rows(hot, archived, time_index: int, id_index: int, newest_first=True):
+    """
+    Merges two row iterables sorted on `(time, id)` into one, lazily.
+
+    Args:
+        hot: The rows read from the event table
+        archived: The rows read from the event archive
+        time_index (int): Position of the time column in a row
+        id_index (int): Position of the ID column in a row
+        newest_first (bool): Whether both iterables are sorted newest first
+
+    Returns:
+        iterator: The rows of both iterables, in the same order
+    """
+    return heapq.merge(
+        hot,
+        archived,
+        key=lambda row: (row[time_index], row[id_index]),
+        reverse=newest_first,
+    )
@@ -0,0 +1,293 @@
+"""
+Event table partitioning utilities.
+Creates the monthly partitions of the event tables ahead of time and enforces
+their retention by dropping whole partitions instead of deleting rows.
+
+Partitions are named `<table>_<YYYY>_<MM>` and cover one UTC calendar month.
+Rows outside of every monthly partition, e.g. device clocks far off, land in
+the `<table>_default` partition, so ingestion never fails on a missing month.
+"""
+
+import re
+from datetime import datetime, timezone
+
+from psycopg2 import sql
+
+from utils.change_listener import notify_table_change
+from utils.logger_config import get_logger
+
+# Configure logging
+logger = get_logger("partitions")
+
+# Number of months created ahead of the current one
+DEFAULT_MONTHS_AHEAD = 3
+
+# Partitioned event tables: time column, type column, event name of the
+# trigger-maintained counters (None if not counted) and whether the table
+# has a `resolved` column
+PARTITIONED_TABLES = {
+    "alerts": ("alert_time", "alert_type", "alert", True),
+    "malfunctions": ("malfunction_time", "malfunction_type", "malfunction", True),
+    "device_logs": ("log_time", "log_type", None, False),
+}
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """
+    Moves the first day of a month by a number of months.
+
+    Args:
+        month (datetime): The first instant of a UTC month
+        months (int): The number of months to move, negative to move back
+
+    Returns:
+        datetime: The first instant of the resulting UTC month
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def current_month() -> datetime:
+    """
+    Returns the first instant of the current UTC month.
+    """
+    now = datetime.now(timezone.utc)
+    return datetime(now.year, now.month, 1, tzinfo=timezone.utc)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    """
+    Returns the name of the partition of a table covering a month.
+    """
+    return f"{table}_{month.year:04d}_{month.month:02d}"
+
+
+def list_partitions(cur, table: str) -> list:
+    """
+    Lists the monthly partitions of an event table, oldest first.
+
+    Args:
+        cur: An open database cursor
+        table (str): The partitioned table
+
+    Returns:
+        list: The `(name, month)` of each monthly partition
+    """
+    cur.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        """,
+        (table,),
+    )
+
+    pattern = re.compile(rf"^{re.escape(table)}_(\d{{4}})_(\d{{2}})$")
+    partitions = []
+    for (name,) in cur.fetchall():
+        match = pattern.match(name)
+        if match:
+            month = datetime(
+                int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc
+            )
+            partitions.append((name, month))
+
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partitions(cur, table: str, first_month: datetime, months: int) -> list:
+    """
+    Creates the missing monthly partitions of an event table.
+
+    Args:
+        cur: An open database cursor
+        table (str): The partitioned table
+        first_month (datetime): The first instant of the first UTC month
+        months (int): The number of consecutive months to cover
+
+    Returns:
+        list: The names of the partitions created
+    """
+    existing = {name for name, _ in list_partitions(cur, table)}
+
+    created = []
+    for offset in range(months):
+        month = add_months(first_month, offset)
+        name = partition_name(table, month)
+        if name in existing:
+            continue
+
+        cur.execute(
+            sql.SQL(
+                "CREATE TABLE {} PARTITION OF {} FOR VALUES FROM (%s) TO (%s)"
+            ).format(sql.Identifier(name), sql.Identifier(table)),
+            (month, add_months(month, 1)),
+        )
+        created.append(name)
+        logger.info("Created partition %s", name)
+
+    return created
+
+
+def ensure_partitions(cur, months_ahead: int = DEFAULT_MONTHS_AHEAD) -> list:
+    """
+    Creates the partitions of every event table from the current month on.
+
+    Args:
+        cur: An open database cursor
+        months_ahead (int): The number of months to cover after the current one
+
+    Returns:
+        list: The names of the partitions created
+    """
+    created = []
+    for table in PARTITIONED_TABLES:
+        created += create_partitions(cur, table, current_month(), months_ahead + 1)
+    return created
+
+
+def lock_partition(cur, partition: str):
+    """
+    Locks a partition until the end of the transaction, so no row is added,
+    changed or removed between counting its rows and dropping it.
+
+    Args:
+        cur: An open database cursor
+        partition (str): The name of the partition
+    """
+    cur.execute(
+        sql.SQL("LOCK TABLE {} IN ACCESS EXCLUSIVE MODE").format(
+            sql.Identifier(partition)
+        )
+    )
+
+
+def has_unresolved_rows(cur, table: str, partition: str) -> bool:
+    """
+    Tells whether a partition of a resolvable event table has unresolved rows.
+
+    Args:
+        cur: An open database cursor
+        table (str): The partitioned table
+        partition (str): The name of the partition
+
+    Returns:
+        bool: True if an incident of the partition is still unresolved
+    """
+    if not PARTITIONED_TABLES[table][3]:
+        return False
+
+    cur.execute(
+        sql.SQL("SELECT EXISTS (SELECT 1 FROM {} WHERE resolved = FALSE)").format(
+            sql.Identifier(partition)
+        )
+    )
+    return cur.fetchone()[0]
+
+
+def drop_partition(
+    cur, table: str, partition: str, month: datetime, keep_counts: bool = False
+):
+    """
+    Drops a monthly partition of an event table.
+
+    Dropping a partition does not fire the delete triggers, so unless the
+    rows are kept elsewhere and `keep_counts` is set, they are subtracted
+    from the dashboard counters and the rollups of the month are removed.
+    The rows of soft deleted devices were subtracted already.
+    The change is announced to the API processes by hand.
+
+    Args:
+        cur: An open database cursor
+        table (str): The partitioned table
+        partition (str): The name of the partition
+        month (datetime): The first instant of the UTC month of the partition
+        keep_counts (bool): Keep the rows in the counters and rollups
+    """
+    _, type_column, event, _ = PARTITIONED_TABLES[table]
+    identifier = sql.Identifier(partition)
+
+    lock_partition(cur, partition)
+
+    if event is not None and not keep_counts:
+        bounds = (month, add_months(month, 1))
+        cur.execute(
+            sql.SQL(
+                """
+                UPDATE dashboard_counters c
+                SET value = c.value - p.count
+                FROM (
+                    SELECT %s || ':' || {type} AS name, COUNT(*) AS count
+                    FROM {partition} e
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM security_devices sd
+                        WHERE sd.id = e.device_id AND sd.deleted_at IS NOT NULL
+                    )
+                    GROUP BY {type}
+                ) p
+                WHERE c.name = p.name
+                """
+            ).format(type=sql.Identifier(type_column), partition=identifier),
+            (table,),
+        )
+        cur.execute(
+            """
+            DELETE FROM event_counts_daily
+            WHERE event = %s
+              AND day >= (%s AT TIME ZONE 'UTC')::date
+              AND day < (%s AT TIME ZONE 'UTC')::date
+            """,
+            (event, *bounds),
+        )
+        if table == "alerts":
+            cur.execute(
+                "DELETE FROM alert_rollups_hourly WHERE bucket >= %s AND bucket < %s",
+                bounds,
+            )
+            cur.execute(
+                """
+                DELETE FROM alert_rollups_daily
+                WHERE day >= (%s AT TIME ZONE 'UTC')::date
+                  AND day < (%s AT TIME ZONE 'UTC')::date
+                """,
+                bounds,
+            )
+
+    cur.execute(sql.SQL("DROP TABLE {}").format(identifier))
+    notify_table_change(cur, table)
+    logger.info("Dropped partition %s of %s", partition, table)
+
+
+def drop_expired_partitions(cur, table: str, retention_months: int) -> list:
+    """
+    Drops the monthly partitions of an event table that are past retention.
+
+    A partition is expired once its whole month is older than the retention
+    period. Partitions still holding unresolved incidents are kept until
+    those are resolved.
+
+    Args:
+        cur: An open database cursor
+        table (str): The partitioned table
+        retention_months (int): The number of months to keep, current one included
+
+    Returns:
+        list: The names of the partitions dropped
+    """
+    cutoff = add_months(current_month(), 1 - retention_months)
+
+    dropped = []
+    for name, month in list_partitions(cur, table):
+        if month >= cutoff:
+            break
+
+        lock_partition(cur, name)
+        if has_unresolved_rows(cur, table, name):
+            logger.warning("Kept partition %s, it has unresolved rows", name)
+            continue
+
+        drop_partition(cur, table, name, month)
+        dropped.append(name)
+
+    return dropped
@@ -0,0 +1,352 @@
+"""
+Purger utilities.
+Removes soft deleted businesses and devices together with their events in
+small batches, each in its own short transaction, so deleting a large client
+never holds locks or writes WAL long enough to stall ingestion.
+
+Deleting a business or device only sets its `deleted_at`, which hides it from
+every read and takes its events out of the dashboard counters at once. The
+purger then deletes the events of each device batch after batch, the device
+itself and finally the business. Purges run one at a time on a single
+background worker, to bound the load they add.
+"""
+
+import queue
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock, Thread
+
+import psycopg2
+from psycopg2 import sql
+
+from utils.change_tracker import ChangeTracker
+from utils.db import DatabaseManager
+from utils.jobs import JobRun
+from utils.logger_config import get_logger
+from utils.partitions import PARTITIONED_TABLES
+
+# Configure logging
+logger = get_logger("purger")
+
+# Event rows deleted per transaction
+PURGE_BATCH_SIZE = 1000
+
+# Seconds to yield to other requests between two batches
+PURGE_PAUSE = 0.1
+
+# Number of finished jobs kept for progress queries
+MAX_FINISHED_JOBS = 100
+
+
+@dataclass(slots=True)
+class PurgeJob:
+    """
+    The purge of a soft deleted business or device and its progress.
+    """
+
+    entity: str
+    entity_id: int
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    run: JobRun = field(default_factory=lambda: JobRun("queued"))
+    devices: int = None
+    devices_purged: int = 0
+    purged: dict = field(
+        default_factory=lambda: {table: 0 for table in PARTITIONED_TABLES}
+    )
+
+    def to_dict(self) -> dict:
+        """
+        Converts the job to its JSON representation.
+        """
+        return {
+            "id": self.id,
+            "entity": self.entity,
+            "entity_id": self.entity_id,
+            "devices": self.devices,
+            "devices_purged": self.devices_purged,
+            "purged": dict(self.purged),
+            **self.run.to_dict(),
+        }
+
+
+class PurgeJobs:
+    """
+    Process-wide queue of the purge jobs, drained by a single worker.
+
+    Queued and running jobs are always kept, finished ones only up to
+    `MAX_FINISHED_JOBS`.
+    """
+
+    _jobs = OrderedDict()
+    _queue = queue.Queue()
+    _worker = None
+    _lock = Lock()
+
+    @classmethod
+    def start(cls, entity: str, entity_id: int) -> PurgeJob:
+        """
+        Queues the purge of a soft deleted business or device.
+
+        Args:
+            entity (str): `business` or `device`
+            entity_id (int): The ID of the soft deleted row
+
+        Returns:
+            PurgeJob: The queued job
+        """
+        job = PurgeJob(entity, entity_id)
+        with cls._lock:
+            cls._jobs[job.id] = job
+
+            finished = [
+                j.id for j in cls._jobs.values() if j.run.finished_at is not None
+            ]
+            for job_id in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del cls._jobs[job_id]
+
+            if cls._worker is None or not cls._worker.is_alive():
+                cls._worker = Thread(target=cls._drain, daemon=True)
+                cls._worker.start()
+
+        cls._queue.put(job)
+        logger.info("Queued purge job %s of %s %s", job.id, entity, entity_id)
+        return job
+
+    @classmethod
+    def get(cls, job_id: str) -> PurgeJob:
+        """
+        Returns a job by ID, or None if it is unknown or was forgotten.
+        """
+        with cls._lock:
+            return cls._jobs.get(job_id)
+
+    @classmethod
+    def resume(cls) -> list:
+        """
+        Queues the purge of every row soft deleted but not purged yet, e.g.
+        after a restart interrupted the worker.
+
+        Devices of a soft deleted business are purged with their business.
+
+        Returns:
+            list: The queued jobs
+        """
+        connection = DatabaseManager.get_connection()
+        try:
+            with connection.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT 'business', id, deleted_at FROM businesses
+                    WHERE deleted_at IS NOT NULL
+                    UNION ALL
+                    SELECT 'device', sd.id, sd.deleted_at FROM security_devices sd
+                    JOIN businesses b ON sd.business_id = b.id
+                    WHERE sd.deleted_at IS NOT NULL AND b.deleted_at IS NULL
+                    ORDER BY 3
+                    """
+                )
+                pending = cur.fetchall()
+            connection.commit()
+        finally:
+            DatabaseManager.release_connection(connection)
+
+        return [cls.start(entity, entity_id) for entity, entity_id, _ in pending]
+
+    @classmethod
+    def _drain(cls):
+        """
+        Runs the queued jobs one after the other.
+        """
+        while True:
+            run_purge_job(cls._queue.get())
+
+
+def soft_delete(cur, entity: str, entity_id: int):
+    """
+    Soft deletes a business or device, hiding it from every read.
+
+    The devices of a business are soft deleted with it.
+
+    Args:
+        cur: An open database cursor
+        entity (str): `business` or `device`
+        entity_id (int): The ID of the row
+
+    Returns:
+        tuple: The business ID and the IDs of the devices soft deleted, or
+               None if the row does not exist or was already deleted
+    """
+    if entity == "business":
+        cur.execute(
+            """
+            WITH business AS (
+                UPDATE businesses SET deleted_at = NOW()
+                WHERE id = %s AND deleted_at IS NULL
+                RETURNING id
+            ),
+            devices AS (
+                UPDATE security_devices SET deleted_at = NOW()
+                WHERE business_id IN (SELECT id FROM business)
+                  AND deleted_at IS NULL
+                RETURNING id
+            )
+            SELECT id, ARRAY(SELECT id FROM devices ORDER BY id) FROM business
+            """,
+            (entity_id,),
+        )
+    else:
+        cur.execute(
+            """
+            UPDATE security_devices SET deleted_at = NOW()
+            WHERE id = %s AND deleted_at IS NULL
+            RETURNING business_id, ARRAY[id]
+            """,
+            (entity_id,),
+        )
+    return cur.fetchone()
+
+
+def purge_batch(table: str, device_id: int) -> int:
+    """
+    Deletes the next batch of events of a device in its own transaction.
+
+    Args:
+        table (str): The event table
+        device_id (int): The soft deleted device
+
+    Returns:
+        int: The number of rows deleted
+    """
+    time_column = PARTITIONED_TABLES[table][0]
+    query = sql.SQL(
+        """
+        DELETE FROM {table}
+        WHERE (id, {time}) IN (
+            SELECT id, {time} FROM {table} WHERE device_id = %s LIMIT %s
+        )
+        """
+    ).format(table=sql.Identifier(table), time=sql.Identifier(time_column))
+
+    connection = DatabaseManager.get_connection()
+    try:
+        with connection.cursor() as cur:
+            cur.execute(query, (device_id, PURGE_BATCH_SIZE))
+            deleted = cur.rowcount
+        connection.commit()
+    except psycopg2.Error:
+        connection.rollback()
+        raise
+    finally:
+        DatabaseManager.release_connection(connection)
+
+    return deleted
+
+
+def delete_soft_deleted(table: str, row_id: int) -> bool:
+    """
+    Deletes a soft deleted business or device once its events are gone.
+
+    Returns:
+        bool: True if the row was deleted
+    """
+    connection = DatabaseManager.get_connection()
+    try:
+        with connection.cursor() as cur:
+            cur.execute(
+                sql.SQL(
+                    "DELETE FROM {} WHERE id = %s AND deleted_at IS NOT NULL"
+                ).format(sql.Identifier(table)),
+                (row_id,),
+            )
+            deleted = cur.rowcount > 0
+        connection.commit()
+    except psycopg2.Error:
+        connection.rollback()
+        raise
+    finally:
+        DatabaseManager.release_connection(connection)
+
+    return deleted
+
+
+def purged_devices(job: PurgeJob) -> list:
+    """
+    Lists the soft deleted devices a job has to purge.
+    """
+    if job.entity == "device":
+        return [job.entity_id]
+
+    connection = DatabaseManager.get_connection()
+    try:
+        with connection.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id FROM security_devices
+                WHERE business_id = %s AND deleted_at IS NOT NULL
+                ORDER BY id
+                """,
+                (job.entity_id,),
+            )
+            devices = [row[0] for row in cur.fetchall()]
+        connection.commit()
+    finally:
+        DatabaseManager.release_connection(connection)
+
+    return devices
+
+
+def run_purge_job(job: PurgeJob):
+    """
+    Runs a purge job to completion, batch after batch.
+
+    The events of each device are deleted first, in batches of at most
+    `PURGE_BATCH_SIZE` rows with a pause in between, then the device. The
+    business goes last, once all of its devices are gone. A failed job
+    keeps the batches committed before the failure and is resumed by
+    `PurgeJobs.resume`.
+
+    Args:
+        job (PurgeJob): The job to run
+    """
+    job.run.start()
+
+    try:
+        devices = purged_devices(job)
+        job.devices = len(devices)
+
+        for device_id in devices:
+            for table in PARTITIONED_TABLES:
+                while True:
+                    deleted = purge_batch(table, device_id)
+                    job.run.batches += 1
+                    job.purged[table] += deleted
+
+                    if deleted:
+                        ChangeTracker.bump(table)
+                    if deleted < PURGE_BATCH_SIZE:
+                        break
+                    time.sleep(PURGE_PAUSE)
+
+            delete_soft_deleted("security_devices", device_id)
+            job.devices_purged += 1
+            time.sleep(PURGE_PAUSE)
+
+        if job.entity == "business":
+            delete_soft_deleted("businesses", job.entity_id)
+
+        job.run.status = "done"
+        logger.info(
+            "Purge job %s purged %s %s: %s devices, %s",
+            job.id,
+            job.entity,
+            job.entity_id,
+            job.devices_purged,
+            job.purged,
+        )
+    except psycopg2.Error as e:
+        job.run.fail("Database error while purging")
+        logger.error("Database error in purge job %s: %s", job.id, e)
+    finally:
+        job.run.finish()
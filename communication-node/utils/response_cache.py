@@ -0,0 +1,149 @@
+"""
+Response cache utilities.
+A bounded, in-process LRU of rendered read responses, invalidated by table tags.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+from utils.logger_config import get_logger
+
+# Configure logging
+logger = get_logger("response_cache")
+
+# Upper bound for the number of cached responses
+MAX_ENTRIES = 256
+
+# Responses larger than this are served but never cached
+MAX_ENTRY_BYTES = 4 * 1024 * 1024
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    """
+    A rendered response kept by `ResponseCache`.
+    """
+
+    body: bytes
+    status: int
+    headers: list
+    tags: tuple
+    expires_at: float = None
+
+
+class ResponseCache:
+    """
+    Process-wide read-through response cache.
+
+    Entries are tagged with the tables they were built from and dropped when
+    `invalidate` is called for one of those tables, which `ChangeTracker.bump`
+    does on every write path. Each tag also carries a generation counter: a
+    response is only stored if none of its tags were invalidated while it was
+    being computed, so a read racing a write can never cache stale data.
+    """
+
+    _entries = OrderedDict()
+    _keys_by_tag = {}
+    _generations = {}
+    _lock = Lock()
+
+    @classmethod
+    def generation(cls, *tags: str) -> tuple:
+        """
+        Snapshots the generation of the given tags before computing a response.
+
+        Args:
+            *tags: The tags of the response
+
+        Returns:
+            tuple: The generation snapshot to pass to `put`
+        """
+        with cls._lock:
+            return tuple(cls._generations.get(tag, 0) for tag in tags)
+
+    @classmethod
+    def get(cls, key):
+        """
+        Looks up a cached response and marks it as recently used.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            CachedResponse: The cached response, or None on a miss
+        """
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is None:
+                return None
+
+            if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                cls._remove(key)
+                return None
+
+            cls._entries.move_to_end(key)
+            return entry
+
+    @classmethod
+    def put(cls, key, entry: CachedResponse, generation: tuple):
+        """
+        Stores a response unless one of its tags changed since `generation`.
+
+        Args:
+            key: The cache key
+            entry (CachedResponse): The response to store
+            generation (tuple): The snapshot taken by `generation` before computing
+        """
+        if len(entry.body) > MAX_ENTRY_BYTES:
+            return
+
+        with cls._lock:
+            current = tuple(cls._generations.get(tag, 0) for tag in entry.tags)
+            if current != generation:
+                logger.debug("Skipped caching %s, invalidated while computing", key)
+                return
+
+            if key in cls._entries:
+                cls._remove(key)
+
+            cls._entries[key] = entry
+            for tag in entry.tags:
+                cls._keys_by_tag.setdefault(tag, set()).add(key)
+
+            while len(cls._entries) > MAX_ENTRIES:
+                cls._remove(next(iter(cls._entries)))
+
+    @classmethod
+    def invalidate(cls, *tags: str):
+        """
+        Drops every cached response tagged with one of the given tags.
+
+        Args:
+            *tags: The tags that changed, i.e. table names
+        """
+        with cls._lock:
+            for tag in tags:
+                cls._generations[tag] = cls._generations.get(tag, 0) + 1
+                for key in cls._keys_by_tag.pop(tag, ()):
+                    cls._remove(key)
+
+    @classmethod
+    def _remove(cls, key):
+        """
+        Removes an entry and its tag index references. Caller holds the lock.
+
+        Args:
+            key: The cache key
+        """
+        entry = cls._entries.pop(key, None)
+        if entry is None:
+            return
+
+        for tag in entry.tags:
+            keys = cls._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del cls._keys_by_tag[tag]
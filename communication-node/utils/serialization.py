@@ -0,0 +1,86 @@
+"""
+JSON serialization utilities.
+Maps cursor rows through precompiled column specs and encodes them with orjson,
+which serializes datetimes natively, instead of building ISO strings by hand.
+"""
+
+from decimal import Decimal
+import orjson
+from flask import Response
+
+
+def _default(value):
+    """
+    Encodes the values orjson does not support natively.
+
+    Args:
+        value: The value to encode
+
+    Returns:
+        The JSON compatible value
+
+    Raises:
+        TypeError: If the value cannot be encoded
+    """
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(obj) -> bytes:
+    """
+    Encodes an object as JSON.
+
+    Args:
+        obj: The object to encode
+
+    Returns:
+        bytes: The UTF-8 encoded JSON document
+    """
+    return orjson.dumps(obj, default=_default)
+
+
+def row_serializer(columns: tuple, converters: dict = None):
+    """
+    Compiles a column spec into a function converting row tuples to dicts.
+
+    Args:
+        columns (tuple): The JSON keys of the row columns, in SELECT order
+        converters (dict, optional): Maps JSON keys to functions converting
+            the stored value to its JSON representation
+
+    Returns:
+        callable: Converts a row tuple to its JSON representation
+    """
+    columns = tuple(columns)
+
+    if not converters:
+
+        def serialize(row: tuple) -> dict:
+            return dict(zip(columns, row))
+
+        return serialize
+
+    converters = tuple(converters.items())
+
+    def serialize_converted(row: tuple) -> dict:
+        data = dict(zip(columns, row))
+        for column, convert in converters:
+            data[column] = convert(data[column])
+        return data
+
+    return serialize_converted
+
+
+def json_response(payload, status: int = 200) -> Response:
+    """
+    Builds a JSON response encoded with orjson.
+
+    Args:
+        payload: The response body
+        status (int): The HTTP status code
+
+    Returns:
+        Response: The JSON response
+    """
+    return Response(dumps(payload), status=status, mimetype="application/json")
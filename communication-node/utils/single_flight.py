@@ -0,0 +1,89 @@
+"""
+Single-flight utilities.
+Coalesces concurrent identical computations so only one of them reaches the database.
+"""
+
+from dataclasses import dataclass, field
+from threading import Event, Lock
+
+from utils.logger_config import get_logger
+
+# Configure logging
+logger = get_logger("single_flight")
+
+# Seconds a follower waits for the leader before computing on its own
+DEFAULT_WAIT_TIMEOUT = 30
+
+
+@dataclass(slots=True)
+class Flight:
+    """
+    An in-flight computation shared by every request with the same key.
+    """
+
+    done: Event = field(default_factory=Event)
+    result: object = None
+
+    def wait(self, timeout: float = DEFAULT_WAIT_TIMEOUT):
+        """
+        Waits for the leader to finish the computation.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait
+
+        Returns:
+            The shared result, or None if the leader failed or timed out
+        """
+        if not self.done.wait(timeout):
+            return None
+        return self.result
+
+
+class SingleFlight:
+    """
+    Process-wide registry of in-flight computations.
+
+    The first caller for a key becomes the leader and must call `finish`,
+    with None if it failed. Callers arriving while the computation is running
+    become followers and wait on the flight instead of repeating it.
+    """
+
+    _flights = {}
+    _lock = Lock()
+
+    @classmethod
+    def begin(cls, key) -> tuple:
+        """
+        Joins the flight for a key, starting it if none is running.
+
+        Args:
+            key: The computation key
+
+        Returns:
+            tuple: The flight and whether the caller is its leader
+        """
+        with cls._lock:
+            flight = cls._flights.get(key)
+            if flight is not None:
+                logger.debug("Joining in-flight computation %s", key)
+                return flight, False
+
+            flight = cls._flights[key] = Flight()
+            return flight, True
+
+    @classmethod
+    def finish(cls, key, flight: Flight, result):
+        """
+        Publishes the result of a flight to its followers and ends it.
+
+        Args:
+            key: The computation key
+            flight (Flight): The flight returned by `begin`
+            result: The shared result, or None if the computation failed
+        """
+        with cls._lock:
+            if cls._flights.get(key) is flight:
+                del cls._flights[key]
+
+        flight.result = result
+        flight.done.set()
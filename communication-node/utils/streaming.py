@@ -0,0 +1,159 @@
+"""
+Streaming response utilities.
+Serves large listings from PostgreSQL server-side cursors without materializing them.
+"""
+
+import os
+import uuid
+from itertools import islice
+from threading import Lock
+import psycopg2
+from flask import Response
+
+from utils.db import DatabaseManager
+from utils.logger_config import get_logger
+from utils.serialization import dumps
+
+# Configure logging
+logger = get_logger("streaming")
+
+# Number of rows fetched from the server per round trip
+DEFAULT_ITERSIZE = 1000
+
+# Streams allowed to hold a pool connection at once, leaving the rest of the
+# pool (`DB_MAX_CONNECTIONS`, 10 by default) to the other requests
+DEFAULT_MAX_STREAMS = 4
+
+
+class StreamSlots:
+    """
+    Process-wide cap on the listings streamed from a server-side cursor.
+
+    A streamed listing keeps its pool connection until the client has read
+    the whole body, so slow clients could otherwise drain the pool.
+    """
+
+    _active = 0
+    _lock = Lock()
+
+    @classmethod
+    def acquire(cls) -> bool:
+        """
+        Takes a stream slot if one is free. A taken slot must be released.
+
+        Returns:
+            bool: Whether a slot was taken
+        """
+        limit = int(os.getenv("DB_MAX_STREAMS") or DEFAULT_MAX_STREAMS)
+        with cls._lock:
+            if cls._active >= limit:
+                return False
+            cls._active += 1
+            return True
+
+    @classmethod
+    def release(cls):
+        """
+        Frees a slot taken with `acquire`.
+        """
+        with cls._lock:
+            cls._active -= 1
+
+
+def open_server_side_cursor(connection, query, params=None, itersize=DEFAULT_ITERSIZE):
+    """
+    Declares a named (server-side) cursor for the given query.
+
+    Query errors are raised here, before any response has been started,
+    so callers can still answer with a regular error response.
+
+    Args:
+        connection: A connection borrowed from `DatabaseManager`
+        query: The SQL query to run
+        params (tuple): The query parameters
+        itersize (int): Number of rows fetched per network round trip
+
+    Returns:
+        cursor: The executed server-side cursor
+    """
+    cursor = connection.cursor(name=f"stream_{uuid.uuid4().hex}")
+    cursor.itersize = itersize
+    cursor.execute(query, params)
+    return cursor
+
+
+def stream_json_rows(connection, cursor, serialize_row, label: str) -> Response:
+    """
+    Streams the rows of a server-side cursor as the standard listing envelope:
+    `{"status": "success", "data": [...], "count": N}`.
+
+    The response owns the connection and releases it back to the pool when the
+    server closes it, once the stream is exhausted or the client disconnected.
+    This also covers HEAD requests, whose body is never iterated.
+
+    Args:
+        connection: The connection the cursor belongs to
+        cursor: A cursor returned by `open_server_side_cursor`
+        serialize_row (callable): Converts a row tuple to a JSON-serializable dict
+        label (str): Human readable resource name used in logs
+
+    Returns:
+        Response: A streaming JSON response
+    """
+
+    def generate():
+        count = 0
+        try:
+            yield b'{"status":"success","data":['
+            while True:
+                rows = cursor.fetchmany(cursor.itersize)
+                if not rows:
+                    break
+                # One encoder call per fetched batch, without the list brackets
+                chunk = dumps([serialize_row(row) for row in rows])[1:-1]
+                yield b"," + chunk if count else chunk
+                count += len(rows)
+            yield f'],"count":{count}}}'.encode()
+
+            logger.info("Successfully streamed %s %s", count, label)
+        except psycopg2.Error as e:
+            # Headers are already sent, the truncated body signals the failure
+            logger.error("Database error streaming %s: %s", label, e)
+            raise
+
+    response = Response(generate(), mimetype="application/json")
+    response.call_on_close(lambda: DatabaseManager.release_connection(connection))
+    return response
+
+
+def stream_json_iterable(rows, serialize_row, label: str, batch_size=DEFAULT_ITERSIZE):
+    """
+    Streams the rows of an iterable as the standard listing envelope, like
+    `stream_json_rows` does for listings that are not read from the database.
+
+    Args:
+        rows: An iterable of row tuples, consumed lazily
+        serialize_row (callable): Converts a row tuple to a JSON-serializable dict
+        label (str): Human readable resource name used in logs
+        batch_size (int): Number of rows encoded per chunk
+
+    Returns:
+        Response: A streaming JSON response
+    """
+    rows = iter(rows)
+
+    def generate():
+        count = 0
+        yield b'{"status":"success","data":['
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            chunk = dumps([serialize_row(row) for row in batch])[1:-1]
+            yield b"," + chunk if count else chunk
+            count += len(batch)
+        yield f'],"count":{count}}}'.encode()
+
+        logger.info("Successfully streamed %s %s", count, label)
+
+    return Response(generate(), mimetype="application/json")
@@ -82,3 +82,15 @@ class SocketIOClient:
     def emit_new_log(self, log_data):
         """Emit a new device log event with the provided data."""
         self._safe_emit("new-device_log", log_data)
+
+    def emit_alerts_resolved(self, resolved_data):
+        """Emit the IDs of the alerts resolved by one operation."""
+        self._safe_emit("alert-resolved", resolved_data)
+
+    def emit_malfunctions_resolved(self, resolved_data):
+        """Emit the IDs of the malfunctions resolved by one operation."""
+        self._safe_emit("malfunction-resolved", resolved_data)
+
+    def emit_entity_deleted(self, deleted_data):
+        """Emit the IDs of the businesses or devices deleted by one operation."""
+        self._safe_emit("entity-deleted", deleted_data)
@@ -34,6 +34,99 @@ export async function fetchAllBusinesses(_: Request, res: Response) {
     }
 }
 
+export async function fetchBusinessesInViewport(req: Request, res: Response) {
+    const API_KEY = process.env.COMMUNICATION_NODE_API_KEY;
+    const API_HOST = process.env.COMMUNICATION_NODE_HOST;
+
+    try {
+        if (API_HOST === undefined)
+            throw Error("COMMUNICATION_NODE_HOST not defined in .env file.");
+        if (API_KEY === undefined)
+            throw Error("COMMUNICATION_NODE_API_KEY not defined in .env file.");
+
+        const response = await axios.get(`${API_HOST}/api/businesses/viewport`, {
+            method: "GET",
+            headers: {
+                Authorization: `Bearer ${API_KEY}`,
+            },
+            params: req.query,
+        });
+
+        let businesses = provideUniqueIdentifier(response.data)["data"];
+        businesses.forEach((business: any) => {
+            if (business["devices"] !== undefined)
+                business["devices"] = provideUniqueIdentifier(business["devices"]);
+        });
+
+        res.json(businesses);
+    } catch (error) {
+        console.log(error);
+
+        res.status(500).json({
+            message: "Failed to fetch data.",
+        });
+    }
+}
+
+export async function fetchBusinessClusters(req: Request, res: Response) {
+    const API_KEY = process.env.COMMUNICATION_NODE_API_KEY;
+    const API_HOST = process.env.COMMUNICATION_NODE_HOST;
+
+    try {
+        if (API_HOST === undefined)
+            throw Error("COMMUNICATION_NODE_HOST not defined in .env file.");
+        if (API_KEY === undefined)
+            throw Error("COMMUNICATION_NODE_API_KEY not defined in .env file.");
+
+        const response = await axios.get(`${API_HOST}/api/businesses/clusters`, {
+            method: "GET",
+            headers: {
+                Authorization: `Bearer ${API_KEY}`,
+            },
+            params: req.query,
+        });
+
+        res.json(response.data);
+    } catch (error) {
+        console.log(error);
+
+        res.status(500).json({
+            message: "Failed to fetch data.",
+        });
+    }
+}
+
+export async function fetchBusiness(req: Request, res: Response) {
+    const API_KEY = process.env.COMMUNICATION_NODE_API_KEY;
+    const API_HOST = process.env.COMMUNICATION_NODE_HOST;
+
+    try {
+        if (API_HOST === undefined)
+            throw Error("COMMUNICATION_NODE_HOST not defined in .env file.");
+        if (API_KEY === undefined)
+            throw Error("COMMUNICATION_NODE_API_KEY not defined in .env file.");
+
+        const response = await axios.get(
+            `${API_HOST}/api/businesses/${req.params.id}`,
+            {
+                method: "GET",
+                headers: {
+                    Authorization: `Bearer ${API_KEY}`,
+                },
+            }
+        );
+
+        let business = provideUniqueIdentifier(response.data["data"]);
+        res.json(business);
+    } catch (error) {
+        console.log(error);
+
+        res.status(500).json({
+            message: "Failed to fetch data.",
+        });
+    }
+}
+
 export async function addNewBusiness(req: Request, res: Response) {
     const API_KEY = process.env.COMMUNICATION_NODE_API_KEY;
     const API_HOST = process.env.COMMUNICATION_NODE_HOST;
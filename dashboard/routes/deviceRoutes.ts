@@ -87,3 +87,142 @@ export async function solveMalfunction(req: Request, res: Response) {
         });
     }
 }
+
+async function startBulkResolve(path: string, req: Request, res: Response) {
+    const API_KEY = process.env.COMMUNICATION_NODE_API_KEY;
+    const API_HOST = process.env.COMMUNICATION_NODE_HOST;
+
+    try {
+        if (API_HOST === undefined)
+            throw Error("COMMUNICATION_NODE_HOST not defined in .env file.");
+        if (API_KEY === undefined)
+            throw Error("COMMUNICATION_NODE_API_KEY not defined in .env file.");
+
+        const response = await axios.post(`${API_HOST}${path}`, req.body, {
+            headers: {
+                Authorization: `Bearer ${API_KEY}`,
+            },
+        });
+
+        res.status(response.status).json(response.data);
+    } catch (error) {
+        console.log(error);
+
+        if (axios.isAxiosError(error) && error.response?.status === 400) {
+            res.status(400).json(error.response.data);
+            return;
+        }
+
+        res.status(500).json({
+            message: "Failed to update data.",
+        });
+    }
+}
+
+export async function solveAlerts(req: Request, res: Response) {
+    await startBulkResolve("/api/solve_alerts", req, res);
+}
+
+export async function solveMalfunctions(req: Request, res: Response) {
+    await startBulkResolve("/api/solve_malfunctions", req, res);
+}
+
+export async function fetchSolveJob(req: Request, res: Response) {
+    const API_KEY = process.env.COMMUNICATION_NODE_API_KEY;
+    const API_HOST = process.env.COMMUNICATION_NODE_HOST;
+
+    try {
+        if (API_HOST === undefined)
+            throw Error("COMMUNICATION_NODE_HOST not defined in .env file.");
+        if (API_KEY === undefined)
+            throw Error("COMMUNICATION_NODE_API_KEY not defined in .env file.");
+
+        const response = await axios.get(
+            `${API_HOST}/api/solve_jobs/${req.params.id}`,
+            {
+                headers: {
+                    Authorization: `Bearer ${API_KEY}`,
+                },
+            }
+        );
+
+        res.json(response.data);
+    } catch (error) {
+        console.log(error);
+
+        if (axios.isAxiosError(error) && error.response?.status === 404) {
+            res.status(404).json(error.response.data);
+            return;
+        }
+
+        res.status(500).json({
+            message: "Failed to fetch data.",
+        });
+    }
+}
+
+export async function fetchPurgeJob(req: Request, res: Response) {
+    const API_KEY = process.env.COMMUNICATION_NODE_API_KEY;
+    const API_HOST = process.env.COMMUNICATION_NODE_HOST;
+
+    try {
+        if (API_HOST === undefined)
+            throw Error("COMMUNICATION_NODE_HOST not defined in .env file.");
+        if (API_KEY === undefined)
+            throw Error("COMMUNICATION_NODE_API_KEY not defined in .env file.");
+
+        const response = await axios.get(
+            `${API_HOST}/api/purge_jobs/${req.params.id}`,
+            {
+                headers: {
+                    Authorization: `Bearer ${API_KEY}`,
+                },
+            }
+        );
+
+        res.json(response.data);
+    } catch (error) {
+        console.log(error);
+
+        if (axios.isAxiosError(error) && error.response?.status === 404) {
+            res.status(404).json(error.response.data);
+            return;
+        }
+
+        res.status(500).json({
+            message: "Failed to fetch data.",
+        });
+    }
+}
+
+export async function fetchDeviceStates(req: Request, res: Response) {
+    const API_KEY = process.env.COMMUNICATION_NODE_API_KEY;
+    const API_HOST = process.env.COMMUNICATION_NODE_HOST;
+
+    try {
+        if (API_HOST === undefined)
+            throw Error("COMMUNICATION_NODE_HOST not defined in .env file.");
+        if (API_KEY === undefined)
+            throw Error("COMMUNICATION_NODE_API_KEY not defined in .env file.");
+
+        const response = await axios.get(`${API_HOST}/api/devices/state`, {
+            headers: {
+                Authorization: `Bearer ${API_KEY}`,
+            },
+            params: req.query,
+        });
+
+        res.json(response.data);
+    } catch (error) {
+        console.log(error);
+
+        if (axios.isAxiosError(error) && error.response?.status === 400) {
+            res.status(400).json(error.response.data);
+            return;
+        }
+
+        res.status(500).json({
+            message: "Failed to fetch data.",
+        });
+    }
+}
@@ -55,10 +55,9 @@ export const fetchAlertsOverTime: RequestHandler<{ range: string }> = async (req
             method: 'get',
             url: `${API_HOST}/api/alerts_over_time`,
             headers: {
-                'Content-Type': 'application/json',
                 'Authorization': `Bearer ${API_KEY}`
             },
-            data: { range }
+            params: { range }
         });
 
         res.json(response.data);
@@ -7,6 +7,9 @@ import { v4 as uuidv4 } from "uuid";
 
 import {
     fetchAllBusinesses,
+    fetchBusinessesInViewport,
+    fetchBusinessClusters,
+    fetchBusiness,
     addNewBusiness,
     deleteBusiness,
     getAlerts,
@@ -19,6 +22,11 @@ import {
     deleteDevice,
     solveAlert,
     solveMalfunction,
+    solveAlerts,
+    solveMalfunctions,
+    fetchSolveJob,
+    fetchPurgeJob,
+    fetchDeviceStates,
 } from "./routes/deviceRoutes.js";
 import {
     addEmployee,
@@ -98,10 +106,28 @@ io.on("connection", (socket: Socket) => {
         console.log("Received new log from Flask:", logData);
         io.emit("update-device_logs", logData);
     });
+
+    socket.on("alert-resolved", (resolvedData) => {
+        console.log("Received resolved alerts from Flask:", resolvedData.ids.length);
+        io.emit("alert-resolved", resolvedData);
+    });
+
+    socket.on("malfunction-resolved", (resolvedData) => {
+        console.log("Received resolved malfunctions from Flask:", resolvedData.ids.length);
+        io.emit("malfunction-resolved", resolvedData);
+    });
+
+    socket.on("entity-deleted", (deletedData) => {
+        console.log("Received deleted entity from Flask:", deletedData);
+        io.emit("entity-deleted", deletedData);
+    });
 });
 
 // GET ROUTES
 app.get("/api/businesses", fetchAllBusinesses);
+app.get("/api/businesses/viewport", fetchBusinessesInViewport);
+app.get("/api/businesses/clusters", fetchBusinessClusters);
+app.get("/api/businesses/:id", fetchBusiness);
 app.post("/api/businesses", addNewBusiness);
 app.delete("/api/businesses/:id", deleteBusiness);
 app.get("/api/alerts", getAlerts);
@@ -110,6 +136,7 @@ app.post("/api/solve_business_malfunctions/:id", resetMalfunctions);
 app.get("/api/malfunctions", getMalfunctions);
 app.get("/api/devices_logs/", getDeviceLogs);
 
+app.get("/api/devices/state", fetchDeviceStates);
 app.delete("/api/devices/:id", deleteDevice);
 
 app.get("/api/employees", getEmployees);
@@ -118,6 +145,10 @@ app.delete("/api/employees/:id", deleteEmployee);
 
 app.post("/api/solve_alert/:id", solveAlert);
 app.post("/api/solve_malfunction/:id", solveMalfunction);
+app.post("/api/solve_alerts", solveAlerts);
+app.post("/api/solve_malfunctions", solveMalfunctions);
+app.get("/api/solve_jobs/:id", fetchSolveJob);
+app.get("/api/purge_jobs/:id", fetchPurgeJob);
 
 app.get("/api/stats", fetchStats);
 app.get("/api/alerts_over_time/:range", fetchAlertsOverTime);
@@ -0,0 +1,11 @@
+export type ResolvedEvent = {
+    ids: number[];
+    business_ids: number[];
+};
+
+export type EntityDeletedEvent = {
+    entity: "business" | "device";
+    ids: number[];
+    device_ids?: number[];
+    business_ids?: number[];
+};
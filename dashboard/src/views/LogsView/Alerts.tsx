@@ -4,6 +4,7 @@ import axios from "axios";
 import DOMPurify from "dompurify";
 import { io } from "socket.io-client";
 import { Alert } from "../../types/Alert";
+import { EntityDeletedEvent, ResolvedEvent } from "../../types/RealtimeEvents";
 import AlertRow from "../../components/AlertRow";
 import { createAlertsFromJson } from "../../utils/createObjectsFromJson";
 import Pagination from "../../components/Pagination";
@@ -91,10 +92,39 @@ function Alerts() {
              updateDisplayedData(page);
         };
 
+        const removeAlerts = (isRemoved: (alert: Alert) => boolean) => {
+            original_alerts_full.current = original_alerts_full.current.filter(
+                (alert) => !isRemoved(alert)
+            );
+            filtered_alerts_full.current = filtered_alerts_full.current.filter(
+                (alert) => !isRemoved(alert)
+            );
+
+            const newTotalPages = Math.ceil(filtered_alerts_full.current.length / resultsPerPage);
+            setTotalPages(newTotalPages);
+            updateDisplayedData(Math.max(1, Math.min(page, newTotalPages)));
+        };
+
+        const handleResolvedAlerts = (resolvedData: ResolvedEvent) => {
+            const resolvedIds = new Set(resolvedData.ids);
+            removeAlerts((alert) => resolvedIds.has(alert.id));
+        };
+
+        const handleEntityDeleted = (deletedData: EntityDeletedEvent) => {
+            const deletedIds = new Set(deletedData.ids);
+            removeAlerts((alert) =>
+                deletedIds.has(deletedData.entity === "business" ? alert.business_id : alert.device_id)
+            );
+        };
+
         socket.on("update-alerts", handleUpdateAlerts);
+        socket.on("alert-resolved", handleResolvedAlerts);
+        socket.on("entity-deleted", handleEntityDeleted);
 
         return () => {
             socket.off("update-alerts", handleUpdateAlerts);
+            socket.off("alert-resolved", handleResolvedAlerts);
+            socket.off("entity-deleted", handleEntityDeleted);
         };
     }, [inputValue, page]);
 
@@ -4,6 +4,7 @@ import axios from "axios";
 import DOMPurify from "dompurify";
 import { io } from "socket.io-client";
 import { Malfunction } from "../../types/Malfunction";
+import { EntityDeletedEvent, ResolvedEvent } from "../../types/RealtimeEvents";
 import MalfunctionRow from "../../components/MalfunctionRow";
 import { createMalfunctionsFromJson } from "../../utils/createObjectsFromJson";
 import Pagination from "../../components/Pagination";
@@ -88,10 +89,39 @@ function Malfunctions() {
              updateDisplayedData(page);
         };
 
+        const removeMalfunctions = (isRemoved: (malfunction: Malfunction) => boolean) => {
+            original_malfunctions_full.current = original_malfunctions_full.current.filter(
+                (malfunction) => !isRemoved(malfunction)
+            );
+            filtered_malfunctions_full.current = filtered_malfunctions_full.current.filter(
+                (malfunction) => !isRemoved(malfunction)
+            );
+
+            const newTotalPages = Math.ceil(filtered_malfunctions_full.current.length / resultsPerPage);
+            setTotalPages(newTotalPages);
+            updateDisplayedData(Math.max(1, Math.min(page, newTotalPages)));
+        };
+
+        const handleResolvedMalfunctions = (resolvedData: ResolvedEvent) => {
+            const resolvedIds = new Set(resolvedData.ids);
+            removeMalfunctions((malfunction) => resolvedIds.has(malfunction.id));
+        };
+
+        const handleEntityDeleted = (deletedData: EntityDeletedEvent) => {
+            const deletedIds = new Set(deletedData.ids);
+            removeMalfunctions((malfunction) =>
+                deletedIds.has(deletedData.entity === "business" ? malfunction.business_id : malfunction.device_id)
+            );
+        };
+
         socket.on("update-malfunctions", handleUpdateMalfunctions);
+        socket.on("malfunction-resolved", handleResolvedMalfunctions);
+        socket.on("entity-deleted", handleEntityDeleted);
 
         return () => {
             socket.off("update-malfunctions", handleUpdateMalfunctions);
+            socket.off("malfunction-resolved", handleResolvedMalfunctions);
+            socket.off("entity-deleted", handleEntityDeleted);
         };
     }, [inputValue, page]);
 